@@ -0,0 +1,100 @@
+"""
+Benchmark + parity check: helpers.click_history.batch_click_stats (one
+vectorized pass over every slot) vs the scalar snaps[-1] / seven_day_delta /
+lifetime_total calls map_listings used to make slot by slot.
+
+Synthetic metadata: full SNAPSHOT_CAP-entry histories, a mix of slots
+republished mid-history, never-clicked slots, and naive/unparseable
+timestamps. Exits non-zero if the two disagree on any slot.
+
+Usage (run from repo root):
+    python benchmarks/bench_click_history.py               # 2,000 slots
+    python benchmarks/bench_click_history.py --slots 20000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helpers.click_history import (
+    SNAPSHOT_CAP, batch_click_stats, lifetime_total, seven_day_delta, snapshot_table,
+)
+
+
+def synthetic_metadata(n_slots: int, now: datetime, seed: int = 5) -> dict:
+    rng = random.Random(seed)
+    metadata = {}
+    for i in range(n_slots):
+        start = now - timedelta(days=rng.uniform(0.5, 60))
+        n = 0 if i % 17 == 0 else rng.randint(1, SNAPSHOT_CAP)
+        step = (now - start) / max(n, 1)
+        clicks, snaps = 0, []
+        for j in range(n):
+            clicks += rng.randint(0, 3)
+            ts = start + step * j
+            iso = ts.isoformat() if j % 29 else ts.replace(tzinfo=None).isoformat()
+            snaps.append({"ts": "garbage" if (j == 13 and i % 500 == 0) else iso, "clicks": clicks})
+        published = start + (now - start) * rng.choice([0, 0, 0.5])
+        metadata[f"mini-ex_City{i}_eng_drainage"] = {
+            "published_at": published.isoformat() if i % 23 else None,
+            "click_snapshots": snaps,
+            "lifetime_clicks": rng.choice([None, 0, rng.randint(1, 500)]),
+        }
+    return metadata
+
+
+def scalar_stats(metadata: dict, now: datetime) -> dict:
+    out = {}
+    for slot, m in metadata.items():
+        snaps = m.get("click_snapshots", [])
+        out[slot] = {
+            "current_clicks":  snaps[-1]["clicks"] if snaps else None,
+            "seven_day":       seven_day_delta(snaps, m.get("published_at"), now=now),
+            "lifetime_clicks": lifetime_total(metadata, slot),
+        }
+    return out
+
+
+def run(n_slots: int = 2000) -> dict:
+    now = datetime.now(timezone.utc)
+    metadata = synthetic_metadata(n_slots, now)
+
+    t0 = time.perf_counter()
+    expected = scalar_stats(metadata, now)
+    scalar_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    table = snapshot_table(metadata)
+    table_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    got = batch_click_stats(metadata, now=now, table=table)
+    batch_s = time.perf_counter() - t0
+
+    mismatched = [s for s in expected if expected[s] != got[s]]
+    if mismatched:
+        raise SystemExit(f"parity failure on {len(mismatched)} slots, e.g. {mismatched[0]}: "
+                         f"scalar={expected[mismatched[0]]} batch={got[mismatched[0]]}")
+    return {
+        "benchmark": "click_history",
+        "slots": n_slots,
+        "snapshots": int(len(table["clicks"])),
+        "scalar_s": round(scalar_s, 3),
+        "table_s": round(table_s, 3),
+        "batch_s": round(batch_s, 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--slots", type=int, default=2000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.slots)))
+
+
+if __name__ == "__main__":
+    main()
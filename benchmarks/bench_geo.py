@@ -0,0 +1,104 @@
+"""
+Benchmark: helpers.geo.CityIndex radius / k-nearest / nearest-covered
+queries against the per-City Python haversine loop check_city_distances.py
+used to run, over a synthetic Central-Texas-sized-and-up City table.
+Exits non-zero if the two disagree.
+
+Usage (run from repo root):
+    python benchmarks/bench_geo.py                 # 2000 cities
+    python benchmarks/bench_geo.py --cities 200
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helpers.geo import CityIndex, haversine_miles
+
+WACO = (31.5493, -97.1467)
+QUERIES = 200      # radius / nearest queries timed
+RADIUS_MILES = 25
+COVERED_SHARE = 0.3
+
+
+def synthetic_cities(n: int, seed: int = 5) -> list:
+    rng = random.Random(seed)
+    return [{"city": f"City {i}", "state": "TX",
+             "lat": str(round(WACO[0] + rng.uniform(-1.5, 1.5), 5)),
+             "lng": str(round(WACO[1] + rng.uniform(-1.5, 1.5), 5))} for i in range(n)]
+
+
+def loop_within(cities, lat, lng, miles):
+    out = []
+    for c in cities:
+        d = haversine_miles(lat, lng, float(c["lat"]), float(c["lng"]))
+        if d <= miles:
+            out.append((c["city"], round(d, 1)))
+    return sorted(out, key=lambda x: x[1])
+
+
+def loop_nearest_among(cities, names, candidates):
+    by_name = {c["city"]: (float(c["lat"]), float(c["lng"])) for c in cities}
+    out = {}
+    for name in names:
+        lat, lng = by_name[name]
+        best = min(((haversine_miles(lat, lng, *by_name[o]), o) for o in candidates if o != name), default=None)
+        if best:
+            out[name] = (best[1], round(best[0], 1))
+    return out
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def run(n_cities: int = 2000) -> dict:
+    cities = synthetic_cities(n_cities)
+    rng = random.Random(9)
+    origins = [rng.choice(cities)["city"] for _ in range(QUERIES)]
+    covered = {c["city"] for c in cities if rng.random() < COVERED_SHARE}
+    uncovered = [c["city"] for c in cities if c["city"] not in covered]
+
+    index, build_s = _timed(lambda: CityIndex(cities))
+    locs = {c["city"]: (float(c["lat"]), float(c["lng"])) for c in cities}
+
+    loop_r, loop_radius_s = _timed(lambda: [loop_within(cities, *locs[o], RADIUS_MILES) for o in origins])
+    idx_r, idx_radius_s = _timed(lambda: [index.within_radius(o, RADIUS_MILES) for o in origins])
+    if [set(r) for r in loop_r] != [set(r) for r in idx_r]:
+        raise SystemExit("parity failure: within_radius")
+
+    _, idx_knn_s = _timed(lambda: [index.nearest(o, k=5) for o in origins])
+
+    loop_n, loop_gap_s = _timed(lambda: loop_nearest_among(cities, uncovered, covered))
+    idx_n, idx_gap_s = _timed(lambda: index.nearest_among(uncovered, covered))
+    bad = [u for u in uncovered if loop_n[u][1] != idx_n[u][1]]
+    if bad:
+        raise SystemExit(f"parity failure: nearest_among on {len(bad)} cities, e.g. {bad[0]}")
+
+    return {
+        "benchmark": "geo",
+        "cities": n_cities,
+        "build_s": round(build_s, 4),
+        "radius_loop_s": round(loop_radius_s, 3),
+        "radius_index_s": round(idx_radius_s, 3),
+        "knn5_index_s": round(idx_knn_s, 3),
+        "nearest_covered_loop_s": round(loop_gap_s, 3),
+        "nearest_covered_index_s": round(idx_gap_s, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", type=int, default=2000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.cities)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: import time of the read-only entry points (slot parsing, the map,
+the dashboard server) measured with `python -X importtime` in a fresh
+interpreter each, plus which heavy optional packages each one dragged in.
+helpers.ads — the listing builder — is measured alongside for comparison.
+
+Exits non-zero if a read-only target imports Pillow, Selenium or anthropic:
+they only belong to publishing (helpers.ads' image and listing builders,
+helpers.listing_helper) and content generation.
+
+Usage (run from repo root):
+    python benchmarks/bench_import.py               # best of 5
+    python benchmarks/bench_import.py --repeat 10
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+READ_ONLY = ("helpers.catalog", "helpers.slot", "map_listings", "map_server")
+COMPARE = ("helpers.ads",)
+HEAVY = ("PIL", "selenium", "anthropic")
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure(module: str) -> dict:
+    """One fresh-interpreter import of `module`: its cumulative import time
+    (us, from -X importtime), and which HEAVY packages ended up loaded."""
+    probe = f"import sys, json, {module}; print(json.dumps(sorted({{m.split('.')[0] for m in sys.modules}} & {set(HEAVY)!r})))"
+    env = dict(os.environ, TASK_STATUS_BACKEND="stub")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", probe],
+                          cwd=REPO, env=env, capture_output=True, text=True, check=True)
+    cumulative = None
+    for m in _LINE.finditer(proc.stderr):
+        if m.group(4) == module and m.group(3) == " ":  # top level, not a nested re-import
+            cumulative = int(m.group(2))
+    return {"cumulative_us": cumulative, "heavy": json.loads(proc.stdout.strip().splitlines()[-1])}
+
+
+def run(repeat: int = 5) -> dict:
+    modules = {}
+    for module in READ_ONLY + COMPARE:
+        samples = [measure(module) for _ in range(repeat)]
+        modules[module] = {
+            "import_ms": round(min(s["cumulative_us"] for s in samples) / 1000, 1),
+            "heavy": samples[0]["heavy"],
+            "read_only": module in READ_ONLY,
+        }
+    return {"benchmark": "import_time", "repeat": repeat, "modules": modules}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    result = run(args.repeat)
+    print(json.dumps(result))
+    offenders = {m: r["heavy"] for m, r in result["modules"].items() if r["read_only"] and r["heavy"]}
+    if offenders:
+        raise SystemExit(f"read-only entry points import heavy packages: {offenders}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Micro-benchmark: helpers.log_events vs the inline per-line re.search parsing
+map_server._parse_live used to do, over a synthetic listing_progress.log.
+
+Usage (run from repo root):
+    python benchmarks/bench_log_events.py              # 1M lines
+    python benchmarks/bench_log_events.py --lines 200000
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helpers.log_events import LiveState
+
+_FILLER = [
+    "Inventory: 3 duplicate-flagged, 12 new clicks since last scan.",
+    "Budget: 84.2 min — deadline 09:31:07",
+    "Listing 'Mini Excavator Rental' failed: timeout",
+    "Scrolled selling page, 118 cards loaded",
+    "Removed and de-listed from state: mini-ex_Waco_eng_drainage (3/9)",
+]
+_PHASES = ["Phase 0 — removing 2 FB-flagged duplicate listings...",
+           "Phase 1a — coverage pass (one listing per uncovered city)...",
+           "Phase 1b — fill pass (remaining new slots for covered cities)...",
+           "Phase 3 — re-listing previously-duplicate slots...",
+           "Phase 2 — replacing non-duplicate existing slots (refresh)..."]
+_CITIES = ["Waco", "Harker Heights", "Bruceville-Eddy", "China Spring", "Lorena"]
+
+
+def synthetic_lines(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    lines = []
+    for i in range(n):
+        ts = f"2026-07-{1 + i % 28:02d} {8 + i % 10:02d}:{i % 60:02d}:{(i * 7) % 60:02d},123"
+        r = rng.random()
+        if r < 0.05:
+            city = rng.choice(_CITIES)
+            equip = rng.choice(["mini-ex", "trackloader"])
+            msg = f"Publishing slot '{equip}_{city}_eng_site_prep': {equip} rental – {city}"
+        elif r < 0.07:
+            msg = rng.choice(_PHASES)
+        elif r < 0.071:
+            msg = "Agent run complete. Remaining budget: 3.1 min. Fatal stop: False."
+        else:
+            msg = rng.choice(_FILLER)
+        lines.append(f"{ts} - INFO - {msg}\n")
+    return lines
+
+
+def legacy_parse(lines) -> dict:
+    """The pre-log_events parsing loop, kept verbatim for comparison."""
+    publishing, recent, phase = None, [], None
+    for line in lines:
+        line = line.strip()
+        m = re.search(r"(\d{2}:\d{2}:\d{2}).*Publishing slot '([^']+)': (.+)$", line)
+        if m:
+            slot = m.group(2)
+            parts = slot.split("_")
+            publishing = {"slot": slot, "title": m.group(3),
+                          "city": parts[1] if len(parts) > 1 else "", "equip": parts[0], "ts": m.group(1)}
+            recent.append(publishing.copy())
+        else:
+            pm = re.search(r"Phase (\S+)", line)
+            if pm:
+                phase = pm.group(1).rstrip(".")
+            if "Agent run complete" in line or "Session window closing" in line:
+                phase = "done"
+    return {"publishes": len(recent), "phase": phase}
+
+
+def run(n_lines: int = 1_000_000) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "listing_progress.log")
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(synthetic_lines(n_lines))
+
+        t0 = time.perf_counter()
+        with open(path, encoding="utf-8") as f:
+            legacy = legacy_parse(f)
+        legacy_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        live = LiveState(recent_len=n_lines)
+        with open(path, encoding="utf-8") as f:
+            live.feed(f)
+        new_s = time.perf_counter() - t0
+
+    assert legacy["publishes"] == len(live.recent) and legacy["phase"] == live.phase, "parsers disagree"
+    return {
+        "benchmark": "log_events",
+        "lines": n_lines,
+        "legacy_s": round(legacy_s, 3),
+        "log_events_s": round(new_s, 3),
+        "speedup": round(legacy_s / new_s, 2) if new_s else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.lines)))
+
+
+if __name__ == "__main__":
+    main()
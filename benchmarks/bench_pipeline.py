@@ -0,0 +1,221 @@
+"""
+Benchmark: the local data pipeline over a synthetic fixture
+(benchmarks/fixtures.py) at a multiple of today's size — Slot parsing, click
+history load / aggregation / save, map_listings marker building and output
+writing, fuel_price_agent repricing, and map_server endpoint latency.
+
+No browser and no network: everything runs against a scratch copy of the
+fixture, and map_server runs as a subprocess on a free local port with the
+stub task-status backend, serving that copy (MAP_SERVER_DIR).
+
+The in-process stages run in a spawned worker with the scratch copy as its
+cwd: helpers.catalog keeps the City table it first read for the life of the
+process, and at 100x the loaded histories are worth freeing before
+map_server loads its own. benchmarks/run_all.py runs 1x, 10x and 100x.
+
+Usage (run from repo root):
+    python benchmarks/bench_pipeline.py                # 1x
+    python benchmarks/bench_pipeline.py --scale 10
+    python benchmarks/bench_pipeline.py --scale 100 --fixtures /tmp/fx100 --requests 10
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+
+import numpy as np
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+os.environ.setdefault("TASK_STATUS_BACKEND", "stub")  # no schtasks in build_map()
+
+import map_listings
+from helpers import click_analytics, slot
+from helpers.click_history import batch_click_stats, load_metadata, record_snapshot, save_metadata, snapshot_table
+from helpers.delivery_cost import PricingTable
+from helpers.distance_cache import DistanceCache
+from helpers.json_store import clear_cache, load_json
+from benchmarks.fixtures import WACO, ensure
+
+REPEAT = 3                 # best-of for the stages that can be re-run as is
+SERVER_REQUESTS = 20       # timed requests per endpoint
+SERVER_START_TIMEOUT = 600  # seconds to wait for the first map build at large scales
+VIEW_BBOX = (WACO[1] - 0.3, WACO[0] - 0.3, WACO[1] + 0.3, WACO[0] + 0.3)  # a city-level view
+ENDPOINTS = {
+    "index":        "/",
+    "summary":      "/api/summary",
+    "markers_view": "/api/markers?bbox=%s,%s,%s,%s&zoom=11" % VIEW_BBOX,
+    "markers_all":  "/api/markers",
+    "competitors":  "/api/competitors?bbox=%s,%s,%s,%s" % VIEW_BBOX,
+    "live":         "/api/live",
+    "status":       "/api/status",
+    "analytics":    "/api/analytics",
+    "scan_health":  "/api/scan-health",
+    "runs":         "/api/runs",
+    "runs_script":  "/api/runs?script=stats_tracker",
+}
+
+
+def default_fixture_dir(scale: int) -> str:
+    return os.path.join(tempfile.gettempdir(), "pipeline_bench_fixtures", f"{scale}x")
+
+
+def _timed(times: dict, name: str, fn, *args, repeat: int = 1, **kwargs):
+    """fn(*args, **kwargs), recording its best time over `repeat` calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+    times[name] = round(best, 4)
+    return out
+
+
+def _pricing_table(cities: list) -> PricingTable:
+    cache = DistanceCache("data/distance_cache.json")
+    cache.seed_from_cities(cities)
+    return PricingTable(cities, cache.resolve(cities))
+
+
+def _parse_all(keys) -> list:
+    slot._parse_cached.cache_clear()
+    return [slot.parse(k) for k in keys]
+
+
+def bench_local(work: str) -> dict:
+    """Time the in-process stages against the fixture copy at `work`."""
+    os.chdir(work)  # helpers.catalog / map_listings resolve data/ against the cwd
+    times = {}
+    state = load_json(map_listings.STATE_FILE)
+    _timed(times, "slot_parse_s", _parse_all, state, repeat=REPEAT)
+
+    # Click history: load, aggregate, fold into analytics, then one scan's worth of writes.
+    metadata = _timed(times, "load_metadata_s", load_metadata, map_listings.METADATA_FILE, repeat=REPEAT)
+    table = _timed(times, "snapshot_table_s", snapshot_table, metadata, repeat=REPEAT)
+    _timed(times, "batch_click_stats_s", batch_click_stats, metadata, table=table, repeat=REPEAT)
+    _timed(times, "click_analytics_update_s", click_analytics.update, metadata)
+    now = datetime.now(timezone.utc).isoformat()
+    for s, m in metadata.items():
+        record_snapshot(metadata, s, m["click_snapshots"][-1]["clicks"] + 1, ts=now)
+    _timed(times, "save_metadata_s", save_metadata, metadata, map_listings.METADATA_FILE)
+    del metadata, table
+
+    # Map: cold build from disk, an unchanged rebuild, the writes, the viewport
+    # slice, then regenerate() with nothing changed since (the digest skip).
+    clear_cache()
+    inputs = _timed(times, "map_load_inputs_s", map_listings.load_inputs, ".")
+    result = _timed(times, "map_build_cold_s", map_listings.build_map, **inputs)
+    _timed(times, "map_build_warm_s", map_listings.build_map, **inputs)
+    _timed(times, "map_view_s", map_listings.view, result, VIEW_BBOX, 11, repeat=REPEAT)
+    map_listings.regenerate(".", force=True)
+    _timed(times, "map_write_outputs_s", map_listings.write_outputs, result, ".")
+    _timed(times, "map_regenerate_unchanged_s", map_listings.regenerate, ".", repeat=REPEAT)
+    del inputs, result
+
+    # Fuel: distances + pricing table (fuel_price_agent.load_pricing — not
+    # imported, the agent sets up its log file and crash hook at import),
+    # one reprice, a what-if sweep.
+    cities = load_json(map_listings.CITIES_FILE)
+    table = _timed(times, "fuel_load_pricing_s", _pricing_table, cities)
+    _timed(times, "fuel_diff_s", table.diff, 4.10, repeat=REPEAT)
+    _timed(times, "fuel_apply_s", table.apply, 4.10)
+    _timed(times, "fuel_sweep_s", table.sweep, list(np.arange(3.00, 6.0001, 0.05)), repeat=REPEAT)
+    return times
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def _get(url: str) -> tuple:
+    req = urllib.request.Request(url, headers={"Accept-Encoding": "gzip"})
+    with urllib.request.urlopen(req, timeout=SERVER_START_TIMEOUT) as resp:
+        return resp.status, len(resp.read())
+
+
+def bench_server(work: str, n_requests: int = SERVER_REQUESTS) -> dict:
+    """Start map_server on `work` and time each endpoint: seconds until the
+    first map build answered, then p50/p95 ms and gzipped bytes per endpoint."""
+    port = _free_port()
+    base = f"http://localhost:{port}"
+    env = dict(os.environ, MAP_SERVER_DIR=work, TASK_STATUS_BACKEND="stub")
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.join(REPO, "map_server.py"), "--port", str(port), "--no-open"],
+                            cwd=work, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError(f"map_server exited with {proc.returncode}")
+            if time.perf_counter() - t0 > SERVER_START_TIMEOUT:
+                raise RuntimeError("map_server never served a built map")
+            try:
+                if _get(base + ENDPOINTS["summary"])[0] == 200:
+                    break
+            except (urllib.error.URLError, ConnectionError):
+                pass
+            time.sleep(0.1)
+        out = {"first_summary_s": round(time.perf_counter() - t0, 3)}
+
+        for name, path in ENDPOINTS.items():
+            _get(base + path)
+            samples, size = [], 0
+            for _ in range(n_requests):
+                t = time.perf_counter()
+                _, size = _get(base + path)
+                samples.append((time.perf_counter() - t) * 1000)
+            samples.sort()
+            out[name] = {"p50_ms": round(statistics.median(samples), 2),
+                         "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 2),
+                         "bytes": size}
+        return out
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def run(scale: int = 1, fixtures: str = None, n_requests: int = SERVER_REQUESTS, server: bool = True) -> dict:
+    fixtures = fixtures or default_fixture_dir(scale)
+    manifest = ensure(fixtures, scale)
+    with tempfile.TemporaryDirectory() as tmp:
+        work = os.path.join(tmp, "work")
+        shutil.copytree(fixtures, work)
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            times = pool.apply(bench_local, (work,))
+        endpoints = bench_server(work, n_requests) if server else {}
+    return {
+        "benchmark": "pipeline",
+        "scale": scale,
+        "sizes": manifest["sizes"],
+        "snapshots": manifest["snapshots"],
+        "timings_s": times,
+        "endpoints": endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=1, help="Multiple of today's size")
+    parser.add_argument("--fixtures", default=None, help="Fixture directory (generated if missing or stale)")
+    parser.add_argument("--requests", type=int, default=SERVER_REQUESTS, help="Timed requests per endpoint")
+    parser.add_argument("--no-server", action="store_true", help="Skip the map_server endpoint timings")
+    args = parser.parse_args()
+    print(json.dumps(run(args.scale, args.fixtures, args.requests, server=not args.no_server)))
+
+
+if __name__ == "__main__":
+    main()
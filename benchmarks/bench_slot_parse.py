@@ -0,0 +1,88 @@
+"""
+Benchmark: helpers.slot.parse over synthetic Slot keys — cold (every key new
+to the memo) and warm (a state.json-sized working set parsed over and over,
+as the dashboard does on every rebuild) — against the old rebuild-the-patterns-per-call implementation.
+
+Usage (run from repo root):
+    python benchmarks/bench_slot_parse.py               # 100k keys
+    python benchmarks/bench_slot_parse.py --keys 20000
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+WORKING_SET = 5000  # distinct keys in the warm pass — a large state.json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helpers import slot
+from helpers.catalog import get_equipment, TASK_VARIANTS
+
+
+def synthetic_keys(n: int, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    equips = [e for e in get_equipment() if TASK_VARIANTS.get(e)]
+    keys = []
+    for i in range(n):
+        equip = rng.choice(equips)
+        city = f"City {i % 5000}" if i % 3 else f"Town_{i % 5000}"
+        if rng.random() < 0.1:
+            keys.append(f"{equip}_{city}_eng")  # legacy shape
+        else:
+            task = rng.choice(TASK_VARIANTS[equip])["slug"]
+            keys.append(slot.build(equip, city, rng.choice(("eng", "spa")), task))
+    return keys
+
+
+def legacy_parse(slot_key: str):
+    """parse() as it was before pattern caching and memoization."""
+    equip_alt = "|".join(re.escape(e) for e in get_equipment())
+    lang_alt = "|".join(("eng", "spa"))
+    m = re.compile(rf"^({equip_alt})_(.+)_({lang_alt})_(.+)$").match(slot_key)
+    if m:
+        return slot.Slot(*m.groups())
+    m = re.compile(rf"^({equip_alt})_(.+)_({lang_alt})$").match(slot_key)
+    if m:
+        return slot.Slot(*m.groups(), None)
+    return None
+
+
+def _time(fn, keys) -> float:
+    t0 = time.perf_counter()
+    for k in keys:
+        fn(k)
+    return time.perf_counter() - t0
+
+
+def run(n_keys: int = 100_000) -> dict:
+    keys = synthetic_keys(n_keys)
+    slot._parse_cached.cache_clear()
+    legacy_s = _time(legacy_parse, keys)
+    cold_s = _time(slot.parse, keys)
+    working = keys[:WORKING_SET]
+    _time(slot.parse, working)
+    warm_s = _time(slot.parse, (working * (n_keys // len(working) + 1))[:n_keys])
+    assert all(slot.parse(k) == legacy_parse(k) for k in keys[:2000]), "parse() disagrees with legacy parser"
+    return {
+        "benchmark": "slot_parse",
+        "keys": n_keys,
+        "legacy_s": round(legacy_s, 3),
+        "cold_s": round(cold_s, 3),
+        "warm_s": round(warm_s, 3),
+        "memo": slot._parse_cached.cache_info()._asdict(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=100_000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.keys)))
+
+
+if __name__ == "__main__":
+    main()
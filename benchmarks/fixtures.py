@@ -0,0 +1,174 @@
+"""
+Synthetic data directories for the pipeline benchmarks, at a multiple of
+today's size: everything stats_tracker.py, map_listings.py,
+fuel_price_agent.py and map_server.py read, laid out the way they expect it
+under one root (state.json, listing_progress.log, data/...).
+
+  state.json                     BASE["slots"] x scale active Slots
+  data/slot_metadata.json        one entry per Slot, snapshots stripped, with
+  data/click_snapshots.jsonl     ...a full SNAPSHOT_CAP-snapshot history each,
+                                 in the log format save_metadata() appends
+  data/cities_data.json          BASE["cities"] x scale Cities around Waco
+  data/competitors.json          BASE["sellers"] x scale sellers
+  data/duplicate_history.json    BASE["dupes"] x scale duplicate-removed Slots
+  data/run_history.json,         run and scan ledgers, imported into
+  data/scan_health.json          data/ops.db the first time it's opened
+  listing_progress.log           BASE["log_lines"] x scale lines
+
+Deterministic for a given scale and seed, relative to the hour it was
+generated in. ensure() reuses a directory already generated with the same
+parameters within MAX_AGE — older, the 7-day click windows would have
+drifted off the snapshot histories.
+
+Usage (run from repo root):
+    python benchmarks/fixtures.py --scale 10 --out /tmp/fixtures-10x
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helpers import slot
+from helpers.catalog import TASK_VARIANTS
+from helpers.click_history import SNAPSHOT_CAP, snapshot_log_path
+from benchmarks.bench_log_events import synthetic_lines
+
+# Today's size: data/cities_data.json, a full selling page, the duplicate
+# ledger and a few months of listing_progress.log.
+BASE = {"cities": 191, "slots": 250, "sellers": 20, "dupes": 100, "log_lines": 20_000}
+RUNS_PER_SCRIPT = 100   # run ledger depth; grows with time, not inventory
+SCANS_PER_SOURCE = 100
+RENTAL = ("mini-ex", "trackloader")
+WACO = (31.5493, -97.1467)
+MANIFEST = "fixture.json"
+MAX_AGE = timedelta(hours=12)
+
+
+def _cities(n: int, rng: random.Random) -> list:
+    spread = 1.5 * max(1.0, (n / BASE["cities"]) ** 0.5)  # constant density as the table grows
+    out = []
+    for i in range(n):
+        lat = WACO[0] + rng.uniform(-spread, spread)
+        lng = WACO[1] + rng.uniform(-spread, spread)
+        miles = round(((lat - WACO[0]) ** 2 + (lng - WACO[1]) ** 2) ** 0.5 * 69 * 1.25, 1)
+        out.append({"city": f"City {i}", "state": "TX", "lat": str(round(lat, 5)), "lng": str(round(lng, 5)),
+                    "distance": miles, "estimated_cost": round(2.75 * miles + 1.25 * miles, 2)})
+    return out
+
+
+def _slots(n: int, cities: list, rng: random.Random) -> list:
+    seen, out = set(), []
+    while len(out) < n:
+        equip = rng.choice(RENTAL)
+        key = slot.build(equip, rng.choice(cities)["city"], rng.choice(("eng", "spa")),
+                         rng.choice(TASK_VARIANTS[equip])["slug"])
+        if key not in seen:
+            seen.add(key)
+            out.append(key)
+    return out
+
+
+def generate(root: str, scale: int = 1, seed: int = 3) -> dict:
+    """Write a fixture directory at `scale` x BASE into `root` (replacing
+    whatever was there). Returns the manifest: sizes, seed, generated_at."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    t0 = time.perf_counter()
+    if os.path.exists(root):
+        shutil.rmtree(root)
+    data = os.path.join(root, "data")
+    os.makedirs(data)
+
+    def dump(rel, obj):
+        with open(os.path.join(root, rel), "w", encoding="utf-8") as f:
+            json.dump(obj, f)
+
+    sizes = {k: v * scale for k, v in BASE.items()}
+    cities = _cities(sizes["cities"], rng)
+    dump("data/cities_data.json", cities)
+
+    slots = _slots(sizes["slots"], cities, rng)
+    dump("state.json", {s: f"{slot.parse(s).equipment_type} rental – {slot.parse(s).city}" for s in slots})
+
+    # Hourly stats_tracker scans: every Slot shares the scan timestamps.
+    stamps = [(now - timedelta(hours=SNAPSHOT_CAP - 1 - j)).isoformat() for j in range(SNAPSHOT_CAP)]
+    metadata = {}
+    meta_path = os.path.join(data, "slot_metadata.json")
+    with open(snapshot_log_path(meta_path), "w", encoding="utf-8") as log:
+        for s in slots:
+            clicks, lines = 0, []
+            for ts in stamps:
+                clicks += rng.choice((0, 0, 0, 0, 1, 1, 2))
+                lines.append(f'{{"slot": "{s}", "ts": "{ts}", "clicks": {clicks}}}')
+            log.write("\n".join(lines) + "\n")
+            published = now - timedelta(hours=rng.randint(SNAPSHOT_CAP, 60 * 24))
+            metadata[s] = {
+                "published_at":   published.isoformat(),
+                "last_views":     clicks * rng.randint(5, 20),
+                "last_views_at":  stamps[-1],
+                "price":          rng.choice((200, 250, 280, 300)),
+                "days_listed_fb": (now - published).days,
+                "days_listed_at": stamps[-1],
+                "lifetime_clicks": rng.choice((None, rng.randint(0, 300))),
+            }
+    dump("data/slot_metadata.json", metadata)
+
+    dump("data/competitors.json", {"sellers": {
+        f"seller{i}": {"name": f"Seller {i}", "profile_id": f"seller{i}", "listings": [
+            {"title": "Excavator rental", "url": f"https://example.invalid/{i}/{j}",
+             "lat": float(c["lat"]), "lng": float(c["lng"]), "city": c["city"]}
+            for j, c in enumerate(rng.sample(cities, min(15, len(cities))))]}
+        for i in range(sizes["sellers"])}})
+
+    removed = _slots(sizes["dupes"], cities, rng)
+    dump("data/duplicate_history.json", {s: (now - timedelta(days=rng.uniform(0, 90))).isoformat() for s in removed})
+
+    statuses = ("success",) * 8 + ("no-op", "fatal")
+    dump("data/run_history.json", {script: [
+        {"timestamp": (now - timedelta(hours=RUNS_PER_SCRIPT - j)).isoformat(), "status": rng.choice(statuses),
+         "metrics": {"found": rng.randint(0, sizes["slots"]), "matched": rng.randint(0, sizes["slots"])}}
+        for j in range(RUNS_PER_SCRIPT)] for script in ("daily_agent", "stats_tracker", "fuel_price_agent")})
+    dump("data/scan_health.json", {source: [int(sizes["slots"] * rng.uniform(0.9, 1.0)) for _ in range(SCANS_PER_SOURCE)]
+                                   for source in ("stats_tracker", "daily_agent_inventory")})
+
+    with open(os.path.join(root, "listing_progress.log"), "w", encoding="utf-8") as f:
+        f.writelines(synthetic_lines(sizes["log_lines"], seed=seed))
+
+    manifest = {"scale": scale, "seed": seed, "sizes": sizes, "snapshots": len(slots) * SNAPSHOT_CAP,
+                "generated_at": now.isoformat(), "generate_s": round(time.perf_counter() - t0, 2)}
+    dump(MANIFEST, manifest)
+    return manifest
+
+
+def ensure(root: str, scale: int = 1, seed: int = 3) -> dict:
+    """The manifest of the fixture at `root`, generating it first unless one
+    with the same scale, seed and BASE sizes, newer than MAX_AGE, is there."""
+    try:
+        with open(os.path.join(root, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+        age = datetime.now(timezone.utc) - datetime.fromisoformat(manifest["generated_at"])
+        if (manifest["scale"], manifest["seed"]) == (scale, seed) and age < MAX_AGE and \
+                manifest["sizes"] == {k: v * scale for k, v in BASE.items()}:
+            return manifest
+    except (OSError, ValueError, KeyError):
+        pass
+    return generate(root, scale, seed)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=1, help="Multiple of today's size (1, 10, 100, ...)")
+    parser.add_argument("--out", required=True, help="Directory to write (replaced if it exists)")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps(generate(args.out, args.scale, args.seed)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Run the pipeline benchmark at 1x, 10x and 100x today's size (each scale in
+its own process) plus, with --micro, the single-module benchmarks beside it,
+and write everything to one JSON file:
+
+    {"started_at": ..., "python": ..., "platform": ...,
+     "pipeline": [<bench_pipeline.run() per scale>], "micro": [...]}
+
+--baseline compares against an earlier results file: every timing (stage
+seconds, endpoint p50 ms) that got more than --tolerance times slower at the
+same scale is listed, and the exit status is 1, so a scheduled or pre-merge
+run can fail on a regression.
+
+Usage (run from repo root):
+    python benchmarks/run_all.py                          # -> benchmarks/results/<stamp>.json
+    python benchmarks/run_all.py --scales 1 10 --micro
+    python benchmarks/run_all.py --baseline benchmarks/results/20261018T110000.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from benchmarks import bench_click_history, bench_geo, bench_import, bench_log_events, bench_slot_parse
+
+RESULTS_DIR = os.path.join(HERE, "results")
+SCALES = (1, 10, 100)
+TOLERANCE = 1.5   # slower than this x the baseline counts as a regression
+MIN_SECONDS = 0.02   # timings under this in both runs are noise, not regressions
+MICRO = (bench_import, bench_slot_parse, bench_click_history, bench_geo, bench_log_events)
+
+
+def run_pipeline(scale: int, requests: int = None) -> dict:
+    cmd = [sys.executable, os.path.join(HERE, "bench_pipeline.py"), "--scale", str(scale)]
+    if requests:
+        cmd += ["--requests", str(requests)]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def timings(result: dict) -> dict:
+    """{(scale, name): seconds} for every stage and endpoint p50 in `result`."""
+    flat = {}
+    for r in result.get("pipeline", []):
+        for name, secs in r["timings_s"].items():
+            flat[(r["scale"], name)] = secs
+        for name, ep in r["endpoints"].items():
+            if isinstance(ep, dict):
+                flat[(r["scale"], f"endpoint.{name}")] = ep["p50_ms"] / 1000
+            else:
+                flat[(r["scale"], f"endpoint.{name}")] = ep
+    return flat
+
+
+def compare(current: dict, baseline: dict, tolerance: float = TOLERANCE) -> list:
+    """[(scale, name, baseline s, current s, ratio)] for each timing more
+    than `tolerance` x slower than the baseline, worst first."""
+    now, before = timings(current), timings(baseline)
+    slower = []
+    for key, secs in now.items():
+        old = before.get(key)
+        if old is None or max(old, secs) < MIN_SECONDS:
+            continue
+        ratio = secs / max(old, 1e-9)
+        if ratio > tolerance:
+            slower.append((*key, old, secs, round(ratio, 2)))
+    return sorted(slower, key=lambda r: r[-1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=list(SCALES))
+    parser.add_argument("--requests", type=int, default=None, help="Timed requests per endpoint")
+    parser.add_argument("--micro", action="store_true", help="Also run the single-module benchmarks")
+    parser.add_argument("--out", default=None, help="Results file (default benchmarks/results/<stamp>.json)")
+    parser.add_argument("--baseline", default=None, help="Earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    started = datetime.now(timezone.utc)
+    result = {
+        "started_at": started.isoformat(),
+        "python":     platform.python_version(),
+        "platform":   platform.platform(),
+        "pipeline":   [],
+        "micro":      [],
+    }
+    for scale in args.scales:
+        print(f"pipeline {scale}x ...", file=sys.stderr)
+        result["pipeline"].append(run_pipeline(scale, args.requests))
+    if args.micro:
+        for bench in MICRO:
+            print(f"{bench.__name__} ...", file=sys.stderr)
+            result["micro"].append(bench.run())
+
+    out = args.out or os.path.join(RESULTS_DIR, started.strftime("%Y%m%dT%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(json.dumps(result))
+    print(f"Results written to {out}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        slower = compare(result, baseline, args.tolerance)
+        for scale, name, old, new, ratio in slower:
+            print(f"REGRESSION {scale}x {name}: {old:.4f}s -> {new:.4f}s ({ratio}x)", file=sys.stderr)
+        if slower:
+            sys.exit(1)
+        print(f"No timing more than {args.tolerance}x slower than {args.baseline}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,7 +14,10 @@ Run once (or on a schedule):
 
 import argparse
 import json
-import math
+
+import numpy as np
+
+from helpers.geo import CityIndex, haversine_miles  # noqa: F401 — haversine_miles kept importable from here
 
 CITIES_FILE = "data/cities_data.json"
 BAD_CITIES_FILE = "data/bad_cities.json"
@@ -22,29 +25,14 @@ WACO = (31.5493, -97.1467)  # matches competitor_scraper.py's "Waco default"
 THRESHOLD_MILES = 100
 
 
-def haversine_miles(lat1, lng1, lat2, lng2) -> float:
-    R = 3958.8  # earth radius, miles
-    p1, p2 = math.radians(lat1), math.radians(lat2)
-    dp = math.radians(lat2 - lat1)
-    dl = math.radians(lng2 - lng1)
-    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
-    return R * 2 * math.asin(math.sqrt(a))
-
-
 def find_far_cities(threshold_miles: float = THRESHOLD_MILES) -> list:
-    with open(CITIES_FILE, encoding="utf-8") as f:
-        cities = json.load(f)
-
-    flagged = []
-    for c in cities:
-        try:
-            lat, lng = float(c["lat"]), float(c["lng"])
-        except (TypeError, ValueError, KeyError):
-            flagged.append({"city": c.get("city", "?"), "distance_miles": None, "reason": "missing/invalid lat/lng"})
-            continue
-        distance = haversine_miles(*WACO, lat, lng)
-        if distance > threshold_miles:
-            flagged.append({"city": c["city"], "distance_miles": round(distance, 1), "reason": "too far from Waco"})
+    index = CityIndex.load(CITIES_FILE)
+    flagged = [{"city": city, "distance_miles": None, "reason": "missing/invalid lat/lng"}
+               for city in index.invalid]
+    distances = index.distances_from(*WACO)
+    for i in np.flatnonzero(distances > threshold_miles):
+        flagged.append({"city": index.names[i], "distance_miles": round(float(distances[i]), 1),
+                        "reason": "too far from Waco"})
     return flagged
 
 
@@ -15,6 +15,7 @@ import shutil
 
 from helpers.scraper import Scraper
 from helpers.listing_helper import Listing
+from helpers.ops_store import get_store
 
 LOG_FILE = "listing_progress.log"
 logging.basicConfig(
@@ -28,7 +29,7 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 STATE_FILE = "state.json"
-DUPE_FILE = "data/duplicate_history.json"
+DUPE_BACKUP = "data/duplicate_history.json.bak"
 
 scraper = Scraper("https://facebook.com")
 scraper.add_login_functionality(
@@ -50,10 +51,11 @@ if os.path.exists(STATE_FILE):
         json.dump({}, f)
     logger.info("Cleanup — state.json cleared (backup: state.json.bak)")
 
-if os.path.exists(DUPE_FILE):
-    shutil.copy(DUPE_FILE, DUPE_FILE + ".bak")
-    with open(DUPE_FILE, "w") as f:
-        json.dump({}, f)
-    logger.info("Cleanup — duplicate_history.json cleared (backup: .bak)")
+dupes = get_store().dupes()
+if dupes:
+    with open(DUPE_BACKUP, "w") as f:
+        json.dump(dupes, f, indent=4)
+    get_store().clear_dupes()
+    logger.info(f"Cleanup — duplicate history cleared (backup: {DUPE_BACKUP})")
 
 logger.info("Cleanup complete. Run daily_agent.py to start fresh.")
@@ -24,7 +24,7 @@ from selenium.common.exceptions import InvalidSessionIdException, NoSuchWindowEx
 
 from helpers.scraper import Scraper
 from helpers.listing_helper import Listing
-from helpers.slot import parse as parse_slot
+from helpers.slot import SlotIndex
 
 BAD_CITIES_FILE = "data/bad_cities.json"
 STATE_FILE = "state.json"
@@ -45,12 +45,12 @@ logger = logging.getLogger(__name__)
 
 
 def _slots_to_remove(state: dict) -> dict:
-    result = {}
-    for slot, title in state.items():
-        parsed = parse_slot(slot)
-        if parsed and parsed.city in REMOVE_CITIES:
-            result[slot] = title
-    return result
+    index = SlotIndex.build(state)
+    return {
+        slot: state[slot]
+        for city in sorted(REMOVE_CITIES)
+        for slot in index.slots_for_city(city)
+    }
 
 
 def main():
@@ -2,7 +2,7 @@
 daily_agent.py — Time-budgeted Facebook Marketplace listing agent.
 
 Priority order each run:
-  0.  Remove FB-flagged duplicate listings; record their slots in duplicate_history.json
+  0.  Remove FB-flagged duplicate listings; record their slots in the ops store's dupes table
   1a. Coverage pass — one listing per city with zero active slots
   1b. Fill pass — remaining new slot/task/language variants
   3.  Re-list previously-duplicate slots (restores lost coverage)
@@ -26,7 +26,8 @@ from datetime import datetime, timezone
 import requests
 from selenium.common.exceptions import InvalidSessionIdException, NoSuchWindowException
 
-from helpers.ads import get_listings, get_cities_for_equipment, TASK_VARIANTS
+from helpers.ads import get_listings
+from helpers.catalog import get_cities_for_equipment, TASK_VARIANTS
 from helpers.scraper import Scraper
 from helpers.listing_helper import Listing
 from helpers.slot import build as build_slot, from_listing as slot_from_listing
@@ -36,9 +37,12 @@ from helpers.click_history import (
     carry_clicks,
     carry_last_snapshot,
     reset_for_new_listing,
+    load_metadata,
+    save_metadata,
 )
 from helpers.scan_health import record_scan
-from helpers.run_outcome import install_crash_logger, record_run
+from helpers.run_outcome import install_crash_logger, phase, record_run
+from helpers.ops_store import get_store
 
 # ── Args ──────────────────────────────────────────────────────────────────────
 _parser = argparse.ArgumentParser(description="FB Marketplace daily listing agent")
@@ -52,7 +56,6 @@ BUDGET_MAX_MIN = 250
 JITTER_MAX_MIN = 10
 
 STATE_FILE = "state.json"
-DUPE_HISTORY_FILE = "data/duplicate_history.json"
 METADATA_FILE = "data/slot_metadata.json"
 LOG_FILE = "listing_progress.log"
 OUTPUT_DIR = "./images/output/"
@@ -144,20 +147,16 @@ def _dump_json(path: str, data: dict):
 
 
 state = _load_json(STATE_FILE)
-dupe_history = _load_json(DUPE_HISTORY_FILE)
-metadata = _load_json(METADATA_FILE)
+dupe_history = dict(get_store().dupes())  # each change is written through as it happens
+metadata = load_metadata(METADATA_FILE)
 
 
 def _save_state():
     _dump_json(STATE_FILE, state)
 
 
-def _save_dupe_history():
-    _dump_json(DUPE_HISTORY_FILE, dupe_history)
-
-
 def _save_metadata():
-    _dump_json(METADATA_FILE, metadata)
+    save_metadata(metadata, METADATA_FILE)
 
 
 def _cleanup_images():
@@ -170,6 +169,7 @@ def _cleanup_images():
 
 
 # ── Scraper / Listing init ────────────────────────────────────────────────────
+phase("login")
 # Exit code 2 == startup/login could not complete (needs a human, e.g. 2FA).
 # run_session.py treats this differently from a mid-run crash (exit 1).
 try:
@@ -187,6 +187,7 @@ _cleanup_images()
 
 # ── Startup inventory — full scan before any mutations ────────────────────────
 logger.info("Startup — taking inventory of all active listings...")
+phase("inventory")
 scraper.go_to_page("https://www.facebook.com/marketplace/you/selling/")
 
 _inventory = l.collect_listing_stats()  # {title: {clicks, price, days_listed_fb, views, is_duplicate}}
@@ -218,6 +219,7 @@ logger.info(
 
 # ── Phase 0: Remove FB-flagged duplicates ─────────────────────────────────────
 logger.info(f"Phase 0 — removing {len(_dupe_titles_found)} FB-flagged duplicate listings...")
+phase("phase0")
 
 # Dedup is best-effort: never let a stray UI exception abort the whole session.
 try:
@@ -238,13 +240,13 @@ for title in removed_titles:
         # Carry final known clicks into lifetime total before clearing snapshots
         carry_last_snapshot(metadata, slot)
         dupe_history[slot] = datetime.now(timezone.utc).isoformat()
+        get_store().flag_dupe(slot, dupe_history[slot])
         del state[slot]
         logger.info(f"Phase 0 — slot '{slot}' marked duplicate-removed.")
     else:
         logger.warning(f"Phase 0 — removed duplicate '{title}' but slot not found in state.")
 
 _save_state()
-_save_dupe_history()
 
 # Snapshot of slots that existed before Phase 1 (Phase 2 will only replace these)
 _pre_phase1_slots = set(state.keys())
@@ -290,6 +292,7 @@ def _publish(listable) -> bool:
 # ── Phase 1a: Coverage pass — one listing per uncovered city ─────────────────
 # Ensures every city gets at least one listing before we fill additional variants.
 logger.info("Phase 1a — coverage pass (one listing per uncovered city)...")
+phase("phase1a")
 fatal = False
 
 # Also skip task-variant slots for (city, equip) pairs that are already covered —
@@ -327,6 +330,7 @@ for listable in get_listings(output_directory=OUTPUT_DIR, skip_slots=_phase1a_sk
 # ── Phase 1b: Fill pass — remaining new slots for already-covered cities ───────
 if not fatal and within_budget():
     logger.info("Phase 1b — fill pass (remaining new slots for covered cities)...")
+    phase("phase1b")
 
     _phase1b_skip = set(state.keys()) | set(dupe_history.keys())
     for listable in get_listings(output_directory=OUTPUT_DIR, skip_slots=_phase1b_skip):
@@ -361,6 +365,7 @@ _phase2_skip = _all_slots - (_pre_phase1_slots - set(dupe_history.keys()))
 # Restores listings for cities that lost coverage to FB duplicate removal.
 if not fatal and within_budget():
     logger.info("Phase 3 — re-listing previously-duplicate slots...")
+    phase("phase3")
 
     _cleanup_images()
     for listable in get_listings(output_directory=OUTPUT_DIR, skip_slots=_phase3_skip):
@@ -382,12 +387,13 @@ if not fatal and within_budget():
             break
 
         del dupe_history[slot]
-        _save_dupe_history()
+        get_store().clear_dupe(slot)
         _cleanup_images()
 
 # ── Phase 2: Replace non-duplicate existing slots (refresh — lowest priority) ──
 if not fatal and within_budget():
     logger.info("Phase 2 — replacing non-duplicate existing slots (refresh)...")
+    phase("phase2")
 
     # Snapshot click counts before any deletions
     scraper.go_to_page("https://www.facebook.com/marketplace/you/selling/")
@@ -437,6 +443,7 @@ if not fatal and within_budget():
         _cleanup_images()
 
 # ── Done ──────────────────────────────────────────────────────────────────────
+phase("finish")
 remaining = max(0, _deadline - time.time())
 logger.info(
     f"Agent run complete. "
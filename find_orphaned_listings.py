@@ -35,7 +35,7 @@ import logging
 
 from helpers.scraper import Scraper
 from helpers.listing_helper import Listing
-from helpers.slot import parse as parse_slot
+from helpers.slot import SlotIndex
 from helpers.scan_health import record_scan
 
 STATE_FILE = "state.json"
@@ -86,6 +86,7 @@ def guess_city(title: str, known_cities: list) -> str:
 
 def report_orphans(live_stats: dict, state: dict, known_cities: list) -> None:
     known_titles = set(state.values())
+    index = SlotIndex.build(state)
     unmatched = {title: stats for title, stats in live_stats.items() if title not in known_titles}
     orphans = {title: stats for title, stats in unmatched.items() if looks_like_equipment(title)}
     personal = len(unmatched) - len(orphans)
@@ -105,11 +106,7 @@ def report_orphans(live_stats: dict, state: dict, known_cities: list) -> None:
         city = guess_city(title, known_cities)
         note = "city not recognized — needs manual review"
         if city:
-            existing = [
-                (slot, existing_title)
-                for slot, existing_title in state.items()
-                if (parsed := parse_slot(slot)) and parsed.city == city and parsed.equipment_type == equip
-            ]
+            existing = index.slots_for_city(city, equip)
             if existing:
                 note = f"slot(s) for {equip}/{city} already relisted under a different title — likely a Phase 2 leftover"
             else:
@@ -1,9 +1,10 @@
 """
 fuel_price_agent.py — daily diesel price updater
 
-Fetches the current Gulf Coast retail diesel price from the EIA API,
-recalculates estimated delivery costs for all 208 cities, and updates
-data/cities_data.json if the price has moved more than $0.10/gallon.
+Fetches the current Gulf Coast retail diesel price from EIA (through the
+cached source chain in helpers/price_sources.py), recalculates estimated
+delivery costs for all 208 cities, and updates data/cities_data.json if the
+price has moved more than $0.10/gallon.
 
 Delivery cost formula (reverse-engineered from original data, verified
 against all 208 cities):
@@ -14,53 +15,64 @@ against all 208 cities):
     RATE = 2.75 + (2/8) * diesel_price   ($2.75/mi labor + round-trip truck fuel)
 
 Original basis: $5.00/gal, 8mpg transport truck, 10gal machine fuel included.
+The formula lives in helpers/delivery_cost.py, which reprices every City as
+one array operation.
 
 Usage:
     python fuel_price_agent.py            # fetch live price and update if changed
     python fuel_price_agent.py --dry-run  # show what would change, don't write
     python fuel_price_agent.py --price 4.25  # override price (for testing)
+    python fuel_price_agent.py --fixture data/fuel_price_sample.json  # price from a saved EIA response, no network
+    python fuel_price_agent.py --what-if 3.50 4.00 4.50   # compare prices, no fetch/write
+    python fuel_price_agent.py --sweep 3.00 6.00 0.05     # every price in a range
+    python fuel_price_agent.py --import-distances road_miles.csv  # load road distances, reprice
+    python fuel_price_agent.py --always-fetch  # fetch even if the forecast says nothing moved
+    python fuel_price_agent.py --replay        # re-run decisions over recorded prices, offline
+    python fuel_price_agent.py --replay prices.jsonl  # ...or over a JSONL file of price records
+    python fuel_price_agent.py --profile       # also write a profile to data/profiles/
+
+Distances come from data/distance_cache.json (helpers/distance_cache.py),
+seeded from the cities' own `distance` field; a City with neither gets a
+haversine x detour-factor estimate that's cached alongside. A `distance`
+edited by hand in cities_data.json replaces its cache entry; only
+--import-distances writes cached miles back over that field.
+
+Every observed price is recorded in the ops store (helpers/fuel_history.py).
+Before fetching, the agent asks helpers/fuel_forecast.py whether a move past
+CHANGE_THRESHOLD is plausible since the last observation, and skips the
+network when it isn't.
 """
 
 import argparse
 import json
 import logging
-import os
-import re
 import sys
 from datetime import date, datetime, timezone
 from pathlib import Path
 
-import requests
+import numpy as np
 
-from helpers.run_outcome import install_crash_logger, record_run
+from helpers import fuel_history, profiling
+from helpers.distance_cache import DistanceCache
+from helpers.delivery_cost import (  # noqa: F401 — formula constants kept importable from here
+    FIXED_OVERHEAD, LABOR_PER_MILE, MACHINE_GALLONS, TRUCK_MPG, ROUND_TO, PricingTable, calc_cost,
+)
+from helpers.fuel_forecast import forecast, should_fetch
+from helpers.json_store import write_atomic
+from helpers.price_sources import default_chain
+from helpers.run_outcome import install_crash_logger, phase, record_run
 
 # ── paths ────────────────────────────────────────────────────────────────────
 CITIES_FILE      = Path("data/cities_data.json")
 FUEL_STATE_FILE  = Path("data/fuel_price.json")
-FUEL_HISTORY     = Path("data/fuel_price_history.json")
 LOG_FILE         = "fuel_price_agent.log"
 
 # ── constants ─────────────────────────────────────────────────────────────────
-FIXED_OVERHEAD   = 25.00   # non-fuel fixed cost per delivery
-LABOR_PER_MILE   = 2.75    # non-fuel cost per mile (labor, wear, time)
-MACHINE_GALLONS  = 10      # gallons of diesel included with each rental
-TRUCK_MPG        = 8.0     # transport truck fuel efficiency
-
 CHANGE_THRESHOLD = 0.10    # minimum price move to trigger an update ($/gal)
-ROUND_TO         = 0.10    # round estimated_cost to nearest $0.10
-
-# EIA weekly retail diesel — Gulf Coast (PADD 3), product DPF
-# V2 API requires a free key: https://www.eia.gov/opendata/register.php
-# Set env var EIA_API_KEY to use it; otherwise falls back to HTML scrape.
-EIA_API_URL = (
-    "https://api.eia.gov/v2/petroleum/pri/gnd/data/"
-    "?frequency=weekly&data[0]=value"
-    "&facets[product][]=DPF&facets[duoarea][]=R30"
-    "&sort[0][column]=period&sort[0][direction]=desc&length=1"
-    "&api_key={key}"
-)
-# Public HTML page — no key required
-EIA_HTML_URL = "https://www.eia.gov/petroleum/gasdiesel/"
+
+# Price sources (EIA API, EIA HTML page, local fixture) live in
+# helpers/price_sources.py. The EIA API needs a free key in EIA_API_KEY:
+# https://www.eia.gov/opendata/register.php — without one the HTML page is used.
 
 # ── logging ───────────────────────────────────────────────────────────────────
 logging.basicConfig(
@@ -75,71 +87,13 @@ log = logging.getLogger(__name__)
 install_crash_logger("fuel_price_agent")
 
 
-# ── cost formula ──────────────────────────────────────────────────────────────
-def calc_cost(distance: float, diesel: float) -> float:
-    base = FIXED_OVERHEAD + MACHINE_GALLONS * diesel
-    rate = LABOR_PER_MILE + (2 / TRUCK_MPG) * diesel
-    raw  = base + rate * distance
-    return round(round(raw / ROUND_TO) * ROUND_TO, 2)
-
-
 # ── price fetch ───────────────────────────────────────────────────────────────
-def fetch_eia_api(api_key: str) -> float | None:
-    """EIA v2 API — requires a free key from https://www.eia.gov/opendata/register.php"""
-    try:
-        url = EIA_API_URL.format(key=api_key)
-        resp = requests.get(url, timeout=10)
-        resp.raise_for_status()
-        value = resp.json()["response"]["data"][0]["value"]
-        return float(value)
-    except Exception as e:
-        log.warning(f"EIA API fetch failed: {e}")
-        return None
-
-
-def fetch_eia_html() -> float | None:
-    """Scrape EIA's public petroleum/gasdiesel page — no key required.
-    Extracts retail diesel prices from the weekly table and returns the
-    Gulf Coast / national average value."""
-    try:
-        resp = requests.get(EIA_HTML_URL, timeout=15,
-                            headers={"User-Agent": "Mozilla/5.0"})
-        resp.raise_for_status()
-        # EIA table cells contain prices like "3.789" or "3.8" (no $ sign in HTML)
-        # Match decimal numbers in the diesel price range
-        prices = []
-        for m in re.finditer(r'>\s*(\d\.\d{2,3})\s*<', resp.text):
-            v = float(m.group(1))
-            if 2.50 < v < 7.00:
-                prices.append(v)
-        if not prices:
-            return None
-        prices.sort()
-        # Use the median to avoid outliers (state min/max skew the average)
-        median = prices[len(prices) // 2]
-        log.info(f"EIA HTML scrape — {len(prices)} price cells found, median ${median:.3f}/gal")
-        return median
-    except Exception as e:
-        log.warning(f"EIA HTML scrape failed: {e}")
-        return None
-
-
-def fetch_diesel_price() -> float | None:
-    # 1. Try API key from environment
-    api_key = os.environ.get("EIA_API_KEY", "")
-    if api_key:
-        price = fetch_eia_api(api_key)
-        if price is not None:
-            log.info(f"EIA API — Gulf Coast diesel: ${price:.3f}/gal")
-            return price
-
-    # 2. Scrape EIA public HTML page (no key needed)
-    price = fetch_eia_html()
-    if price is not None:
-        return price
-
-    log.warning("All price sources failed — use --price to set manually")
-    return None
+def fetch_diesel_price(fixture: str = None) -> tuple:
+    """(price, source name) from the configured price sources, or (None, None)."""
+    price, source = default_chain(fixture).fetch()
+    if price is None:
+        log.warning("All price sources failed — use --price to set manually")
+    return price, source
 
 
 # ── state helpers ─────────────────────────────────────────────────────────────
@@ -156,18 +110,114 @@ def save_state(price: float):
     }, indent=2))
 
 
-def append_history(old_price: float, new_price: float, changes: int):
-    history = []
-    if FUEL_HISTORY.exists():
-        history = json.loads(FUEL_HISTORY.read_text())
-    history.append({
-        "timestamp":  datetime.now(timezone.utc).isoformat(),
-        "old_price":  old_price,
-        "new_price":  new_price,
-        "delta":      round(new_price - old_price, 3),
+def append_history(old_price: float, new_price: float, changes: int, source: str, applied: bool):
+    fuel_history.append({
+        "price":          new_price,
+        "basis":          old_price,
+        "source":         source,
+        "applied":        applied,
         "cities_updated": changes,
     })
-    FUEL_HISTORY.write_text(json.dumps(history, indent=2))
+
+
+# ── pricing ───────────────────────────────────────────────────────────────────
+def load_pricing(cities: list, cache: DistanceCache = None, prefer_cache: bool = False) -> tuple:
+    """(PricingTable over the cached distances, the DistanceCache, number of
+    cities whose `distance` field was filled in from the cache).
+
+    A `distance` edited by hand in cities_data.json wins: the cache entry is
+    replaced with it (and logged) rather than the edit being reverted. With
+    prefer_cache — right after import_distances() loaded road miles — it's
+    the other way round and the cache overwrites the field."""
+    cache = cache or DistanceCache()
+    if not prefer_cache:
+        for city in cities:
+            try:
+                miles = round(float(city["distance"]), 1)
+            except (TypeError, ValueError, KeyError):
+                continue
+            entry = cache.get(city["city"])
+            if entry is not None and entry["miles"] != miles:
+                log.info(f"{city['city']}: distance {miles} mi in {CITIES_FILE.name} overrides the cached "
+                         f"{entry['miles']} mi ({entry['source']}).")
+                cache.put(city["city"], miles, "cities_data")
+    cache.seed_from_cities(cities)
+    distances = cache.resolve(cities)
+    moved = 0
+    for city, miles in zip(cities, distances):
+        if np.isnan(miles) or city.get("distance") == float(miles):
+            continue
+        if prefer_cache or city.get("distance") in (None, ""):
+            city["distance"] = float(miles)
+            moved += 1
+    return PricingTable(cities, distances), cache, moved
+
+
+def import_distances(path: str, dry_run: bool = False):
+    """Bulk-load road distances into the cache and reprice every City at the
+    current diesel basis."""
+    cache = DistanceCache()
+    imported = cache.import_file(path)
+    cities = json.loads(CITIES_FILE.read_text())
+    table, cache, moved = load_pricing(cities, cache, prefer_cache=True)
+    basis = load_state()["diesel_price"]
+    diff = table.diff(basis)
+    log.info(f"Imported {imported} distances from {path}; cache sources {cache.sources()}. "
+             f"{moved} cities' distance changed, {diff['changed']} delivery costs change at ${basis:.3f}/gal.")
+    if dry_run:
+        log.info("DRY RUN — nothing written.")
+        return
+    table.apply(basis)
+    if moved or diff["changed"]:
+        write_atomic(str(CITIES_FILE), json.dumps(cities, indent=4))
+    cache.save()
+
+
+# ── what-if ──────────────────────────────────────────────────────────────────
+def print_sweep(rows: list, basis: float):
+    print(f"Current basis ${basis:.3f}/gal. Against current costs:")
+    print(f"  {'diesel':>7}  {'changed':>7}  {'mean Δ':>8}  {'max |Δ|':>8}  {'mean cost':>9}")
+    for r in rows:
+        print(f"  {r['diesel']:>7.3f}  {r['changed']:>7}  {r['mean_change']:>+8.2f}  "
+              f"{r['max_change']:>8.2f}  {r['mean_cost'] if r['mean_cost'] is not None else '—':>9}")
+
+
+# ── replay ────────────────────────────────────────────────────────────────────
+def replay(path: str = None, threshold: float = CHANGE_THRESHOLD):
+    """Re-run the update decision over every recorded price, in order, against
+    an in-memory copy of the cities — and what the forecast skip would have
+    done at each step. Fetches and writes nothing."""
+    records = fuel_history.load(path)
+    records = [r for r in records if isinstance(r.get("price"), (int, float)) and r.get("ts")]
+    if not records:
+        print(f"No recorded prices in {path or 'the price history'}.")
+        return
+    table, _, _ = load_pricing(json.loads(CITIES_FILE.read_text()))
+    basis = records[0].get("basis") or records[0]["price"]
+    table.apply(basis)
+    updates = skipped = missed = 0
+    print(f"Replaying {len(records)} prices from {path or 'the price history'}, threshold ${threshold}, starting basis ${basis:.3f}")
+    for i, r in enumerate(records):
+        now = datetime.fromisoformat(r["ts"])
+        if now.tzinfo is None:
+            now = now.replace(tzinfo=timezone.utc)
+        fetch, _ = should_fetch(records[:i], basis, threshold, now)
+        skipped += not fetch
+        price = float(r["price"])
+        if abs(price - basis) < threshold:
+            continue
+        changes = table.apply(price)
+        updates += 1
+        missed += not fetch
+        print(f"  {r['ts'][:10]}  ${basis:.3f} -> ${price:.3f}  {changes:>4} cities"
+              f"{'  (forecast would have skipped this fetch)' if not fetch else ''}")
+        basis = price
+    print(f"{updates} updates; the forecast would have skipped {skipped} of {len(records)} fetches, "
+          f"delaying {missed} update(s) to a later run.")
+    f = forecast(records)
+    if f:
+        print(f"Now: level ${f['level']:.3f}, rolling mean {f['rolling_mean']}, "
+              f"band ±{f['band']:.3f} after {f['days_ahead']:.1f} days.")
 
 
 # ── main ──────────────────────────────────────────────────────────────────────
@@ -175,16 +225,58 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--dry-run",  action="store_true", help="Show changes without writing")
     parser.add_argument("--price",    type=float, default=None, help="Override diesel price")
+    parser.add_argument("--what-if",  type=float, nargs="+", metavar="PRICE",
+                        help="Report what each diesel price would do to delivery costs; fetches and writes nothing")
+    parser.add_argument("--import-distances", metavar="FILE",
+                        help="Import depot-to-city road distances (CSV or JSON) into the distance cache and reprice")
+    parser.add_argument("--fixture",  metavar="FILE",
+                        help="Read the price from a local file instead of EIA (see helpers/price_sources.py)")
+    parser.add_argument("--always-fetch", action="store_true",
+                        help="Fetch the live price even when the forecast says it can't have moved enough")
+    parser.add_argument("--replay",   nargs="?", const="", metavar="FILE",
+                        help="Replay recorded prices (default: the price history) offline; fetches and writes nothing")
+    parser.add_argument("--sweep",    type=float, nargs=3, metavar=("LO", "HI", "STEP"),
+                        help="Like --what-if, for every price from LO to HI in STEP increments")
+    parser.add_argument("--profile",  action="store_true",
+                        help="Write a cProfile + span timeline of this run to data/profiles/")
     args = parser.parse_args()
 
+    if args.import_distances:
+        import_distances(args.import_distances, args.dry_run)
+        return
+
+    if args.replay is not None:
+        replay(args.replay or None)
+        return
+
+    if args.what_if or args.sweep:
+        prices = list(args.what_if or [])
+        if args.sweep:
+            lo, hi, step = args.sweep
+            prices += list(np.arange(lo, hi + step / 2, step))
+        table, _, _ = load_pricing(json.loads(CITIES_FILE.read_text()))
+        print_sweep(table.sweep(prices), load_state()["diesel_price"])
+        return
+
     state     = load_state()
     old_price = state["diesel_price"]
 
     if args.price is not None:
         new_price = args.price
+        source = "manual"
         log.info(f"Using manual override price: ${new_price:.3f}/gal")
     else:
-        new_price = fetch_diesel_price()
+        phase("fetch")
+        with profiling.span("forecast"):
+            fetch, reason = should_fetch(fuel_history.load(), old_price, CHANGE_THRESHOLD)
+        if not fetch and not args.always_fetch:
+            log.info(f"Skipping fetch — {reason}.")
+            record_run("fuel_price_agent", "success",
+                       metrics={"old_price": old_price, "fetch_skipped": True, "cities_updated": 0})
+            return
+        log.info(f"Fetching — {reason}.")
+        with profiling.span("fetch price"):
+            new_price, source = fetch_diesel_price(args.fixture)
         if new_price is None:
             record_run("fuel_price_agent", "fatal", note="all price sources failed (EIA API and HTML scrape both unavailable)")
             sys.exit(1)
@@ -194,21 +286,21 @@ def main():
 
     if delta < CHANGE_THRESHOLD and args.price is None:
         log.info(f"Price change ${delta:.3f} below threshold ${CHANGE_THRESHOLD} — no update needed.")
+        if not args.dry_run:
+            append_history(old_price, new_price, 0, source, applied=False)
         record_run("fuel_price_agent", "success",
                    metrics={"old_price": old_price, "new_price": new_price, "delta": round(delta, 3), "cities_updated": 0})
         return
 
-    cities = json.loads(CITIES_FILE.read_text())
-
-    changes = 0
-    for city in cities:
-        old_cost = city["estimated_cost"]
-        new_cost = calc_cost(city["distance"], new_price)
-        if new_cost != old_cost:
-            if not args.dry_run:
-                city["estimated_cost"] = new_cost
-            changes += 1
-            log.info(f"  {city['city']:<25} {old_cost:>8.2f} -> {new_cost:>8.2f}")
+    phase("reprice")
+    with profiling.span("load json"):
+        cities = json.loads(CITIES_FILE.read_text())
+        table, cache, moved = load_pricing(cities)
+    with profiling.span("reprice"):
+        diff = table.diff(new_price)
+    changes = diff["changed"]
+    log.info(f"Repricing at ${new_price:.3f}: {changes} of {len(cities)} cities change "
+             f"(mean {diff['mean_change']:+.2f}, max |{diff['max_change']:.2f}|, new mean cost {diff['mean_cost']})")
 
     if args.dry_run:
         log.info(f"DRY RUN — would update {changes} cities from ${old_price:.2f} to ${new_price:.2f}/gal.")
@@ -216,9 +308,13 @@ def main():
                    metrics={"old_price": old_price, "new_price": new_price, "cities_updated": changes, "dry_run": True})
         return
 
-    CITIES_FILE.write_text(json.dumps(cities, indent=4))
-    save_state(new_price)
-    append_history(old_price, new_price, changes)
+    with profiling.span("save"):
+        if changes or moved:
+            table.apply(new_price)
+            write_atomic(str(CITIES_FILE), json.dumps(cities, indent=4))
+        cache.save()
+        save_state(new_price)
+        append_history(old_price, new_price, changes, source, applied=True)
     log.info(f"Updated {changes} cities. New diesel basis: ${new_price:.3f}/gal.")
     record_run("fuel_price_agent", "success",
                metrics={"old_price": old_price, "new_price": new_price, "delta": round(delta, 3), "cities_updated": changes})
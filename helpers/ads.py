@@ -1,613 +1,23 @@
 import os
-import json
 import hashlib
 import random
-import numpy as np
-from PIL import Image, ImageDraw, ImageFont, ImageEnhance
-from helpers.listing_helper import ListingData
-from typing import Generator, Optional
+from typing import TYPE_CHECKING, Generator, Optional
+
+# The static catalog lives in helpers.catalog (no Pillow/NumPy/Selenium
+# import); re-exported so existing `from helpers.ads import ...` keeps working.
+from helpers.catalog import (  # noqa: F401
+    _EQUIPMENT, TASK_VARIANTS, get_cities_for_equipment, get_equipment, get_locations,
+)
+
+# Pillow, NumPy and helpers.listing_helper (Selenium) are imported inside the
+# functions that build listings and images, not when this module loads.
+if TYPE_CHECKING:
+    from PIL import Image
+    from helpers.listing_helper import ListingData
 
 def hash_image(image) -> str:
     return hashlib.md5(image.tobytes()).hexdigest()[:16]
 
-_EQUIPMENT: dict = {
-    "mini-ex": {
-        "kind": "rental",
-        "model": "kx71",
-        "names": {
-            "eng": ["Mini-Excavator"],
-            "spa": ["Excavadora Compacta"],
-        },
-        "prices": {"daily": 200, "weekly": 750, "monthly": 2250},
-        "blurb": {
-            "eng": "KX030-4; 7,700#; 12in and 24in buckets",
-            "spa": "KX030-4; 7,700#; 12in y 24in cucharas",
-        },
-    },
-    "trackloader": {
-        "kind": "rental",
-        "model": "svl75",
-        "names": {
-            "eng": ["Skidsteer"],
-            "spa": ["Cargadora compacta"],
-        },
-        "prices": {"daily": 280, "weekly": 1000, "monthly": 3000},
-        "blurb": {
-            "eng": "SVL75-2; 9,100#, 75 HP; Toothed & Smooth buckets, Standard Flow Attachments",
-            "spa": "SVL75-2; 9,100#, 75 HP; Cucharas dentadas y lisas, accesorios de flujo estándar",
-        },
-    },
-    # ── Service listings ──────────────────────────────────────────────────────
-    # Not a rentable machine: no real product photos exist, so get_listings()
-    # generates a short text-card image instead (see generate_text_card_image).
-    # Restricted to a single launch city per service via "cities" until proven
-    # out; "price" is a flat number (not daily/weekly/monthly tiers) since these
-    # are repair/shredding services, not rentals.
-    "trimmer_repair": {
-        "kind": "service",
-        "cities": ["Waco"],
-        "image_text": "Weedeater Repair",
-        "price": 60,
-        "blurb": {"eng": "Free diagnostic on every trimmer and weedeater repair — if we can't fix it, there's no charge."},
-    },
-    "pushmower_repair": {
-        "kind": "service",
-        "cities": ["Waco"],
-        "image_text": "Push Mower Repair",
-        "price": 60,
-        "blurb": {"eng": "Free diagnostic on every push mower repair — if we can't fix it, there's no charge."},
-    },
-    "ridingmower_repair": {
-        "kind": "service",
-        "cities": ["Waco"],
-        "image_text": "Riding Mower Repair",
-        "price": 60,
-        "blurb": {"eng": "Free diagnostic on every riding mower repair — if we can't fix it, there's no charge."},
-    },
-    "zeroturn_repair": {
-        "kind": "service",
-        "cities": ["Waco"],
-        "image_text": "Zero-Turn Repair",
-        "price": 60,
-        "blurb": {"eng": "Free diagnostic on every zero-turn repair — if we can't fix it, there's no charge."},
-    },
-    "tiller_repair": {
-        "kind": "service",
-        "cities": ["Waco"],
-        "image_text": "Tiller Repair",
-        "price": 60,
-        "blurb": {"eng": "Free diagnostic on every tiller repair — if we can't fix it, there's no charge."},
-    },
-    "generator_repair": {
-        "kind": "service",
-        "cities": ["Waco"],
-        "image_text": "Generator Repair",
-        "price": 60,
-        "blurb": {"eng": "Free diagnostic on every generator repair — if we can't fix it, there's no charge."},
-    },
-    "field_shredding": {
-        "kind": "service",
-        "cities": ["Lorena"],
-        "image_text": "Field Shredding",
-        "price": 50,
-        "blurb": {"eng": "Field shredding / brush hogging for overgrown lots, pastures, and acreage — starting at $50/acre depending on overgrowth."},
-    },
-}
-
-
-def get_equipment() -> dict:
-    return _EQUIPMENT
-
-
-
-
-TASK_VARIANTS = {
-    "mini-ex": [
-        {
-            "slug": "drainage",
-            "titles": {
-                "eng": [
-                    "Mini Excavator Rental – Drainage & Trenching – {city}",
-                    "French Drain Install? Mini Ex Rental – {city}",
-                    "Trenching for Irrigation/Utilities? Mini Excavator – {city}",
-                    "Backfilling Trenches? Mini Excavator Available – {city}",
-                    "Mini Ex for Foundation/Drainage Work – {city}",
-                ],
-                "spa": [
-                    "Renta Mini Excavadora – Drenaje y Zanjas – {city}",
-                    "¿Dren Francés? Mini Ex Disponible – {city}",
-                    "Zanjas para Riego o Utilidades? Mini Excavadora – {city}",
-                    "Mini Ex para Drenaje de Cimientos – {city}",
-                    "Rellenar Zanjas? Mini Excavadora Disponible – {city}",
-                ],
-            },
-            "desc_intro": {
-                "eng": "Need to install a French drain, trench for irrigation, or redirect water away from your foundation? Our mini-excavator handles all of it.",
-                "spa": "¿Necesitas instalar un dren francés, zanjas para riego, o redirigir el agua de tu cimentación? Nuestra mini excavadora lo maneja todo.",
-            },
-        },
-        {
-            "slug": "grading",
-            "titles": {
-                "eng": [
-                    "Mini Ex Rental for Yard Grading & Footings – {city}",
-                    "Uneven Yard Leveling? Mini Ex Ready – {city}",
-                    "Mini Excavator for Land Grading – {city}",
-                    "Grade Your Lot with a Mini Excavator – {city}",
-                    "Footing Excavation & Yard Leveling – Mini Ex – {city}",
-                ],
-                "spa": [
-                    "Renta Mini Ex para Nivelar Patio – {city}",
-                    "¿Patio Desnivelado? Mini Ex Lista – {city}",
-                    "Mini Excavadora para Nivelar Terreno – {city}",
-                    "Nivelar tu Lote con Mini Excavadora – {city}",
-                    "Excavación de Cimientos y Nivelación – Mini Ex – {city}",
-                ],
-            },
-            "desc_intro": {
-                "eng": "Sloped yard, uneven lot, or need footings for a slab or addition? Our mini-excavator is perfect for precision grading and excavation.",
-                "spa": "¿Patio inclinado, terreno desnivelado, o necesitas cimientos para una losa? Nuestra mini excavadora es perfecta para nivelar con precisión.",
-            },
-        },
-        {
-            "slug": "pond",
-            "titles": {
-                "eng": [
-                    "Compact Excavator for Pond/Landscaping – {city}",
-                    "Dig a Backyard Pond? Mini Excavator Rental – {city}",
-                    "Mini Ex for Pond Digging & Landscaping – {city}",
-                    "Backyard Pond or Water Feature? Mini Ex – {city}",
-                    "Mini Excavator for Landscaping Projects – {city}",
-                ],
-                "spa": [
-                    "Excavadora Compacta para Estanque/Paisaje – {city}",
-                    "¿Estanque en Patio? Renta Mini Excavadora – {city}",
-                    "Mini Ex para Excavar Estanques – {city}",
-                    "Estanque o Fuente de Agua? Mini Ex – {city}",
-                    "Mini Excavadora para Paisajismo – {city}",
-                ],
-            },
-            "desc_intro": {
-                "eng": "Building a backyard pond, water feature, or landscaping project? Our mini-excavator makes quick work of digging and shaping.",
-                "spa": "¿Construyendo un estanque, fuente de agua, o proyecto de paisajismo? Nuestra mini excavadora hace rápido el trabajo de excavar y moldear.",
-            },
-        },
-        {
-            "slug": "site_prep",
-            "titles": {
-                "eng": [
-                    "Site Prep for Patio/Wall? Mini Excavator – {city}",
-                    "Mini Ex Rental – Patio & Retaining Wall Prep – {city}",
-                    "Excavate for a Patio or Addition? Mini Ex – {city}",
-                    "Mini Excavator for Construction Site Prep – {city}",
-                    "Retaining Wall or Patio Install? Mini Ex Rental – {city}",
-                ],
-                "spa": [
-                    "Prep Terreno Terraza/Muro? Mini Ex – {city}",
-                    "Renta Mini Ex – Prep para Patio y Muro de Contención – {city}",
-                    "Excavar para Patio o Ampliación? Mini Ex – {city}",
-                    "Mini Excavadora para Preparar Sitio de Construcción – {city}",
-                    "Muro de Contención o Patio? Renta Mini Ex – {city}",
-                ],
-            },
-            "desc_intro": {
-                "eng": "Prepping for a new patio, retaining wall, addition, or outbuilding? Our mini-excavator handles site prep, rough grading, and utility trenching.",
-                "spa": "¿Preparando para un nuevo patio, muro de contención, ampliación o construcción auxiliar? Nuestra mini excavadora maneja la preparación del sitio.",
-            },
-        },
-        {
-            "slug": "tree_work",
-            "titles": {
-                "eng": [
-                    "Tree Holes or Sod Removal? Mini Ex Rental – {city}",
-                    "Mini Excavator for Tree Removal & Planting – {city}",
-                    "Stump & Root Removal with Mini Ex – {city}",
-                    "Mini Ex for Tree Planting & Sod Work – {city}",
-                    "Dig Tree Holes or Remove Sod? Mini Ex – {city}",
-                ],
-                "spa": [
-                    "Hoyos para Árboles o Quitar Pasto? Mini Ex – {city}",
-                    "Mini Excavadora para Árboles y Extracción de Pasto – {city}",
-                    "Extracción de Tocones y Raíces con Mini Ex – {city}",
-                    "Mini Ex para Plantar Árboles y Trabajos de Pasto – {city}",
-                    "¿Excavar Hoyos para Árboles? Mini Excavadora – {city}",
-                ],
-            },
-            "desc_intro": {
-                "eng": "Need to remove stumps, dig planting holes, pull sod, or clear roots? Our mini-excavator is the right tool for tree and landscape work.",
-                "spa": "¿Necesitas quitar tocones, excavar hoyos para plantar, quitar pasto o limpiar raíces? Nuestra mini excavadora es la herramienta perfecta.",
-            },
-        },
-        {
-            "slug": "driveway",
-            "titles": {
-                "eng": [
-                    "Gravel Driveway Repair? Mini Excavator – {city}",
-                    "Washed-Out Driveway? Mini Ex for Regrade & Culvert – {city}",
-                    "New Driveway Excavation & Culvert Install – {city}",
-                    "Mini Ex for Driveway Drainage & Potholes – {city}",
-                    "Fix or Prep Your Driveway – Mini Excavator – {city}",
-                ],
-                "spa": [
-                    "¿Reparar Entrada de Grava? Mini Excavadora – {city}",
-                    "¿Entrada Dañada? Mini Ex para Nivelar y Alcantarilla – {city}",
-                    "Excavación de Entrada Nueva e Instalación de Alcantarilla – {city}",
-                    "Mini Ex para Drenaje y Baches de Entrada – {city}",
-                    "Repara o Prepara tu Entrada – Mini Excavadora – {city}",
-                ],
-            },
-            "desc_intro": {
-                "eng": "Washed-out gravel driveway, potholes, or need a culvert and proper drainage? Our mini-excavator digs out, regrades, and preps driveways the right way.",
-                "spa": "¿Entrada de grava dañada, baches, o necesitas una alcantarilla y buen drenaje? Nuestra mini excavadora excava, nivela y prepara entradas correctamente.",
-            },
-        },
-    ],
-    "trackloader": [
-        {
-            "slug": "clearing",
-            "titles": {
-                "eng": [
-                    "Track Loader Rental – Land Clearing – {city}",
-                    "Brush & Land Clearing with Track Loader – {city}",
-                    "Skid Steer Rental for Land Clearing – {city}",
-                    "Clear Brush, Trees & Debris – Track Loader – {city}",
-                    "Track Loader Available for Clearing Work – {city}",
-                ],
-                "spa": [
-                    "Renta Cargadora de Orugas – Limpieza de Terreno – {city}",
-                    "Limpieza de Maleza y Terreno con Cargadora – {city}",
-                    "Renta Skid Steer para Limpieza de Terreno – {city}",
-                    "Limpiar Maleza, Árboles y Escombros – Cargadora – {city}",
-                    "Cargadora de Orugas Disponible para Limpieza – {city}",
-                ],
-            },
-            "desc_intro": {
-                "eng": "Clearing overgrown land, removing brush, or preparing a lot for development? Our track loader handles heavy clearing work efficiently.",
-                "spa": "¿Limpiando terreno, quitando maleza, o preparando un lote para construcción? Nuestra cargadora de orugas maneja trabajos pesados eficientemente.",
-            },
-        },
-        {
-            "slug": "grading",
-            "titles": {
-                "eng": [
-                    "Track Loader Rental – Grading & Leveling – {city}",
-                    "Grade & Level Your Land – Skid Steer Rental – {city}",
-                    "Track Loader for Land Grading – {city}",
-                    "Lot Grading & Leveling with Track Loader – {city}",
-                    "Skid Steer Available for Grading Projects – {city}",
-                ],
-                "spa": [
-                    "Renta Cargadora – Nivelación y Grading – {city}",
-                    "Nivelar tu Terreno – Renta Skid Steer – {city}",
-                    "Cargadora de Orugas para Nivelación – {city}",
-                    "Nivelación de Lote con Cargadora de Orugas – {city}",
-                    "Skid Steer Disponible para Proyectos de Nivelación – {city}",
-                ],
-            },
-            "desc_intro": {
-                "eng": "Need to grade a lot, level a pad, or move large amounts of dirt? Our track loader has the power and capacity to get it done fast.",
-                "spa": "¿Necesitas nivelar un lote, preparar una base, o mover grandes cantidades de tierra? Nuestra cargadora tiene la potencia para hacerlo rápido.",
-            },
-        },
-        {
-            "slug": "demo",
-            "titles": {
-                "eng": [
-                    "Track Loader for Demolition & Cleanup – {city}",
-                    "Skid Steer Rental – Demo & Debris Removal – {city}",
-                    "Demolition Work? Track Loader Rental – {city}",
-                    "Remove Old Structures with a Track Loader – {city}",
-                    "Track Loader for Concrete & Demo Work – {city}",
-                ],
-                "spa": [
-                    "Cargadora de Orugas para Demolición y Limpieza – {city}",
-                    "Renta Skid Steer – Demolición y Retiro de Escombros – {city}",
-                    "¿Trabajo de Demolición? Renta Cargadora – {city}",
-                    "Quitar Estructuras Viejas con Cargadora de Orugas – {city}",
-                    "Cargadora para Trabajo de Concreto y Demolición – {city}",
-                ],
-            },
-            "desc_intro": {
-                "eng": "Tearing down old structures, removing concrete, or hauling away debris? Our track loader is built for demo and cleanup work.",
-                "spa": "¿Derrumbando estructuras viejas, quitando concreto, o retirando escombros? Nuestra cargadora de orugas está hecha para demolición y limpieza.",
-            },
-        },
-        {
-            "slug": "foundation",
-            "titles": {
-                "eng": [
-                    "Track Loader for Foundation & Pad Work – {city}",
-                    "Skid Steer Rental – Foundation Prep – {city}",
-                    "Build a Concrete Pad? Track Loader Rental – {city}",
-                    "Foundation Prep & Dirt Work – Track Loader – {city}",
-                    "Track Loader Available for Pad & Foundation – {city}",
-                ],
-                "spa": [
-                    "Cargadora de Orugas para Cimientos y Bases – {city}",
-                    "Renta Skid Steer – Preparación de Cimientos – {city}",
-                    "¿Construir Base de Concreto? Renta Cargadora – {city}",
-                    "Preparación de Cimientos y Movimiento de Tierra – {city}",
-                    "Cargadora Disponible para Bases y Cimientos – {city}",
-                ],
-            },
-            "desc_intro": {
-                "eng": "Prepping for a concrete pad, building foundation, or slab pour? Our track loader is ideal for moving material and establishing grade.",
-                "spa": "¿Preparando para una base de concreto, cimientos de construcción, o colada de losa? Nuestra cargadora es ideal para mover material y establecer nivel.",
-            },
-        },
-        {
-            "slug": "driveway",
-            "titles": {
-                "eng": [
-                    "Gravel Driveway Repair & Regrading – Skid Steer – {city}",
-                    "Spread Gravel or Level Your Driveway – Track Loader – {city}",
-                    "Pothole & Washboard Driveway Fix – Skid Steer – {city}",
-                    "New Gravel Driveway? Track Loader Rental – {city}",
-                    "Track Loader for Driveway Grading & Gravel – {city}",
-                ],
-                "spa": [
-                    "Reparación y Nivelación de Entrada de Grava – Skid Steer – {city}",
-                    "Esparcir Grava o Nivelar tu Entrada – Cargadora – {city}",
-                    "Arreglo de Baches y Surcos en Entrada – Skid Steer – {city}",
-                    "¿Entrada de Grava Nueva? Renta Cargadora de Orugas – {city}",
-                    "Cargadora de Orugas para Nivelar Entradas y Grava – {city}",
-                ],
-            },
-            "desc_intro": {
-                "eng": "Rutted, potholed, or washboarded gravel driveway? Our track loader spreads new gravel, regrades, and levels driveways fast — or builds a new one from scratch.",
-                "spa": "¿Entrada de grava con baches, surcos o desniveles? Nuestra cargadora de orugas esparce grava nueva, nivela y repara entradas rápido — o construye una nueva.",
-            },
-        },
-    ],
-    # ── Service task variants (English only, single launch city per service) ──
-    "trimmer_repair": [
-        {
-            "slug": "wont_start",
-            "titles": {"eng": ["Weedeater Won't Start? – {city} Repair", "Trimmer Won't Start – Fast {city} Repair"]},
-            "desc_intro": {"eng": "Pulling and pulling with nothing happening usually means carb or fuel line trouble, not a dead trimmer — we can usually get it running same week."},
-        },
-        {
-            "slug": "cheaper_than_new",
-            "titles": {"eng": ["String Trimmer Repair – Cheaper Than a New One – {city}", "Don't Replace That Trimmer – {city} Repair"]},
-            "desc_intro": {"eng": "Before you drop money on a new weedeater, let us take a look — most trimmer issues are a quick, inexpensive fix."},
-        },
-        {
-            "slug": "wont_feed_line",
-            "titles": {"eng": ["Trimmer Won't Feed Line? Fast Fix – {city}", "String Trimmer Head Just Spins? – {city} Repair"]},
-            "desc_intro": {"eng": "If the head just spins and spins without feeding string, it's almost always a worn spring or tangled spool — we fix it while you wait."},
-        },
-        {
-            "slug": "bogs_down",
-            "titles": {"eng": ["Weedeater Bogs Down and Dies in Tall Grass – {city}", "Trimmer Dies in Thick Weeds? – {city} Repair"]},
-            "desc_intro": {"eng": "If your trimmer runs fine at idle but dies the second it hits thick weeds, that's a carburetor or air filter problem we see constantly."},
-        },
-        {
-            "slug": "revs_no_spin",
-            "titles": {"eng": ["Trimmer Revs but Cutting Head Won't Spin – {city}", "Weedeater Motor Fine, Head Won't Turn? – {city}"]},
-            "desc_intro": {"eng": "If the motor sounds fine but the head just sits there when you squeeze the throttle, that's usually a worn clutch or drive shaft, not a dead trimmer."},
-        },
-        {
-            "slug": "spring_tuneup",
-            "titles": {"eng": ["Trimmer Spring Tune-Up – Get Ready for Mowing Season – {city}", "Weedeater Sat All Winter? Tune-Up in {city}"]},
-            "desc_intro": {"eng": "Sat in the shed all winter and now won't start or runs rough? Old fuel gums up the carb — we'll get it back in shape before the grass takes over."},
-        },
-    ],
-    "pushmower_repair": [
-        {
-            "slug": "wont_start",
-            "titles": {"eng": ["Push Mower Won't Start? – {city} Repair", "Push Mower Cranks But Won't Fire – {city}"]},
-            "desc_intro": {"eng": "No spark, no fire, or just cranks and cranks — nine times out of ten it's the carburetor or a fouled spark plug, both quick fixes."},
-        },
-        {
-            "slug": "runs_then_dies",
-            "titles": {"eng": ["Push Mower Runs Then Dies – Fast {city} Diagnosis", "Mower Quits After a Minute? – {city} Repair"]},
-            "desc_intro": {"eng": "Starts fine, then quits within a minute or two? That's a classic fuel-starvation symptom we can usually fix same visit."},
-        },
-        {
-            "slug": "selfpropel",
-            "titles": {"eng": ["Push Mower Self-Propel Not Working – {city}", "Mower Won't Pull Itself? – {city} Repair"]},
-            "desc_intro": {"eng": "If the wheels won't pull anymore, it's typically a worn drive cable or belt, not a reason to buy a whole new mower."},
-        },
-        {
-            "slug": "blade_wont_engage",
-            "titles": {"eng": ["Mower Blade Won't Engage – {city} Repair", "No Blade Engagement? – {city} Push Mower Fix"]},
-            "desc_intro": {"eng": "No blade engagement usually traces back to a bad cable, worn belt, or the blade brake clutch — all repairable."},
-        },
-        {
-            "slug": "cheaper_than_new",
-            "titles": {"eng": ["Push Mower Repair – Cheaper Than Buying New – {city}", "Before You Curb That Mower – {city} Repair"]},
-            "desc_intro": {"eng": "Before you haul it to the curb, let us look at it. Most push mowers we see need one part, not a replacement."},
-        },
-        {
-            "slug": "winter_start",
-            "titles": {"eng": ["Push Mower Won't Start After Sitting All Winter – {city}", "Mower Sat All Winter? – {city} Repair"]},
-            "desc_intro": {"eng": "Old gas gums up the carburetor over winter storage — a cleaning and fresh fuel usually has it running again before spring."},
-        },
-    ],
-    "ridingmower_repair": [
-        {
-            "slug": "wont_start",
-            "titles": {"eng": ["Riding Mower Won't Start? – {city} Repair", "Riding Mower Clicks But Won't Crank – {city}"]},
-            "desc_intro": {"eng": "Clicking, cranking but no fire, or dead silence — could be the battery, solenoid, or safety switch. We'll find it fast."},
-        },
-        {
-            "slug": "deck_wont_engage",
-            "titles": {"eng": ["Riding Mower Deck Won't Engage – {city}", "Blades Won't Kick On? – {city} Riding Mower Repair"]},
-            "desc_intro": {"eng": "If the blades won't kick on when you flip the PTO switch, it's usually the clutch, a blown fuse, or a bad switch — all fixable."},
-        },
-        {
-            "slug": "before_buy_new",
-            "titles": {"eng": ["Riding Mower Repair – Before You Buy New – {city}", "Don't Replace That Rider – {city} Repair"]},
-            "desc_intro": {"eng": "A new rider is a big purchase. Most of the ones we see are one belt or switch away from running fine again."},
-        },
-        {
-            "slug": "belt_slipping",
-            "titles": {"eng": ["Riding Mower Belt Keeps Slipping or Coming Off – {city}", "Deck Belt Issues? – {city} Riding Mower Repair"]},
-            "desc_intro": {"eng": "A deck belt that won't stay put is usually a worn idler pulley or bad belt tension — we'll get it tracking right."},
-        },
-        {
-            "slug": "wont_move",
-            "titles": {"eng": ["Riding Mower Won't Move – Transmission or Hydro Issue – {city}", "Engine Runs, Mower Won't Drive? – {city} Repair"]},
-            "desc_intro": {"eng": "Engine runs but the mower won't drive forward or reverse — that's a drive belt or hydrostatic transmission problem, not a lost cause."},
-        },
-        {
-            "slug": "spring_tuneup",
-            "titles": {"eng": ["Riding Mower Spring Tune-Up Before Mowing Season – {city}", "Rider Sat All Winter? – {city} Tune-Up"]},
-            "desc_intro": {"eng": "Sat in the barn all winter and now cranks but won't fire? Stale fuel and a gummed carb are the usual cause — get ahead of the season."},
-        },
-    ],
-    "zeroturn_repair": [
-        {
-            "slug": "wont_turn_one_dir",
-            "titles": {"eng": ["Zero-Turn Won't Turn One Direction – {city}", "Zero-Turn Dragging on One Side? – {city} Repair"]},
-            "desc_intro": {"eng": "If it spins fine one way but drags or won't pivot the other, that's almost always a hydro-drive or steering lever adjustment issue."},
-        },
-        {
-            "slug": "deck_wont_engage",
-            "titles": {"eng": ["Zero-Turn Deck Won't Engage – PTO Clutch Issue – {city}", "Blades Won't Kick On? – {city} Zero-Turn Repair"]},
-            "desc_intro": {"eng": "Blades not kicking on when you engage the PTO usually means a worn electric clutch, not a mower on its way out."},
-        },
-        {
-            "slug": "before_buy_new",
-            "titles": {"eng": ["Zero-Turn Repair – Before You Buy a New One – {city}", "Don't Replace That Zero-Turn – {city} Repair"]},
-            "desc_intro": {"eng": "Zero-turns aren't cheap. Most hydro-drive and deck issues we see are a repair, not a replacement."},
-        },
-        {
-            "slug": "pulling_to_side",
-            "titles": {"eng": ["Zero-Turn Hydrostatic Drive Pulling to One Side – {city}", "Zero-Turn Drifting Left or Right? – {city} Repair"]},
-            "desc_intro": {"eng": "Drifting left or right when you push both levers evenly points to a hydro-drive linkage that's out of adjustment."},
-        },
-        {
-            "slug": "wont_hold_rpm",
-            "titles": {"eng": ["Zero-Turn Won't Hold RPM Under Load – {city}", "Zero-Turn Bogging Down? – {city} Repair"]},
-            "desc_intro": {"eng": "Engine bogs down the moment the deck engages or you hit thicker grass — usually a carb or governor problem."},
-        },
-        {
-            "slug": "spring_checkup",
-            "titles": {"eng": ["Zero-Turn Spring Check-Up Before Cutting Season – {city}", "Zero-Turn Hesitating to Engage? – {city} Tune-Up"]},
-            "desc_intro": {"eng": "Sat all winter and now hesitates to engage the deck or hold RPM? Get it looked at before the grass outgrows your schedule."},
-        },
-    ],
-    "tiller_repair": [
-        {
-            "slug": "tines_wont_turn",
-            "titles": {"eng": ["Tiller Tines Won't Turn? – {city} Repair", "Tiller Runs, Tines Won't Spin – {city}"]},
-            "desc_intro": {"eng": "Engine runs fine but the tines just sit there — that's almost always a slipping belt or worn drive clutch, an easy fix."},
-        },
-        {
-            "slug": "transmission",
-            "titles": {"eng": ["Tiller Transmission Won't Engage – {city}", "Tiller Won't Shift Into Gear? – {city} Repair"]},
-            "desc_intro": {"eng": "If shifting into gear does nothing, the gearbox or shift linkage needs attention — not a reason to replace the whole tiller."},
-        },
-        {
-            "slug": "before_buy_new",
-            "titles": {"eng": ["Tiller Repair – Before You Buy New – {city}", "Don't Replace That Tiller – {city} Repair"]},
-            "desc_intro": {"eng": "Most tillers we see need a belt, clutch, or carb cleaning — far cheaper than a brand-new machine."},
-        },
-        {
-            "slug": "stalls_under_load",
-            "titles": {"eng": ["Tiller Stalls the Moment Tines Hit the Ground – {city}", "Tiller Dies Under Load? – {city} Repair"]},
-            "desc_intro": {"eng": "Runs fine at idle but dies under load in the dirt — that's a classic fuel delivery or carburetor issue."},
-        },
-        {
-            "slug": "winter_start",
-            "titles": {"eng": ["Tiller Won't Start After Sitting All Winter – {city}", "Tiller Sat All Winter? – {city} Repair"]},
-            "desc_intro": {"eng": "Old fuel gums up the carburetor fast. If it won't fire after sitting in the shed, that's usually the culprit, not the engine itself."},
-        },
-        {
-            "slug": "jammed",
-            "titles": {"eng": ["Tiller Tines Jammed With Grass or Vines – {city}", "Tiller Wrapped Up and Stalled? – {city} Repair"]},
-            "desc_intro": {"eng": "Wrapped-up grass, vines, or roots around the tine shaft will stall a tiller dead — a quick clear-out, and sometimes a straightened tine, is usually all it takes."},
-        },
-    ],
-    "generator_repair": [
-        {
-            "slug": "wont_hold_load",
-            "titles": {"eng": ["Generator Won't Hold a Load? – {city} Repair", "Generator Dies Under Load – {city} Repair"]},
-            "desc_intro": {"eng": "Runs fine with nothing plugged in but drops or dies the moment you add a real load — that's a governor or carb issue we see all the time."},
-        },
-        {
-            "slug": "wont_start_after_sitting",
-            "titles": {"eng": ["Generator Won't Start After Sitting – {city}", "Generator Sat Unused? – {city} Repair"]},
-            "desc_intro": {"eng": "Stale gas gums up the carburetor fast in a generator that only runs occasionally — a cleaning usually solves it."},
-        },
-        {
-            "slug": "before_buy_new",
-            "titles": {"eng": ["Generator Repair – Before You Buy New – {city}", "Don't Replace That Generator – {city} Repair"]},
-            "desc_intro": {"eng": "A new generator is a real investment. Most of the ones we see just need a carb cleaning or fuel system flush."},
-        },
-        {
-            "slug": "transfer_switch",
-            "titles": {"eng": ["Generator Transfer Switch Not Working Right – {city}", "Power Not Switching Over? – {city} Generator Repair"]},
-            "desc_intro": {"eng": "If power isn't switching over cleanly during an outage, the transfer switch itself may need service, not the generator."},
-        },
-        {
-            "slug": "surging",
-            "titles": {"eng": ["Generator Surging or RPM Fluctuating – {city}", "Generator Revving Up and Down? – {city} Repair"]},
-            "desc_intro": {"eng": "An engine that revs up and down on its own usually has a carb or governor problem, easy to diagnose."},
-        },
-        {
-            "slug": "fall_checkup",
-            "titles": {"eng": ["Generator Fall Check-Up Before Storm Season – {city}", "Make Sure Your Generator Starts – {city} Check-Up"]},
-            "desc_intro": {"eng": "Before the next outage hits, make sure yours actually starts and holds a load — most failures happen exactly when you need it most."},
-        },
-    ],
-    "field_shredding": [
-        {
-            "slug": "show_ready",
-            "titles": {"eng": ["Field Shredding – Get Your Land Show-Ready Before It Sells – {city}", "Selling Land? Shred It First – {city}"]},
-            "desc_intro": {"eng": "Buyers judge land the second they pull up. Knock down the overgrowth so your property shows well instead of looking neglected."},
-        },
-        {
-            "slug": "reset_pasture",
-            "titles": {"eng": ["Field Shredding – Reset a Pasture That's Gotten Away From You – {city}", "Pasture Gone to Weeds? – {city} Shredding"]},
-            "desc_intro": {"eng": "A field that's gone from grazing land to head-high weeds needs more than mowing — shredding knocks it back to usable ground."},
-        },
-        {
-            "slug": "fire_risk",
-            "titles": {"eng": ["Field Shredding – Cut Down Your Fire Risk This Summer – {city}", "Dry Overgrown Field? – {city} Shredding"]},
-            "desc_intro": {"eng": "Dry, overgrown fields are fuel waiting for a spark. Shredding removes the dead growth before it becomes a real hazard."},
-        },
-        {
-            "slug": "fence_line",
-            "titles": {"eng": ["Field Shredding – Clear an Overgrown Fence Line or Right-of-Way – {city}", "Can't See Your Fence Line? – {city} Shredding"]},
-            "desc_intro": {"eng": "Brush swallowing your fence line makes it impossible to spot damage or check your boundary. Open it back up."},
-        },
-        {
-            "slug": "tick_habitat",
-            "titles": {"eng": ["Field Shredding – Knock Down the Tick Habitat – {city}", "Tall Grass Breeding Ticks? – {city} Shredding"]},
-            "desc_intro": {"eng": "Tall grass and brush are exactly where ticks thrive. Keeping fields shredded means fewer bites for you, your family, and your animals."},
-        },
-        {
-            "slug": "overgrown_lot",
-            "titles": {"eng": ["Field Shredding – Got an Overgrown Lot, Not Just Acreage? – {city}", "Small Overgrown Lot? – {city} Shredding"]},
-            "desc_intro": {"eng": "A quarter-acre gone wild draws the same weeds, pests, and complaints as a big field. We shred small in-town lots too, not just ranches."},
-        },
-    ],
-}
-
-
-_locations_cache: Optional[list] = None
-
-
-def get_locations(path='data/cities_data.json') -> list:
-    global _locations_cache
-    if _locations_cache is None:
-        with open(path, 'r') as f:
-            _locations_cache = json.load(f)
-    return _locations_cache
-
-
-def get_cities_for_equipment(equipment_type: str) -> list:
-    """Cities a given equipment_type is offered in. Rental equipment is offered
-    in every city in cities_data.json; service equipment_types (repairs,
-    shredding) are restricted to whatever launch cities are listed under their
-    "cities" key in _EQUIPMENT."""
-    info = get_equipment().get(equipment_type, {})
-    override = info.get('cities')
-    if override:
-        return override
-    return [loc['city'] for loc in get_locations()]
 
 def get_listing_title(equipment_type: str, city: str, language: str = "eng") -> str:
     """
@@ -848,7 +258,9 @@ def get_service_description(blurb: str, location: str, task_intro: Optional[str]
     return "\n\n".join(sections)
 
 
-def get_listings(output_directory: str = "./images/output/", skip_slots: Optional[set] = None, generate_images: bool = True) -> Generator[ListingData, None, None]:
+def get_listings(output_directory: str = "./images/output/", skip_slots: Optional[set] = None, generate_images: bool = True) -> Generator["ListingData", None, None]:
+    from helpers.listing_helper import ListingData
+
     equipment = get_equipment()
     loc_by_city = {loc['city']: loc for loc in get_locations()}
     for item, info in equipment.items():
@@ -916,13 +328,15 @@ _TEXT_CARD_PALETTES = [
 ]
 
 
-def generate_text_card_image(text: str, size=(1200, 900)) -> Image.Image:
+def generate_text_card_image(text: str, size=(1200, 900)) -> "Image.Image":
     """Builds a plain background card with big, bold, centered text — the base
     "photo" for service listings (repairs, shredding) that have no real
     equipment to photograph. Fed through generate_random_controlled_image()
     exactly like a real photo, so it gets the same rotation/crop/noise/phone-
     banner treatment and a unique hash per listing (avoids FB flagging the
     handful of listings under one service as duplicates of each other)."""
+    from PIL import Image, ImageDraw, ImageFont
+
     if os.name == 'posix':
         font_path = '/Library/Fonts/Arial Bold.ttf'
     else:
@@ -958,6 +372,9 @@ def generate_random_controlled_image(input_image="images/basic.jpeg",
                                      output_directory: str = "./images/output/"):
     """input_image is either a file path (real equipment photos) or a PIL
     Image already in memory (generated text cards for service listings)."""
+    import numpy as np
+    from PIL import Image, ImageDraw, ImageFont, ImageEnhance
+
     if not os.path.exists(output_directory):
         os.makedirs(output_directory)
 
@@ -0,0 +1,176 @@
+"""
+Click Analytics — rates and rollups over the Click Snapshot history, beyond
+the current count and 7-day delta the map shows per marker.
+
+Every pair of consecutive snapshots for a Listing is an interval: the clicks
+gained over it, and how many listing-days of exposure it covers. A Listing's
+first snapshot is measured from its published_at with a baseline of 0 (same
+rule as click_history.clicks_since_last). Intervals are binned two ways:
+
+  * by UTC day and (Equipment, City, Task Variant) — summed over a rolling
+    window for per-equipment / per-city / per-task clicks per listing-day;
+  * by listing age in weeks — an all-time decay curve of clicks per
+    listing-day against how long a Listing has been up.
+
+update() is incremental: it keeps a per-slot watermark (last snapshot it
+has already binned) so each stats_tracker run only processes snapshots
+recorded since the previous one. Everything — bins, watermarks and the
+finished rollups — is cached in data/click_analytics.json, so the
+dashboard reads results without touching raw snapshots.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from helpers.click_history import epoch_us, NO_TIME
+from helpers.json_store import load_json, write_atomic
+from helpers.slot import parse as parse_slot
+
+ANALYTICS_FILE = "data/click_analytics.json"
+WINDOWS = (7, 30)        # rolling windows reported, in days
+RETENTION_DAYS = 90      # daily bins kept on disk
+MAX_AGE_WEEKS = 12       # decay curve buckets; older Listings land in the last one
+_DAY_US = 86400 * 1_000_000
+
+
+def _empty() -> dict:
+    return {"version": 1, "updated_at": None, "watermarks": {}, "daily": {},
+            "decay": [[0, 0.0] for _ in range(MAX_AGE_WEEKS + 1)], "rollups": {}}
+
+
+def _group_key(slot: str) -> Optional[str]:
+    parsed = parse_slot(slot)
+    if not parsed:
+        return None
+    return f"{parsed.equipment_type}|{parsed.city}|{parsed.task_slug or '-'}"
+
+
+def _day(ts_us: int) -> str:
+    return datetime.fromtimestamp(ts_us / 1_000_000, tz=timezone.utc).date().isoformat()
+
+
+def _bin_slot(data: dict, slot: str, meta: dict) -> int:
+    """Bin every interval of `slot` newer than its watermark. Returns the
+    number of snapshots processed."""
+    snaps = meta.get("click_snapshots") or []
+    group = _group_key(slot)
+    if not snaps or group is None:
+        return 0
+    pub_us = epoch_us(meta.get("published_at"))
+    mark = data["watermarks"].get(slot)  # [ts_us, clicks, pub_us]
+
+    # Walk back from the newest snapshot to the watermark — O(new snapshots).
+    start = len(snaps)
+    while start > 0:
+        ts = epoch_us(snaps[start - 1].get("ts"))
+        if mark and ts <= mark[0]:
+            break
+        start -= 1
+    if start == len(snaps):
+        return 0
+
+    if mark and mark[2] == pub_us:
+        prev_ts, prev_clicks = mark[0], mark[1]
+    else:  # first look at this Listing instance
+        prev_ts, prev_clicks = (pub_us if pub_us != NO_TIME else None), 0
+
+    processed = 0
+    for snap in snaps[start:]:
+        ts = epoch_us(snap.get("ts"))
+        if ts == NO_TIME or (pub_us != NO_TIME and ts < pub_us):
+            continue  # unreadable, or from the slot's previous Listing
+        clicks = snap["clicks"]
+        gained = clicks - prev_clicks if clicks >= prev_clicks else clicks
+        exposure = max(0.0, (ts - prev_ts) / _DAY_US) if prev_ts is not None else 0.0
+
+        day_bins = data["daily"].setdefault(_day(ts), {})
+        cell = day_bins.setdefault(group, [0, 0.0])
+        cell[0] += gained
+        cell[1] += exposure
+
+        if pub_us != NO_TIME:
+            week = min(MAX_AGE_WEEKS, int((ts - pub_us) // (7 * _DAY_US)))
+            data["decay"][week][0] += gained
+            data["decay"][week][1] += exposure
+
+        prev_ts, prev_clicks = ts, clicks
+        processed += 1
+
+    if prev_ts is not None:
+        data["watermarks"][slot] = [prev_ts, prev_clicks, pub_us]
+    return processed
+
+
+def _rate(clicks: float, days: float) -> Optional[float]:
+    return round(clicks / days, 3) if days > 0 else None
+
+
+def _summarize(sums: dict) -> dict:
+    return {
+        k: {"clicks": c, "listing_days": round(d, 1), "clicks_per_listing_day": _rate(c, d)}
+        for k, (c, d) in sorted(sums.items())
+    }
+
+
+def _rollups(daily: dict, today: datetime) -> dict:
+    out = {}
+    for window in WINDOWS:
+        first = (today - timedelta(days=window - 1)).date().isoformat()
+        dims = {"equipment": {}, "city": {}, "task": {}}
+        total = [0, 0.0]
+        for day, bins in daily.items():
+            if day < first:
+                continue
+            for group, (clicks, days) in bins.items():
+                equip, city, task = group.split("|", 2)
+                for dim, key in (("equipment", equip), ("city", city), ("task", f"{equip}/{task}")):
+                    acc = dims[dim].setdefault(key, [0, 0.0])
+                    acc[0] += clicks
+                    acc[1] += days
+                total[0] += clicks
+                total[1] += days
+        out[f"{window}d"] = {
+            "overall": _summarize({"all": total})["all"],
+            **{dim: _summarize(sums) for dim, sums in dims.items()},
+        }
+    return out
+
+
+def update(metadata: dict, now: Optional[datetime] = None, path: str = ANALYTICS_FILE) -> dict:
+    """Fold snapshots recorded since the last update() into the cached bins,
+    refresh the rollups, and write the result. Returns the written data."""
+    now = now or datetime.now(timezone.utc)
+    data = _empty()
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            data.update(json.load(f))
+
+    processed = sum(_bin_slot(data, slot, meta) for slot, meta in metadata.items())
+
+    oldest = (now - timedelta(days=RETENTION_DAYS)).date().isoformat()
+    data["daily"] = {day: bins for day, bins in data["daily"].items() if day >= oldest}
+    data["watermarks"] = {s: w for s, w in data["watermarks"].items() if s in metadata}
+    data["rollups"] = _rollups(data["daily"], now)
+    data["decay_curve"] = [
+        {"age_week": week, "clicks": c, "listing_days": round(d, 1), "clicks_per_listing_day": _rate(c, d)}
+        for week, (c, d) in enumerate(data["decay"])
+    ]
+    data["updated_at"] = now.isoformat()
+    data["last_processed"] = processed
+
+    write_atomic(path, json.dumps(data))
+    return data
+
+
+def load_summary(path: str = ANALYTICS_FILE) -> dict:
+    """The dashboard-facing part of the cache: rollups and decay curve,
+    without the bins and watermarks update() keeps for itself."""
+    data = load_json(path)
+    return {
+        "updated_at":  data.get("updated_at"),
+        "windows":     list(WINDOWS),
+        "rollups":     data.get("rollups", {}),
+        "decay_curve": data.get("decay_curve", []),
+    }
@@ -5,12 +5,35 @@ removal so history survives a Listing being deleted and republished.
 
 Every writer/reader of data/slot_metadata.json's click_snapshots array goes
 through this module rather than re-deriving the trim/carry/window rules.
+
+Storage: snapshots don't live in slot_metadata.json itself. They're appended
+to data/click_snapshots.jsonl, one record per new snapshot (or per history
+reset), so a scan's write cost scales with what it recorded rather than with
+every slot's full history. load_metadata() stitches the two back into the
+in-memory shape everything else uses (metadata[slot]["click_snapshots"]);
+save_metadata() appends whatever changed since the last load/save and
+compacts the log once it's mostly superseded records.
 """
 
+import json
+import os
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Iterable, Optional
+
+import numpy as np
+
+from helpers.json_store import write_atomic
 
 SNAPSHOT_CAP = 200
+METADATA_FILE = "data/slot_metadata.json"
+SNAPSHOT_LOG_NAME = "click_snapshots.jsonl"  # lives next to the metadata file
+COMPACT_RATIO = 2     # compact once the log holds this many times the live snapshot count
+COMPACT_MIN = 10_000  # ...and at least this many records
+
+# Per metadata file: what the snapshot log already holds for each slot
+# (its last persisted snapshot, or None after a reset) plus the log's record
+# count. Lets save_metadata() append only what's new.
+_persisted: dict = {}
 
 
 def record_snapshot(
@@ -87,7 +110,8 @@ def lifetime_total(metadata: dict, slot: str) -> int:
     return (m.get("lifetime_clicks") or 0) + current
 
 
-def seven_day_delta(snaps: list, published_at: Optional[str] = None) -> Optional[int]:
+def seven_day_delta(snaps: list, published_at: Optional[str] = None,
+                    now: Optional[datetime] = None) -> Optional[int]:
     """Delta clicks for the current listing instance over the last 7 days.
 
     Filters out snapshots older than published_at so a re-listed slot
@@ -95,7 +119,7 @@ def seven_day_delta(snaps: list, published_at: Optional[str] = None) -> Optional
     click count."""
     if not snaps:
         return None
-    cutoff = datetime.now(timezone.utc) - timedelta(days=7)
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=7)
     pub_dt = None
     if published_at:
         try:
@@ -119,3 +143,246 @@ def seven_day_delta(snaps: list, published_at: Optional[str] = None) -> Optional
     if len(recent) == 1:
         return recent[-1]["clicks"]
     return recent[-1]["clicks"] - recent[0]["clicks"]
+
+
+# ── Batch (all slots at once) ─────────────────────────────────────────────────
+NO_TIME = np.iinfo(np.int64).min  # unparseable timestamp: older than any cutoff
+
+
+def epoch_us(iso_str: Optional[str]) -> int:
+    """ISO timestamp -> integer microseconds since the epoch (naive = UTC).
+    Rounding timestamp() back to whole microseconds is exact at these
+    magnitudes, so batch comparisons agree with datetime comparisons."""
+    if not iso_str:
+        return NO_TIME
+    try:
+        dt = datetime.fromisoformat(iso_str)
+    except (TypeError, ValueError):
+        return NO_TIME
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return round(dt.timestamp() * 1_000_000)
+
+
+_TS_CHUNK = 1024
+
+
+def _parse_ts_column(ts_strs: list) -> np.ndarray:
+    """epoch_us over a whole column. UTC ("+00:00", as this module writes)
+    and naive timestamps parse in NumPy a chunk at a time; a chunk holding
+    anything else (another offset, garbage) is parsed one value at a time."""
+    trimmed = [t[:-6] if t and t.endswith("+00:00") else t for t in ts_strs]
+    out = np.empty(len(trimmed), dtype=np.int64)
+    for start in range(0, len(trimmed), _TS_CHUNK):
+        chunk = trimmed[start:start + _TS_CHUNK]
+        try:
+            out[start:start + len(chunk)] = np.array(chunk, dtype="datetime64[us]").astype(np.int64)
+        except (TypeError, ValueError):
+            out[start:start + len(chunk)] = [epoch_us(t) for t in ts_strs[start:start + _TS_CHUNK]]
+    return out
+
+
+def snapshot_table(metadata: dict, slots: Optional[list] = None) -> dict:
+    """Every snapshot of `slots` (default: all of metadata) as columnar
+    arrays, each slot's snapshots contiguous and in recorded order:
+    slots (list), slot (index into slots), ts_us, clicks, plus per-slot
+    published_us and lifetime_base (lifetime_clicks before the current
+    Listing). Timestamps are parsed once here rather than per query."""
+    slots = list(metadata) if slots is None else list(slots)
+    counts, ts_strs, click_col = [], [], []
+    published, lifetime_base = [], []
+    for slot in slots:
+        m = metadata.get(slot, {})
+        snaps = m.get("click_snapshots") or ()
+        counts.append(len(snaps))
+        for s in snaps:
+            ts_strs.append(s.get("ts"))
+            click_col.append(s["clicks"])
+        published.append(epoch_us(m.get("published_at")))
+        lifetime_base.append(m.get("lifetime_clicks") or 0)
+    return {
+        "slots":         slots,
+        "slot":          np.repeat(np.arange(len(slots), dtype=np.int64), counts),
+        "ts_us":         _parse_ts_column(ts_strs),
+        "clicks":        np.array(click_col, dtype=np.int64),
+        "published_us":  np.array(published, dtype=np.int64),
+        "lifetime_base": np.array(lifetime_base, dtype=np.int64),
+    }
+
+
+def batch_click_stats(metadata: dict, slots: Optional[list] = None,
+                      now: Optional[datetime] = None, table: Optional[dict] = None) -> dict:
+    """{slot: {"current_clicks", "seven_day", "lifetime_clicks"}} for every
+    slot in one vectorized pass — same results as snaps[-1]["clicks"],
+    seven_day_delta() and lifetime_total() called slot by slot."""
+    t = table if table is not None else snapshot_table(metadata, slots)
+    n = len(t["slots"])
+    slot, ts, clicks = t["slot"], t["ts_us"], t["clicks"]
+
+    counts = np.bincount(slot, minlength=n)
+    has_snaps = counts > 0
+    last_pos = np.cumsum(counts) - 1
+    current = np.where(has_snaps, clicks[np.maximum(last_pos, 0)] if len(clicks) else 0, 0)
+    lifetime = t["lifetime_base"] + current
+
+    cutoff = epoch_us((now or datetime.now(timezone.utc)).isoformat()) - 7 * 86400 * 1_000_000
+    in_window = np.flatnonzero((ts >= cutoff) & (ts >= t["published_us"][slot]))
+    seven_day = np.zeros(n, dtype=np.int64)
+    has_window = np.zeros(n, dtype=bool)
+    if len(in_window):
+        w_slot = slot[in_window]
+        firsts = np.flatnonzero(np.r_[True, w_slot[1:] != w_slot[:-1]])
+        lasts = np.r_[firsts[1:] - 1, len(w_slot) - 1]
+        owners = w_slot[firsts]
+        first_clicks = clicks[in_window[firsts]]
+        last_clicks = clicks[in_window[lasts]]
+        seven_day[owners] = np.where(lasts == firsts, last_clicks, last_clicks - first_clicks)
+        has_window[owners] = True
+
+    return {
+        s: {
+            "current_clicks":  int(current[i]) if has_snaps[i] else None,
+            "seven_day":       int(seven_day[i]) if has_window[i] else None,
+            "lifetime_clicks": int(lifetime[i]),
+        }
+        for i, s in enumerate(t["slots"])
+    }
+
+
+# ── Persistence ───────────────────────────────────────────────────────────────
+def snapshot_log_path(metadata_path: str = METADATA_FILE) -> str:
+    return os.path.join(os.path.dirname(metadata_path), SNAPSHOT_LOG_NAME)
+
+
+def _snap_key(snap: Optional[dict]):
+    return (snap["ts"], snap["clicks"]) if snap else None
+
+
+def _replay(lines: Iterable[str], metadata: dict) -> int:
+    """Apply snapshot log lines to metadata[slot]["click_snapshots"], each
+    trimmed to SNAPSHOT_CAP. Returns the number of records read."""
+    records = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            rec = json.loads(line)
+        except ValueError:
+            continue  # torn final line from an interrupted append
+        records += 1
+        snaps = metadata.setdefault(rec["slot"], {}).setdefault("click_snapshots", [])
+        if rec.get("reset"):
+            snaps.clear()
+        else:
+            snaps.append({"ts": rec["ts"], "clicks": rec["clicks"]})
+            if len(snaps) > 2 * SNAPSHOT_CAP:
+                del snaps[:-SNAPSHOT_CAP]
+    for m in metadata.values():
+        snaps = m.get("click_snapshots")
+        if snaps and len(snaps) > SNAPSHOT_CAP:
+            m["click_snapshots"] = snaps[-SNAPSHOT_CAP:]
+    return records
+
+
+def load_metadata(path: str = METADATA_FILE) -> dict:
+    """slot_metadata.json with each slot's click_snapshots replayed from the
+    snapshot log. A metadata file from before the log existed keeps its
+    embedded snapshots; the first save_metadata() moves them into the log."""
+    metadata = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            metadata = json.load(f)
+
+    log_path = snapshot_log_path(path)
+    records = 0
+    if os.path.exists(log_path):
+        for m in metadata.values():
+            m.pop("click_snapshots", None)  # the log is authoritative once it exists
+        with open(log_path, encoding="utf-8") as f:
+            records = _replay(f, metadata)
+        known = {slot: _snap_key((m.get("click_snapshots") or [None])[-1]) for slot, m in metadata.items()}
+    else:
+        known = {}  # nothing in the log yet — every embedded snapshot is unsaved
+
+    _persisted[os.path.abspath(path)] = {"slots": known, "records": records}
+    return metadata
+
+
+def _unsaved(snaps: list, last_saved) -> "tuple[bool, list]":
+    """(needs a reset record, snapshots to append) to bring the log's copy of
+    a slot — whose last persisted snapshot is last_saved — up to `snaps`."""
+    if last_saved is None:
+        return False, snaps
+    for i in range(len(snaps) - 1, -1, -1):
+        if _snap_key(snaps[i]) == last_saved:
+            return False, snaps[i + 1:]
+    return True, snaps  # history was cleared (and maybe restarted) since
+
+
+def save_metadata(metadata: dict, path: str = METADATA_FILE) -> int:
+    """Append new snapshots to the log, then write slot_metadata.json without
+    them. Returns the number of log records appended."""
+    state = _persisted.setdefault(os.path.abspath(path), {"slots": {}, "records": 0})
+    known = state["slots"]
+
+    lines = []
+    for slot, m in metadata.items():
+        snaps = m.get("click_snapshots") or []
+        reset, new = _unsaved(snaps, known.get(slot))
+        if reset:
+            lines.append(json.dumps({"slot": slot, "reset": True}))
+        lines.extend(json.dumps({"slot": slot, "ts": s["ts"], "clicks": s["clicks"]}) for s in new)
+        if reset or new:
+            known[slot] = _snap_key(snaps[-1]) if snaps else None
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    log_path = snapshot_log_path(path)
+    if lines:
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        state["records"] += len(lines)
+
+    stripped = {
+        slot: {k: v for k, v in m.items() if k != "click_snapshots"}
+        for slot, m in metadata.items()
+    }
+    write_atomic(path, json.dumps(stripped, indent=4))
+
+    live = sum(len(m.get("click_snapshots") or ()) for m in metadata.values())
+    if state["records"] > max(COMPACT_MIN, COMPACT_RATIO * live):
+        compact(metadata, path)
+    return len(lines)
+
+
+def compact(metadata: dict, path: str = METADATA_FILE) -> None:
+    """Rewrite the snapshot log as just the current snapshots (no resets, no
+    trimmed-away entries). The snapshots come from replaying the log as it
+    is on disk, not from `metadata`, so records another process appended
+    since this one loaded survive; anything appended while the rewrite runs
+    is copied over before the temp file is swapped in, so a reader never
+    sees a half-written log."""
+    log_path = snapshot_log_path(path)
+    tmp = log_path + ".tmp"
+    current: dict = {}
+    with open(log_path, "rb") as f:
+        raw = f.read()
+    end = raw.rfind(b"\n") + 1  # past the last complete line
+    _replay(raw[:end].decode("utf-8").splitlines(), current)
+    del raw
+    records = 0
+    with open(tmp, "wb") as out:
+        for slot, m in current.items():
+            for snap in m.get("click_snapshots") or ():
+                out.write(json.dumps({"slot": slot, "ts": snap["ts"], "clicks": snap["clicks"]}).encode("utf-8") + b"\n")
+                records += 1
+        with open(log_path, "rb") as f:
+            f.seek(end)
+            tail = f.read()
+        out.write(tail)
+        records += tail.count(b"\n")
+    os.replace(tmp, log_path)
+    # What this process last persisted per slot is unchanged by the rewrite.
+    _persisted[os.path.abspath(path)] = {
+        "slots": {slot: _snap_key((m.get("click_snapshots") or [None])[-1]) for slot, m in metadata.items()},
+        "records": records,
+    }
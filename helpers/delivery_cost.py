@@ -0,0 +1,116 @@
+"""
+Delivery Cost — the estimated_cost formula for data/cities_data.json, for
+one City at a time or every City at once.
+
+    estimated_cost = BASE + RATE * distance, rounded to the nearest $0.10
+
+    BASE = FIXED_OVERHEAD + MACHINE_GALLONS * diesel
+    RATE = LABOR_PER_MILE + (2 / TRUCK_MPG) * diesel   (round trip)
+
+calc_cost() is the scalar form. PricingTable holds the distance and current
+cost columns as arrays, so repricing every City — or every City at each of
+hundreds of candidate diesel prices — is a handful of NumPy operations, and
+rounds exactly the way calc_cost() does.
+"""
+
+from typing import Iterable
+
+import numpy as np
+
+FIXED_OVERHEAD   = 25.00   # non-fuel fixed cost per delivery
+LABOR_PER_MILE   = 2.75    # non-fuel cost per mile (labor, wear, time)
+MACHINE_GALLONS  = 10      # gallons of diesel included with each rental
+TRUCK_MPG        = 8.0     # transport truck fuel efficiency
+ROUND_TO         = 0.10    # round estimated_cost to nearest $0.10
+
+
+def calc_cost(distance: float, diesel: float) -> float:
+    base = FIXED_OVERHEAD + MACHINE_GALLONS * diesel
+    rate = LABOR_PER_MILE + (2 / TRUCK_MPG) * diesel
+    raw  = base + rate * distance
+    return round(round(raw / ROUND_TO) * ROUND_TO, 2)
+
+
+def cost_array(distances: np.ndarray, diesel) -> np.ndarray:
+    """calc_cost() over arrays. `diesel` may be a scalar or an array of
+    candidate prices, in which case the result has one row per price."""
+    diesel = np.asarray(diesel, dtype=np.float64)[..., None] if np.ndim(diesel) else float(diesel)
+    base = FIXED_OVERHEAD + MACHINE_GALLONS * diesel
+    rate = LABOR_PER_MILE + (2 / TRUCK_MPG) * diesel
+    raw  = base + rate * distances
+    # np.round is round-half-even like round(); same float ops, same result.
+    return np.round(np.round(raw / ROUND_TO) * ROUND_TO, 2)
+
+
+class PricingTable:
+    """The distance and estimated_cost columns of a cities list. Distances
+    come from `distances` (aligned with cities, e.g. DistanceCache.resolve())
+    or else each City's `distance` field. Cities without a numeric distance
+    are never repriced."""
+
+    def __init__(self, cities: list, distances=None):
+        self.cities = cities
+        self.names = [c.get("city", "?") for c in cities]
+        if distances is None:
+            distances = [_num(c.get("distance")) for c in cities]
+        self.distance = np.asarray(distances, dtype=np.float64)
+        self.current = np.array([_num(c.get("estimated_cost")) for c in cities], dtype=np.float64)
+        self.priced = ~np.isnan(self.distance)
+
+    def costs(self, diesel: float) -> np.ndarray:
+        """New estimated_cost per City at `diesel` (current cost where unpriced)."""
+        return np.where(self.priced, cost_array(self.distance, diesel), self.current)
+
+    def _reprice(self, diesel: float) -> tuple:
+        new = self.costs(diesel)
+        return new, self.priced & ~(new == self.current)
+
+    def diff(self, diesel: float) -> dict:
+        """Summary of repricing at `diesel` against the current costs."""
+        new, mask = self._reprice(diesel)
+        delta = (new - self.current)[mask & ~np.isnan(self.current)]  # no delta for a City with no cost yet
+        return {
+            "diesel":      round(float(diesel), 3),
+            "changed":     int(mask.sum()),
+            "mean_change": round(float(delta.mean()), 2) if delta.size else 0.0,
+            "max_change":  round(float(np.abs(delta).max()), 2) if delta.size else 0.0,
+            "mean_cost":   round(float(new[self.priced].mean()), 2) if self.priced.any() else None,
+        }
+
+    def sweep(self, prices: Iterable[float]) -> list:
+        """diff() for each candidate price, computed as one (prices x cities)
+        array operation."""
+        prices = np.asarray(list(prices), dtype=np.float64)
+        d = self.distance[self.priced]
+        cur = self.current[self.priced]
+        new = cost_array(d, prices)                       # (P, N)
+        changed = ~(new == cur)
+        has_delta = changed & ~np.isnan(cur)
+        delta = np.where(has_delta, new - cur, 0.0)
+        n_changed = changed.sum(axis=1)
+        n_delta = has_delta.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_change = np.where(n_delta > 0, delta.sum(axis=1) / n_delta, 0.0)
+        max_change = np.abs(delta).max(axis=1) if d.size else np.zeros(len(prices))
+        mean_cost = new.mean(axis=1) if d.size else np.full(len(prices), np.nan)
+        return [
+            {"diesel": round(float(p), 3), "changed": int(c), "mean_change": round(float(mc), 2),
+             "max_change": round(float(mx), 2), "mean_cost": round(float(m), 2) if d.size else None}
+            for p, c, mc, mx, m in zip(prices, n_changed, mean_change, max_change, mean_cost)
+        ]
+
+    def apply(self, diesel: float) -> int:
+        """Write the new costs into the cities list (only the entries that
+        change). Returns how many changed."""
+        new, mask = self._reprice(diesel)
+        for i in np.flatnonzero(mask):
+            self.cities[i]["estimated_cost"] = float(new[i])
+        self.current = np.where(mask, new, self.current)
+        return int(mask.sum())
+
+
+def _num(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
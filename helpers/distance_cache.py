@@ -0,0 +1,143 @@
+"""
+Distance Cache — depot-to-City delivery distances, kept in
+data/distance_cache.json and keyed "depot|city".
+
+Each entry records where its number came from:
+
+  cities_data  the `distance` column already in data/cities_data.json
+  import       a bulk import (CSV export, or a JSON list from a routing tool)
+  haversine    straight-line distance x DETOUR_FACTOR, for a City nothing
+               else covers — stored too, so it's computed once
+
+An import overwrites any entry; seeding from cities_data and the haversine
+fallback only fill gaps. Pricing reads distances through resolve() and
+never recomputes one the cache already has.
+
+    {"yard|Lorena": {"miles": 2.4, "source": "cities_data", "updated_at": "..."}}
+"""
+
+import csv
+import json
+import os
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+
+from helpers.geo import CityIndex, haversine_miles
+from helpers.json_store import write_atomic
+
+CACHE_FILE = "data/distance_cache.json"
+DEFAULT_DEPOT = "yard"
+# Approximate: the point the existing `distance` column fits best (between
+# Lorena and Hewitt), and that fit's road-miles-per-straight-line-mile.
+DEPOTS = {"yard": (31.445, -97.24)}
+DETOUR_FACTOR = 1.22
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class DistanceCache:
+    """In-memory view of the cache file; save() writes it back if anything
+    changed."""
+
+    def __init__(self, path: str = CACHE_FILE):
+        self.path = path
+        self.entries: dict = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+        self._dirty = False
+
+    @staticmethod
+    def key(city: str, depot: str = DEFAULT_DEPOT) -> str:
+        return f"{depot}|{city}"
+
+    def get(self, city: str, depot: str = DEFAULT_DEPOT) -> Optional[dict]:
+        return self.entries.get(self.key(city, depot))
+
+    def put(self, city: str, miles: float, source: str, depot: str = DEFAULT_DEPOT) -> None:
+        self.entries[self.key(city, depot)] = {"miles": round(float(miles), 1), "source": source, "updated_at": _now()}
+        self._dirty = True
+
+    def seed_from_cities(self, cities: list, depot: str = DEFAULT_DEPOT) -> int:
+        """Fill gaps from each City's existing `distance` field. Returns how
+        many entries were added."""
+        added = 0
+        for c in cities:
+            try:
+                miles = float(c["distance"])
+            except (TypeError, ValueError, KeyError):
+                continue
+            if self.get(c["city"], depot) is None:
+                self.put(c["city"], miles, "cities_data", depot)
+                added += 1
+        return added
+
+    def import_file(self, path: str, depot: str = DEFAULT_DEPOT, source: str = "import") -> int:
+        """Bulk import from a CSV (header with `city` and `miles` or
+        `distance`, optional `depot`) or a JSON list of such records.
+        Overwrites existing entries. Returns how many rows were imported."""
+        if path.lower().endswith(".json"):
+            with open(path, encoding="utf-8") as f:
+                rows = json.load(f)
+        else:
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                rows = list(csv.DictReader(f))
+        n = 0
+        for row in rows:
+            row = {k.strip().lower(): v for k, v in row.items() if k}
+            miles = row.get("miles", row.get("distance"))
+            city = (row.get("city") or "").strip()
+            try:
+                miles = float(miles)
+            except (TypeError, ValueError):
+                continue
+            if not city or miles < 0:
+                continue
+            self.put(city, miles, source, (row.get("depot") or depot).strip())
+            n += 1
+        return n
+
+    def resolve(self, cities: list, depot: str = DEFAULT_DEPOT) -> np.ndarray:
+        """Miles from `depot` to each City, aligned with `cities`. Cached
+        entries are used as-is; a City without one gets the haversine x
+        DETOUR_FACTOR estimate (stored for next time), or NaN if neither the
+        City nor the depot has coordinates."""
+        out = np.full(len(cities), np.nan)
+        missing = []
+        for i, c in enumerate(cities):
+            entry = self.get(c.get("city", ""), depot)
+            if entry is not None:
+                out[i] = entry["miles"]
+            else:
+                missing.append(i)
+        origin = DEPOTS.get(depot)
+        if missing and origin is not None:
+            index = CityIndex.for_cities(cities)
+            for i in missing:
+                ll = index.location(cities[i].get("city", ""))
+                if ll is None:
+                    continue
+                miles = round(haversine_miles(*origin, *ll) * DETOUR_FACTOR, 1)
+                self.put(cities[i]["city"], miles, "haversine", depot)
+                out[i] = miles
+        return out
+
+    def sources(self) -> dict:
+        """Entry count per source, for logging."""
+        counts: dict = {}
+        for entry in self.entries.values():
+            counts[entry["source"]] = counts.get(entry["source"], 0) + 1
+        return counts
+
+    def save(self) -> bool:
+        """Write the cache if anything changed since it was loaded. Returns
+        True if it wrote."""
+        if not self._dirty:
+            return False
+        write_atomic(self.path, json.dumps(self.entries, indent=2, sort_keys=True))
+        self._dirty = False
+        return True
@@ -0,0 +1,188 @@
+"""
+Event Stream — pushes agent progress to dashboard clients as it happens.
+
+Instead of every open dashboard polling /api/live (and re-reading the log)
+every few seconds, one EventBroadcaster thread follows listing_progress.log
+and the ops store's run history and fans each new event out to the subscribed
+clients, which map_server.py streams as server-sent events on /api/events.
+
+Event dicts all carry a "type":
+  phase     {"phase", "ts"}                       — log: "Phase 1a — ..."
+  publish   publish_dict() fields                 — log: "Publishing slot ..."
+  complete  {"marker", "ts"}                      — log: run/session finished
+  outcome   {"script", "status", "metrics", "note", "ts"} — record_run() entry
+  status    {"running"}                           — agent started/stopped
+
+A subscriber joins with the log lines as of that moment (Subscription.lines,
+for its initial snapshot); every log event after them, and none of them,
+arrives on its queue. Each subscriber gets a bounded queue. A client that stops reading and lets
+it fill is dropped (its stream ends and EventSource reconnects with a fresh
+snapshot), so a stalled browser can't make the server buffer without limit.
+The thread only runs while someone is subscribed.
+"""
+
+import json
+import queue
+import threading
+from typing import Callable, Optional
+
+from helpers.ops_store import OpsStore
+from helpers.log_events import CompletionEvent, PhaseEvent, PublishEvent, parse_lines, publish_dict
+from helpers.log_tail import LogTail
+
+POLL_INTERVAL = 1.0   # seconds between checks of the log / history file
+CLIENT_BUFFER = 256   # events queued per client before it's dropped
+SNAPSHOT_LINES = 150  # log lines a new subscriber's snapshot is built from
+
+
+def event_dict(event) -> Optional[dict]:
+    """JSON shape of a log_events event, tagged with its type."""
+    if isinstance(event, PublishEvent):
+        return {"type": "publish", **publish_dict(event)}
+    if isinstance(event, PhaseEvent):
+        return {"type": "phase", "phase": event.phase, "ts": event.ts}
+    if isinstance(event, CompletionEvent):
+        return {"type": "complete", "marker": event.marker, "ts": event.ts}
+    return None
+
+
+class RunHistoryWatcher:
+    """New record_run() entries since the last poll(). The entries already
+    there when the watcher starts are not reported."""
+
+    def __init__(self, store: OpsStore):
+        self.store = store
+        self._version = store.version("runs")
+        self._last_id = store.last_run_id()
+
+    def poll(self) -> list:
+        version = self.store.version("runs")  # one indexed lookup when nothing changed
+        if version == self._version:
+            return []
+        self._version = version
+        runs = self.store.runs(after_id=self._last_id)
+        if runs:
+            self._last_id = runs[-1]["id"]
+        return [{
+            "type":    "outcome",
+            "script":  run["script"],
+            "status":  run["status"],
+            "metrics": run["metrics"],
+            "note":    run["note"],
+            "ts":      run["timestamp"],
+        } for run in runs]
+
+
+class Subscription:
+    """One client's view of the stream: get() the next event, or None if
+    nothing arrived within the timeout. `lines` are the last log lines as of
+    subscribing — the queue starts right after them. `closed` is set once
+    the client has been dropped for falling behind."""
+
+    def __init__(self, maxsize: int, lines: list = None):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.lines = lines or []
+        self.closed = threading.Event()
+
+    def get(self, timeout: float) -> Optional[dict]:
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBroadcaster:
+    """Follows the log and run history on a background thread and fans new
+    events out to every Subscription. `running` is an optional callable
+    (e.g. a task_status provider's agent_running) polled for status events."""
+
+    def __init__(self, log_path: str, store: OpsStore,
+                 running: Callable[[], bool] = None,
+                 poll_interval: float = POLL_INTERVAL, client_buffer: int = CLIENT_BUFFER,
+                 snapshot_lines: int = SNAPSHOT_LINES):
+        self.log_path = log_path
+        self.store = store
+        self._running = running
+        self.poll_interval = poll_interval
+        self.client_buffer = client_buffer
+        self.snapshot_lines = snapshot_lines
+        self._tail = None
+        self._log_lock = threading.Lock()  # held from reading the log to publishing it; taken before _lock
+        self._lock = threading.Lock()
+        self._subs: set = set()
+        self._thread = None
+        self._stop = None  # Event owned by the running thread
+
+    def subscribe(self) -> Subscription:
+        with self._log_lock:
+            with self._lock:
+                idle = self._thread is None
+            if idle:  # a fresh tail, seeded at the current end of the log
+                self._tail = LogTail(self.log_path, maxlen=self.snapshot_lines)
+            # Publish whatever was appended to the existing subscribers first,
+            # so the new one's lines and its queue meet exactly.
+            try:
+                self._publish_log()
+            except Exception:
+                pass  # as in _loop: a half-written line is picked up next tick
+            sub = Subscription(self.client_buffer, self._tail.lines())
+            with self._lock:
+                self._subs.add(sub)
+                if self._thread is None:
+                    self._stop = threading.Event()
+                    self._thread = threading.Thread(target=self._loop, args=(self._stop,),
+                                                    name="event-broadcaster", daemon=True)
+                    self._thread.start()
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            self._subs.discard(sub)
+            if not self._subs and self._thread is not None:
+                self._stop.set()
+                self._thread = None
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subs)
+
+    def publish(self, event: dict) -> None:
+        with self._lock:
+            subs = list(self._subs)
+        for sub in subs:
+            try:
+                sub.queue.put_nowait(event)
+            except queue.Full:
+                sub.closed.set()
+                self.unsubscribe(sub)
+
+    def _publish_log(self) -> None:
+        """Publish the log lines appended since the last call. Caller holds _log_lock."""
+        for event in parse_lines(self._tail.refresh()):
+            self.publish(event_dict(event))
+
+    def _loop(self, stop: threading.Event):
+        # A fresh watcher per run of the thread, skipping existing runs; the
+        # log tail was started by the subscribe() that started the thread.
+        history = RunHistoryWatcher(self.store)
+        running = self._running() if self._running else None
+
+        while not stop.wait(self.poll_interval):
+            try:
+                with self._log_lock:
+                    self._publish_log()
+                for event in history.poll():
+                    self.publish(event)
+                if self._running:
+                    now_running = self._running()
+                    if now_running != running:
+                        running = now_running
+                        self.publish({"type": "status", "running": running})
+            except Exception:
+                pass  # a half-written log line or a locked database; try again next tick
+
+
+def format_sse(event: dict) -> bytes:
+    """One server-sent-events frame: the event's type as the SSE event name,
+    the whole dict as its data."""
+    return f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8")
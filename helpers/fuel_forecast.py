@@ -0,0 +1,96 @@
+"""
+Fuel Forecast — how far the diesel price is likely to have moved since the
+last observation in helpers/fuel_history, so fuel_price_agent.py can skip
+the network fetch when a move past its CHANGE_THRESHOLD is unlikely.
+
+The price is treated as a random walk around an exponentially smoothed
+level:
+
+    level  = EWMA of observed prices (ALPHA)
+    vol    = EWMA of |price change| / sqrt(days between changes)
+    band   = Z * vol * sqrt(days since the last observation)
+
+and a fetch is skipped only when the band around whichever of the level and
+the last price is further from the basis still stays under the threshold.
+EIA publishes weekly, so the agent's daily runs mostly see the same number
+again; those repeats are collapsed before estimating, or they'd make the
+price look far steadier than it is. With too little history, or a last
+observation older than MAX_SKIP_DAYS, it always fetches.
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+
+from helpers.fuel_history import price_series
+
+ALPHA = 0.3             # EWMA weight on the newest observation
+ROLLING_WINDOW = 4      # observations in the rolling mean reported alongside
+Z = 2.0                 # band width, in volatilities
+MIN_CHANGES = 4         # price changes seen; fewer and the forecast is never trusted
+MAX_SKIP_DAYS = 7       # always fetch if the last real price is older than this
+
+
+def ewma(values: np.ndarray, alpha: float = ALPHA) -> float:
+    """Bias-adjusted exponentially weighted mean of `values` (newest last),
+    as one weighted sum rather than a loop."""
+    values = np.asarray(values, dtype=np.float64)
+    if not values.size:
+        return float("nan")
+    weights = (1 - alpha) ** np.arange(values.size - 1, -1, -1)
+    return float(weights @ values / weights.sum())
+
+
+def rolling_mean(values: np.ndarray, window: int = ROLLING_WINDOW) -> np.ndarray:
+    """Mean of each `window` consecutive values (len(values) - window + 1 of
+    them), via a cumulative sum."""
+    values = np.asarray(values, dtype=np.float64)
+    if values.size < window:
+        return np.empty(0)
+    c = np.cumsum(np.r_[0.0, values])
+    return (c[window:] - c[:-window]) / window
+
+
+def forecast(records: list, now: Optional[datetime] = None) -> Optional[dict]:
+    """Smoothed level, per-sqrt-day volatility and the band expected by
+    `now`, from history records. None with fewer than two observations."""
+    days, prices = price_series(records)
+    if prices.size < 2:
+        return None
+    now_day = (now or datetime.now(timezone.utc)).timestamp() / 86400
+    days_ahead = max(now_day - float(days[-1]), 0.0)
+    fresh = np.r_[True, prices[1:] != prices[:-1]]  # first sighting of each published price
+    c_days, c_prices = days[fresh], prices[fresh]
+    if c_prices.size >= 2:
+        gaps = np.maximum(np.diff(c_days), 1 / 24)  # same-hour changes count as an hour apart
+        vol = ewma(np.abs(np.diff(c_prices)) / np.sqrt(gaps))
+    else:
+        vol = 0.0
+    window = rolling_mean(c_prices)
+    return {
+        "observations": int(prices.size),
+        "changes":      int(c_prices.size - 1),
+        "last_price":   round(float(prices[-1]), 3),
+        "level":        round(ewma(c_prices), 3),
+        "rolling_mean": round(float(window[-1]), 3) if window.size else None,
+        "vol":          round(vol, 4),
+        "days_ahead":   round(days_ahead, 2),
+        "band":         round(Z * vol * float(np.sqrt(max(days_ahead, 1.0))), 3),
+    }
+
+
+def should_fetch(records: list, basis: float, threshold: float,
+                 now: Optional[datetime] = None) -> tuple:
+    """(fetch?, reason). False only when the forecast says the price is
+    unlikely to be `threshold` or more away from `basis`."""
+    f = forecast(records, now)
+    if f is None or f["changes"] < MIN_CHANGES:
+        return True, "not enough price history to forecast"
+    if f["days_ahead"] > MAX_SKIP_DAYS:
+        return True, f"last observed price is {f['days_ahead']:.1f} days old"
+    centre = max(f["level"], f["last_price"], key=lambda p: abs(p - basis))
+    if abs(centre - basis) + f["band"] >= threshold:
+        return True, f"forecast ${centre:.3f} ± {f['band']:.3f} could be ≥ ${threshold} from ${basis:.3f}"
+    return False, (f"forecast ${centre:.3f} ± {f['band']:.3f} stays within ${threshold} "
+                   f"of ${basis:.3f} ({f['days_ahead']:.1f} days since last observation)")
@@ -0,0 +1,66 @@
+"""
+Fuel History — every diesel price fuel_price_agent.py has observed, in the
+fuel_prices table of helpers/ops_store.py. Each record is one observation,
+whether or not it moved the basis enough to reprice anything:
+
+    {"ts": "...", "price": 3.612, "basis": 3.540, "source": "eia_html",
+     "applied": false, "cities_updated": 0}
+
+Recording one is a single INSERT, however long the history gets. The earlier
+data/fuel_price_history.jsonl (and the JSON array before it, as source
+"legacy") is imported with the other ledgers when the store is created; a
+file in that JSONL shape can still be loaded directly, e.g. to replay a
+recorded run elsewhere.
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+
+from helpers.ops_store import get_store
+
+
+def append(record: dict) -> None:
+    """Record one observation (keys as above; `ts` defaults to now)."""
+    get_store().add_fuel_price(**record)
+
+
+def load(path: Optional[str] = None) -> list:
+    """Every record, oldest first — from the store, or from a JSONL file at
+    `path` (a torn final line from an interrupted append is skipped)."""
+    if path is None:
+        return get_store().fuel_prices()
+    records = []
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    return records
+
+
+def price_series(records: list) -> tuple:
+    """(days since the epoch, price) arrays for the records with a usable
+    price and timestamp, in time order."""
+    days, prices = [], []
+    for r in records:
+        try:
+            ts = datetime.fromisoformat(r["ts"])
+            price = float(r["price"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        days.append(ts.timestamp() / 86400)
+        prices.append(price)
+    days = np.array(days, dtype=np.float64)
+    prices = np.array(prices, dtype=np.float64)
+    order = np.argsort(days, kind="stable")
+    return days[order], prices[order]
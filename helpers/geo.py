@@ -0,0 +1,190 @@
+"""
+Geo — distance queries over the City table in data/cities_data.json.
+
+CityIndex holds every City with a usable lat/lng as NumPy arrays (degrees,
+plus radians and cos(lat) precomputed once), so "which cities are within N
+miles of X", "the k nearest cities to X" and "cities inside this box" are
+one vectorized haversine pass instead of a Python loop per City. The full
+City-to-City distance matrix is computed on first use and kept — at a few
+hundred cities it's a few hundred KB — and answers nearest_among(), e.g.
+the nearest covered City for every uncovered one on the dashboard.
+
+CityIndex.load() caches the index per parsed cities_data.json (through
+helpers.json_store), so callers can ask for it freely.
+"""
+
+import math
+import threading
+from typing import Iterable, Optional
+
+import numpy as np
+
+from helpers.json_store import load_json
+
+CITIES_FILE = "data/cities_data.json"
+EARTH_RADIUS_MILES = 3958.8
+MATRIX_MAX_CITIES = 2000  # beyond this, nearest_among() computes blocks instead of the full matrix
+BLOCK_ROWS = 512          # rows per block, so a block stays BLOCK_ROWS x len(candidates)
+
+
+def haversine_miles(lat1, lng1, lat2, lng2) -> float:
+    """Great-circle distance between two points, in miles."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = math.radians(lat2 - lat1)
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return EARTH_RADIUS_MILES * 2 * math.asin(math.sqrt(a))
+
+
+def _haversine(lat1, cos1, lng1, lat2, cos2, lng2) -> np.ndarray:
+    """Vectorized haversine on radians with cos(lat) precomputed; arguments
+    broadcast against each other."""
+    a = np.sin((lat2 - lat1) / 2) ** 2 + cos1 * cos2 * np.sin((lng2 - lng1) / 2) ** 2
+    return EARTH_RADIUS_MILES * 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _coords(city: dict) -> Optional[tuple]:
+    try:
+        lat, lng = float(city["lat"]), float(city["lng"])
+    except (TypeError, ValueError, KeyError):
+        return None
+    if not (math.isfinite(lat) and math.isfinite(lng)):
+        return None
+    return lat, lng
+
+
+class CityIndex:
+    """Vectorized radius / k-nearest / bounding-box queries over a list of
+    cities_data.json rows. Rows without a usable lat/lng are left out of
+    every query and listed in `invalid`. Results are (city, miles) pairs,
+    nearest first."""
+
+    def __init__(self, cities: Iterable[dict]):
+        names, lats, lngs, invalid = [], [], [], []
+        for c in cities:
+            ll = _coords(c)
+            if ll is None:
+                invalid.append(c.get("city", "?"))
+                continue
+            names.append(c["city"])
+            lats.append(ll[0])
+            lngs.append(ll[1])
+        self.names = names
+        self.invalid = invalid
+        self.lat = np.array(lats, dtype=np.float64)
+        self.lng = np.array(lngs, dtype=np.float64)
+        self._lat_r = np.radians(self.lat)
+        self._lng_r = np.radians(self.lng)
+        self._cos = np.cos(self._lat_r)
+        self._pos = {name: i for i, name in enumerate(names)}
+        self._matrix = None
+        self._matrix_lock = threading.Lock()
+
+    _cache: dict = {}  # id(parsed cities list) -> (that list, CityIndex)
+    _cache_lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str = CITIES_FILE) -> "CityIndex":
+        """Index over cities_data.json, rebuilt only when the file changes."""
+        return cls.for_cities(load_json(path, default=[]))
+
+    @classmethod
+    def for_cities(cls, cities: list) -> "CityIndex":
+        """Index over an already-parsed cities list, cached by its identity
+        (json_store hands back the same list until the file changes)."""
+        with cls._cache_lock:
+            hit = cls._cache.get(id(cities))
+            if hit and hit[0] is cities:
+                return hit[1]
+        index = cls(cities)
+        with cls._cache_lock:
+            cls._cache = {id(cities): (cities, index)}
+        return index
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, city: str) -> bool:
+        return city in self._pos
+
+    def location(self, city: str) -> Optional[tuple]:
+        i = self._pos.get(city)
+        return (float(self.lat[i]), float(self.lng[i])) if i is not None else None
+
+    def distances_from(self, lat: float, lng: float) -> np.ndarray:
+        """Miles from (lat, lng) to every indexed City, in `names` order."""
+        lat_r, lng_r = math.radians(lat), math.radians(lng)
+        return _haversine(lat_r, math.cos(lat_r), lng_r, self._lat_r, self._cos, self._lng_r)
+
+    def _point(self, origin) -> tuple:
+        """(lat, lng) from a City name or a (lat, lng) pair."""
+        if isinstance(origin, str):
+            ll = self.location(origin)
+            if ll is None:
+                raise KeyError(f"City not in index (or has no lat/lng): {origin!r}")
+            return ll
+        return float(origin[0]), float(origin[1])
+
+    def _pairs(self, idx: np.ndarray, dist: np.ndarray) -> list:
+        return [(self.names[i], round(float(dist[i]), 1)) for i in idx]
+
+    def within_radius(self, origin, miles: float) -> list:
+        """Cities within `miles` of origin (a City name or (lat, lng)),
+        nearest first. A City origin is included, at 0 miles."""
+        dist = self.distances_from(*self._point(origin))
+        idx = np.flatnonzero(dist <= miles)
+        return self._pairs(idx[np.argsort(dist[idx], kind="stable")], dist)
+
+    def nearest(self, origin, k: int = 1, among: Iterable[str] = None, exclude_self: bool = True) -> list:
+        """The k cities nearest origin, optionally restricted to the names in
+        `among`. A City origin doesn't count as its own neighbour unless
+        exclude_self is False."""
+        dist = self.distances_from(*self._point(origin))
+        mask = np.ones(len(self.names), dtype=bool)
+        if among is not None:
+            mask[:] = False
+            mask[[self._pos[c] for c in among if c in self._pos]] = True
+        if exclude_self and isinstance(origin, str) and origin in self._pos:
+            mask[self._pos[origin]] = False
+        idx = np.flatnonzero(mask)
+        if k < len(idx):
+            idx = idx[np.argpartition(dist[idx], k)[:k]]
+        return self._pairs(idx[np.argsort(dist[idx], kind="stable")], dist)
+
+    def in_bbox(self, west: float, south: float, east: float, north: float) -> list:
+        """Names of the cities inside the box, in index order."""
+        mask = (self.lat >= south) & (self.lat <= north) & (self.lng >= west) & (self.lng <= east)
+        return [self.names[i] for i in np.flatnonzero(mask)]
+
+    def matrix(self) -> np.ndarray:
+        """Full City-to-City distance matrix in miles, computed once."""
+        with self._matrix_lock:
+            if self._matrix is None:
+                self._matrix = self._block(np.arange(len(self.names)), np.arange(len(self.names)))
+            return self._matrix
+
+    def _block(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        return _haversine(self._lat_r[rows, None], self._cos[rows, None], self._lng_r[rows, None],
+                          self._lat_r[None, cols], self._cos[None, cols], self._lng_r[None, cols])
+
+    def nearest_among(self, cities: Iterable[str], candidates: Iterable[str]) -> dict:
+        """For each of `cities`, the nearest *other* City in `candidates`, as
+        {city: (nearest, miles)}. Cities with no candidate are left out."""
+        rows = np.array([self._pos[c] for c in cities if c in self._pos], dtype=np.intp)
+        cols = np.array(sorted({self._pos[c] for c in candidates if c in self._pos}), dtype=np.intp)
+        if not len(rows) or not len(cols):
+            return {}
+        matrix = self.matrix() if len(self.names) <= MATRIX_MAX_CITIES else None
+        best, best_d = [], []
+        for i in range(0, len(rows), BLOCK_ROWS):
+            chunk = rows[i:i + BLOCK_ROWS]
+            block = matrix[np.ix_(chunk, cols)] if matrix is not None else self._block(chunk, cols)
+            block[chunk[:, None] == cols[None, :]] = np.inf  # a City isn't its own neighbour
+            b = block.argmin(axis=1)
+            best.append(b)
+            best_d.append(block[np.arange(len(chunk)), b])
+        best, best_d = np.concatenate(best), np.concatenate(best_d)
+        return {
+            self.names[r]: (self.names[cols[b]], round(float(d), 1))
+            for r, b, d in zip(rows, best, best_d) if np.isfinite(d)
+        }
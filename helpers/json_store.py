@@ -0,0 +1,130 @@
+"""
+JSON Store — a shared, mtime-keyed cache for the data files every dashboard
+request and scheduled run re-reads (state.json, data/slot_metadata.json,
+data/cities_data.json, data/competitors.json).
+
+load_json() only re-parses a file when its (mtime, size) signature changes,
+so a dashboard that's polled every few seconds stops paying a full JSON parse
+per file per request when nothing has been written in between.
+
+The cached object is shared between callers: treat it as read-only, or make
+sure your mutations are followed by a write to the same file (which changes
+its signature and invalidates the entry). A missing file yields a fresh copy
+of `default` each time and is never cached.
+
+write_atomic() / write_if_changed() are the write side: a temp file renamed
+over the target, so a reader (a browser loading the map, another script
+loading JSON) sees either the old file or the new one, never half of one.
+"""
+
+import copy
+import json
+import os
+import threading
+from typing import Any, Callable
+
+_cache: dict = {}  # abspath -> ((mtime_ns, size), parsed)
+_lock = threading.Lock()
+_hits = 0
+_misses = 0
+
+
+def file_signature(path: str):
+    """(mtime_ns, size) of `path`, or None if it doesn't exist — cheap
+    enough to take on every call to tell whether a file has changed."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def load_json(path: str, default: Any = None) -> Any:
+    """Parsed contents of `path`, from cache when the file hasn't changed
+    since it was last read. Returns a copy of `default` ({} if None) when the
+    file doesn't exist."""
+    global _hits, _misses
+    key = os.path.abspath(path)
+    sig = file_signature(key)
+    if sig is None:
+        return copy.deepcopy(default) if default is not None else {}
+
+    with _lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == sig:
+            _hits += 1
+            return cached[1]
+
+    with open(key, encoding="utf-8") as f:
+        data = json.load(f)
+    with _lock:
+        _misses += 1
+        _cache[key] = (sig, data)
+    return data
+
+
+def load_cached(paths: tuple, loader: Callable[[], Any]) -> Any:
+    """loader()'s result, cached until any of `paths` changes (or appears or
+    disappears). For data assembled from more than one file, e.g.
+    click_history.load_metadata() over slot_metadata.json plus its snapshot log."""
+    global _hits, _misses
+    key = tuple(os.path.abspath(p) for p in paths)
+    sig = tuple(file_signature(p) for p in key)
+
+    with _lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == sig:
+            _hits += 1
+            return cached[1]
+
+    data = loader()
+    with _lock:
+        _misses += 1
+        _cache[key] = (sig, data)
+    return data
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters and entry count since the last clear_cache()."""
+    with _lock:
+        return {"hits": _hits, "misses": _misses, "entries": len(_cache)}
+
+
+def clear_cache() -> None:
+    global _hits, _misses
+    with _lock:
+        _cache.clear()
+        _hits = 0
+        _misses = 0
+
+
+def write_atomic(path: str, data) -> None:
+    """Write str (as UTF-8) or bytes to `path` via a temp file in the same
+    directory and os.replace(), so the file is never seen half-written."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def write_if_changed(path: str, data) -> bool:
+    """write_atomic() unless `path` already holds exactly `data` (leaving its
+    mtime alone, so mtime-keyed caches downstream stay valid). Returns True
+    if it wrote."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    sig = file_signature(path)
+    if sig is not None and sig[1] == len(data):
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    write_atomic(path, data)
+    return True
@@ -0,0 +1,119 @@
+"""
+Log Events — typed events parsed from listing_progress.log lines.
+
+daily_agent.py and run_session.py narrate their progress into the shared log
+("Phase 1a — coverage pass...", "Publishing slot '<slot>': <title>",
+"Agent run complete..."). This is the one place those lines are turned back
+into structured events, so the dashboard's live panel (and anything else that
+follows the log) doesn't re-derive the patterns or split slot keys by hand.
+
+Each line is matched once, against patterns compiled at import time, behind
+a plain substring check so the common case (a line that isn't an event)
+costs a couple of `in` tests.
+"""
+
+import re
+from collections import deque
+from typing import Iterable, Iterator, NamedTuple, Optional, Union
+
+from helpers.slot import parse as parse_slot
+
+COMPLETION_MARKERS = ("Agent run complete", "Session window closing")
+RECENT_LEN = 6  # publishes kept by LiveState.recent
+
+_TS_RE = re.compile(r"(\d{2}:\d{2}:\d{2})")
+_PUBLISH_RE = re.compile(r"(\d{2}:\d{2}:\d{2}).*Publishing slot '([^']+)': (.+)$")
+_PHASE_RE = re.compile(r"Phase (\S+)")
+
+
+class PhaseEvent(NamedTuple):
+    ts: Optional[str]
+    phase: str
+
+
+class PublishEvent(NamedTuple):
+    ts: str
+    slot: str
+    title: str
+    city: str
+    equipment_type: str
+
+
+class CompletionEvent(NamedTuple):
+    ts: Optional[str]
+    marker: str
+
+
+LogEvent = Union[PhaseEvent, PublishEvent, CompletionEvent]
+
+
+def _ts(line: str) -> Optional[str]:
+    m = _TS_RE.search(line)
+    return m.group(1) if m else None
+
+
+def parse_line(line: str) -> Optional[LogEvent]:
+    """The event a single log line records, or None for ordinary lines."""
+    if "Publishing slot" in line:
+        m = _PUBLISH_RE.search(line.strip())
+        if m:
+            ts, slot, title = m.groups()
+            parsed = parse_slot(slot)
+            if parsed:
+                city, equip = parsed.city, parsed.equipment_type
+            else:
+                parts = slot.split("_")
+                city, equip = (parts[1] if len(parts) > 1 else ""), parts[0]
+            return PublishEvent(ts, slot, title, city, equip)
+    for marker in COMPLETION_MARKERS:
+        if marker in line:
+            return CompletionEvent(_ts(line), marker)
+    if "Phase " in line:
+        m = _PHASE_RE.search(line)
+        if m:
+            return PhaseEvent(_ts(line), m.group(1).rstrip("."))
+    return None
+
+
+def parse_lines(lines: Iterable[str]) -> Iterator[LogEvent]:
+    """Events from an iterable of lines, in order, skipping ordinary lines."""
+    for line in lines:
+        event = parse_line(line)
+        if event is not None:
+            yield event
+
+
+class LiveState:
+    """What the agent is doing, folded from a sequence of events: the slot it
+    last started publishing, the most recent publishes, and the current phase
+    ("done" once a run or session has finished)."""
+
+    def __init__(self, recent_len: int = RECENT_LEN):
+        self.publishing: Optional[PublishEvent] = None
+        self.recent = deque(maxlen=recent_len)
+        self.phase: Optional[str] = None
+
+    def apply(self, event: Optional[LogEvent]) -> None:
+        if isinstance(event, PublishEvent):
+            self.publishing = event
+            self.recent.append(event)
+        elif isinstance(event, PhaseEvent):
+            self.phase = event.phase
+        elif isinstance(event, CompletionEvent):
+            self.phase = "done"
+
+    def feed(self, lines: Iterable[str]) -> "LiveState":
+        for event in parse_lines(lines):
+            self.apply(event)
+        return self
+
+
+def publish_dict(event: PublishEvent) -> dict:
+    """The JSON shape the dashboard's live panel expects for a publish."""
+    return {
+        "slot":  event.slot,
+        "title": event.title,
+        "city":  event.city,
+        "equip": event.equipment_type,
+        "ts":    event.ts,
+    }
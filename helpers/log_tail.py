@@ -0,0 +1,113 @@
+"""
+Log Tail — read the end of listing_progress.log without reading the rest.
+
+The log is append-only and grows without bound across months of scheduled
+runs, but the dashboard only ever needs its last few lines. tail_lines()
+seeks backwards from the end of the file a block at a time; LogTail keeps
+the last N lines in memory plus the byte offset it has read up to, so each
+later refresh() only reads what was appended since.
+"""
+
+import os
+import threading
+from collections import deque
+from typing import Optional
+
+BLOCK_SIZE = 8192
+
+
+def _decode(raw: bytes) -> str:
+    return raw.decode("utf-8", errors="replace").rstrip("\r")
+
+
+def _read_back(f, end: int, n: int, block_size: int) -> "tuple[bytes, int]":
+    """Bytes ending at `end` holding at least n newline-terminated lines (or
+    the whole file, if shorter), and the offset they start at."""
+    pos, buf = end, b""
+    while pos > 0 and buf.count(b"\n") <= n:
+        step = min(block_size, pos)
+        pos -= step
+        f.seek(pos)
+        buf = f.read(step) + buf
+    return buf, pos
+
+
+def tail_lines(path: str, n: int, block_size: int = BLOCK_SIZE) -> list:
+    """Last n lines of a text file (newlines stripped), reading only as many
+    blocks from the end as it takes. Missing file -> []."""
+    try:
+        with open(path, "rb") as f:
+            end = f.seek(0, os.SEEK_END)
+            buf, start = _read_back(f, end, n, block_size)
+    except OSError:
+        return []
+    parts = buf.split(b"\n")
+    if parts and parts[-1] == b"":
+        parts.pop()
+    if start > 0:
+        parts = parts[1:]  # first piece is the tail end of an earlier line
+    return [_decode(p) for p in parts[-n:]]
+
+
+class LogTail:
+    """The last `maxlen` complete lines of a growing log. refresh() reads only
+    bytes appended since the previous call; a truncated or replaced file is
+    re-seeded from its end. A trailing line still being written (no newline
+    yet) is held back until it's complete. Safe to share between threads."""
+
+    def __init__(self, path: str, maxlen: int = 150, block_size: int = BLOCK_SIZE):
+        self.path = path
+        self.maxlen = maxlen
+        self.block_size = block_size
+        self._lines = deque(maxlen=maxlen)
+        self._offset = None  # end of the last complete line read
+        self._ino = None
+        self._lock = threading.Lock()
+
+    def _seed(self, f, size: int) -> list:
+        buf, start = _read_back(f, size, self.maxlen, self.block_size)
+        complete = buf[: buf.rfind(b"\n") + 1]
+        parts = complete.split(b"\n")[:-1]
+        if start > 0:
+            parts = parts[1:]
+        self._offset = start + len(complete)
+        self._lines.clear()
+        lines = [_decode(p) for p in parts[-self.maxlen:]]
+        self._lines.extend(lines)
+        return lines
+
+    def refresh(self) -> list:
+        """Pull in newly appended lines; returns just the new ones."""
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+                with open(self.path, "rb") as f:
+                    if self._offset is None or st.st_ino != self._ino or st.st_size < self._offset:
+                        self._ino = st.st_ino
+                        return self._seed(f, st.st_size)
+                    if st.st_size == self._offset:
+                        return []
+                    f.seek(self._offset)
+                    chunk = f.read(st.st_size - self._offset)
+            except OSError:
+                return []
+            complete = chunk[: chunk.rfind(b"\n") + 1]
+            self._offset += len(complete)
+            lines = [_decode(p) for p in complete.split(b"\n")[:-1]]
+            self._lines.extend(lines)
+            return lines
+
+    def lines(self) -> list:
+        """The last `maxlen` lines, refreshed first."""
+        self.refresh()
+        with self._lock:
+            return list(self._lines)
+
+    def last_line(self) -> Optional[str]:
+        """Most recent non-blank line, refreshed first."""
+        self.refresh()
+        with self._lock:
+            for line in reversed(self._lines):
+                if line.strip():
+                    return line.rstrip()
+        return None
@@ -0,0 +1,471 @@
+"""
+Ops Store — one SQLite database (data/ops.db) behind the operational ledgers
+that used to be separate JSON files, each loaded and rewritten whole by its
+own _load/_save pair:
+
+  runs        run_outcome.record_run()       (was data/run_history.json),
+              with run_metrics (numeric metrics as time series) and
+              run_rollups (run_outcome's running per-script rollups)
+  scans       scan_health.record_scan()      (was data/scan_health.json)
+  scan_stats  scan_health's running per-source statistics
+  fuel_prices fuel_history.append()          (was data/fuel_price_history.jsonl)
+  dupes       daily_agent's duplicate-removed slots (was data/duplicate_history.json)
+
+The database runs in WAL mode, so readers (map_server's request threads and
+event broadcaster) never block a writer (stats_tracker, daily_agent) and the
+other way round; a write is one indexed INSERT/DELETE instead of rewriting a
+file that grows with its history. Competing writers wait up to BUSY_TIMEOUT
+rather than failing.
+
+Every write also bumps that table's row in `versions`, so a reader can tell
+cheaply whether anything changed (map_listings' input digest, the cached
+dupes() dict) without re-querying the table.
+
+The first connection to a new database imports whatever JSON ledgers sit
+next to it, once (recorded in `meta`); migrate_ops_store.py runs the same
+import by hand. The JSON files are left in place, untouched. Slot metadata
+stays where it is: its click snapshots already go to an append-only log
+(helpers/click_history.py).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Optional
+
+DB_FILE = "data/ops.db"
+BUSY_TIMEOUT = 10  # seconds a writer waits for another writer's lock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id         INTEGER PRIMARY KEY,
+    script     TEXT NOT NULL,
+    ts         TEXT NOT NULL,
+    status     TEXT NOT NULL,
+    metrics    TEXT NOT NULL DEFAULT '{}',
+    note       TEXT,
+    duration_s REAL,
+    phases     TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_script ON runs (script, id);
+
+CREATE TABLE IF NOT EXISTS run_metrics (
+    run_id INTEGER NOT NULL,
+    script TEXT NOT NULL,
+    name   TEXT NOT NULL,
+    value  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS run_metrics_series ON run_metrics (script, name, run_id);
+
+CREATE TABLE IF NOT EXISTS run_rollups (
+    script TEXT PRIMARY KEY,
+    stats  TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS scans (
+    id      INTEGER PRIMARY KEY,
+    source  TEXT NOT NULL,
+    ts      TEXT,
+    count   INTEGER NOT NULL,
+    z       REAL,
+    flagged INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS scans_source ON scans (source, id);
+
+CREATE TABLE IF NOT EXISTS scan_stats (
+    source TEXT PRIMARY KEY,
+    stats  TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS fuel_prices (
+    id             INTEGER PRIMARY KEY,
+    ts             TEXT NOT NULL,
+    price          REAL NOT NULL,
+    basis          REAL,
+    source         TEXT,
+    applied        INTEGER NOT NULL DEFAULT 0,
+    cities_updated INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS fuel_prices_ts ON fuel_prices (ts);
+
+CREATE TABLE IF NOT EXISTS dupes (
+    slot       TEXT PRIMARY KEY,
+    flagged_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS versions (name TEXT PRIMARY KEY, n INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+JSON_IMPORT_KEY = "json_import"
+
+# Columns added after a table was first created: (table, column, definition).
+ADDED_COLUMNS = [
+    ("scans", "z", "REAL"),
+    ("scans", "flagged", "INTEGER NOT NULL DEFAULT 0"),
+    ("runs", "duration_s", "REAL"),
+    ("runs", "phases", "TEXT"),
+]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class OpsStore:
+    """The database at `path`, with one connection per thread (sqlite3
+    connections can't be shared across threads)."""
+
+    def __init__(self, path: str = DB_FILE, import_json: bool = True):
+        self.path = path
+        self.import_json = import_json
+        self._local = threading.local()
+        self._dupes_cache = (None, {})  # (dupes version, dict)
+        self._lock = threading.Lock()
+        self._ready = False  # schema set up (and JSON ledgers imported) by the first connection
+
+    # ── connection / transactions ─────────────────────────────────────────────
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints; a crash loses at most the last commits
+            self._local.conn = conn
+            # Schema and JSON import once per store, not per thread: map_server
+            # opens a connection on every request thread.
+            with self._lock:
+                if not self._ready:
+                    self._setup(conn)
+                    self._ready = True
+        return conn
+
+    def _setup(self, conn: sqlite3.Connection) -> None:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        for table, column, definition in ADDED_COLUMNS:
+            if column not in {r["name"] for r in conn.execute(f"PRAGMA table_info({table})")}:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        if self.import_json:
+            import_json_ledgers(self)
+
+    @contextmanager
+    def transaction(self, *tables: str):
+        """A write transaction on this thread's connection, yielded for the
+        methods that take `tx`. Takes the write lock up front (so a
+        read-modify-write inside can't race another process) and bumps
+        `tables`' versions on commit."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            for t in tables:
+                self._bump(conn, t)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _write(self, tables: tuple, sql: str, params=(), tx: sqlite3.Connection = None) -> sqlite3.Cursor:
+        """Run one write statement and bump `tables`' versions, atomically —
+        or, inside transaction(), just run it on `tx`."""
+        if tx is not None:
+            return tx.execute(sql, params)
+        with self.transaction(*tables) as conn:
+            return conn.execute(sql, params)
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection, table: str) -> None:
+        conn.execute("INSERT INTO versions (name, n) VALUES (?, 1) "
+                     "ON CONFLICT(name) DO UPDATE SET n = n + 1", (table,))
+
+    def version(self, table: str) -> int:
+        """How many writes `table` has seen; changes whenever its contents do."""
+        row = self._conn().execute("SELECT n FROM versions WHERE name = ?", (table,)).fetchone()
+        return row["n"] if row else 0
+
+    def meta(self, key: str):
+        """A value stored in `meta` (e.g. JSON_IMPORT_KEY's import summary), or None."""
+        row = self._conn().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row["value"]) if row else None
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ── runs ─────────────────────────────────────────────────────────────────
+    def add_run(self, script: str, status: str, metrics: dict = None, note: str = None,
+                ts: str = None, duration_s: float = None, phases: dict = None,
+                tx: sqlite3.Connection = None) -> int:
+        cur = self._write(("runs",),
+                          "INSERT INTO runs (script, ts, status, metrics, note, duration_s, phases) "
+                          "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                          (script, ts or _now(), status, json.dumps(metrics or {}), note,
+                           duration_s, json.dumps(phases) if phases else None), tx)
+        return cur.lastrowid
+
+    def add_run_metrics(self, run_id: int, script: str, values: dict, tx: sqlite3.Connection = None) -> None:
+        """One time-series point per {name: number} for the run `run_id`."""
+        rows = [(run_id, script, name, float(v)) for name, v in values.items()]
+        if tx is not None:
+            tx.executemany("INSERT INTO run_metrics (run_id, script, name, value) VALUES (?, ?, ?, ?)", rows)
+        else:
+            with self.transaction("runs") as conn:
+                conn.executemany("INSERT INTO run_metrics (run_id, script, name, value) VALUES (?, ?, ?, ?)", rows)
+
+    def metric_series(self, script: str, name: str, limit: int = 200) -> list:
+        """The last `limit` values of one metric for `script`, oldest first,
+        as [timestamp, value] pairs."""
+        rows = self._conn().execute(
+            "SELECT r.ts, m.value FROM run_metrics m JOIN runs r ON r.id = m.run_id "
+            "WHERE m.script = ? AND m.name = ? ORDER BY m.run_id DESC LIMIT ?", (script, name, limit)).fetchall()
+        return [[r[0], r[1]] for r in reversed(rows)]
+
+    def metric_names(self, script: str) -> list:
+        return [r[0] for r in self._conn().execute(
+            "SELECT DISTINCT name FROM run_metrics WHERE script = ? ORDER BY name", (script,))]
+
+    def run_rollup(self, script: str = None, tx: sqlite3.Connection = None):
+        """run_outcome's rollup for `script` (None if it has none yet), or
+        {script: rollup} for every script."""
+        conn = tx or self._conn()
+        if script is None:
+            return {r["script"]: json.loads(r["stats"]) for r in conn.execute("SELECT script, stats FROM run_rollups")}
+        row = conn.execute("SELECT stats FROM run_rollups WHERE script = ?", (script,)).fetchone()
+        return json.loads(row["stats"]) if row else None
+
+    def run_status_counts(self, script: str, tx: sqlite3.Connection = None) -> dict:
+        """{status: runs} over every recorded run of `script`."""
+        return {r[0]: r[1] for r in (tx or self._conn()).execute(
+            "SELECT status, COUNT(*) FROM runs WHERE script = ? GROUP BY status", (script,))}
+
+    def put_run_rollup(self, script: str, stats: dict, tx: sqlite3.Connection = None) -> None:
+        self._write(("runs",), "INSERT OR REPLACE INTO run_rollups (script, stats) VALUES (?, ?)",
+                    (script, json.dumps(stats)), tx)
+
+    def runs(self, script: str = None, limit: int = None, after_id: int = 0,
+             tx: sqlite3.Connection = None) -> list:
+        """Run entries (oldest first) as dicts with id, script, timestamp,
+        status, metrics, note, duration_s, phases. `limit` keeps the newest
+        that many (per call, not per script); `after_id` only returns entries
+        newer than that id."""
+        where, params = ["id > ?"], [after_id]
+        if script:
+            where.append("script = ?")
+            params.append(script)
+        sql = f"SELECT * FROM runs WHERE {' AND '.join(where)} ORDER BY id DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        rows = (tx or self._conn()).execute(sql, params).fetchall()
+        return [{
+            "id":         r["id"],
+            "script":     r["script"],
+            "timestamp":  r["ts"],
+            "status":     r["status"],
+            "metrics":    json.loads(r["metrics"] or "{}"),
+            "note":       r["note"],
+            "duration_s": r["duration_s"],
+            "phases":     json.loads(r["phases"]) if r["phases"] else {},
+        } for r in reversed(rows)]
+
+    def last_run_id(self) -> int:
+        return self._conn().execute("SELECT COALESCE(MAX(id), 0) FROM runs").fetchone()[0]
+
+    def scripts(self) -> list:
+        return [r[0] for r in self._conn().execute("SELECT DISTINCT script FROM runs ORDER BY script")]
+
+    # ── scans ────────────────────────────────────────────────────────────────
+    def add_scan(self, source: str, count: int, ts: str = None, z: float = None, flagged: bool = False,
+                 tx: sqlite3.Connection = None) -> None:
+        self._write(("scans",), "INSERT INTO scans (source, ts, count, z, flagged) VALUES (?, ?, ?, ?, ?)",
+                    (source, ts or _now(), int(count), z, int(bool(flagged))), tx)
+
+    def recent_scans(self, source: str, limit: int, tx: sqlite3.Connection = None) -> list:
+        """The last `limit` counts for `source`, oldest first."""
+        rows = (tx or self._conn()).execute("SELECT count FROM scans WHERE source = ? ORDER BY id DESC LIMIT ?",
+                                            (source, limit)).fetchall()
+        return [r[0] for r in reversed(rows)]
+
+    def scans(self, source: str = None, limit: int = None) -> list:
+        """Scan rows (oldest first) as {"source", "ts", "count", "z",
+        "flagged"}; `limit` keeps the newest that many per source."""
+        sources = [source] if source else self.scan_sources()
+        out = []
+        for s in sources:
+            sql = "SELECT source, ts, count, z, flagged FROM scans WHERE source = ? ORDER BY id DESC"
+            if limit:
+                sql += f" LIMIT {int(limit)}"
+            out.extend(dict(r, flagged=bool(r["flagged"])) for r in reversed(self._conn().execute(sql, (s,)).fetchall()))
+        return out
+
+    def scan_sources(self) -> list:
+        return [r[0] for r in self._conn().execute("SELECT DISTINCT source FROM scans ORDER BY source")]
+
+    def scan_stats(self, source: str = None, tx: sqlite3.Connection = None):
+        """The running statistics scan_health keeps for `source` (a dict, or
+        None before its first scan) — or {source: stats} for every source."""
+        conn = tx or self._conn()
+        if source is None:
+            return {r["source"]: json.loads(r["stats"]) for r in conn.execute("SELECT source, stats FROM scan_stats")}
+        row = conn.execute("SELECT stats FROM scan_stats WHERE source = ?", (source,)).fetchone()
+        return json.loads(row["stats"]) if row else None
+
+    def put_scan_stats(self, source: str, stats: dict, tx: sqlite3.Connection = None) -> None:
+        self._write(("scans",), "INSERT OR REPLACE INTO scan_stats (source, stats) VALUES (?, ?)",
+                    (source, json.dumps(stats)), tx)
+
+    # ── fuel prices ──────────────────────────────────────────────────────────
+    def add_fuel_price(self, price: float, basis: float = None, source: str = None,
+                       applied: bool = False, cities_updated: int = 0, ts: str = None) -> None:
+        self._write(("fuel_prices",),
+                    "INSERT INTO fuel_prices (ts, price, basis, source, applied, cities_updated) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (ts or _now(), float(price), basis, source, int(bool(applied)), int(cities_updated)))
+
+    def fuel_prices(self) -> list:
+        """Every recorded price, in time order, in fuel_history's record shape."""
+        rows = self._conn().execute(
+            "SELECT ts, price, basis, source, applied, cities_updated FROM fuel_prices ORDER BY ts, id").fetchall()
+        return [dict(r, applied=bool(r["applied"])) for r in rows]
+
+    # ── duplicate-removed slots ──────────────────────────────────────────────
+    def dupes(self) -> dict:
+        """{slot: flagged_at} for every slot currently marked duplicate-removed.
+        Cached until the dupes table changes; treat the dict as read-only."""
+        version = self.version("dupes")
+        with self._lock:
+            if self._dupes_cache[0] == version:
+                return self._dupes_cache[1]
+        rows = self._conn().execute("SELECT slot, flagged_at FROM dupes ORDER BY slot").fetchall()
+        result = {r["slot"]: r["flagged_at"] for r in rows}
+        with self._lock:
+            self._dupes_cache = (version, result)
+        return result
+
+    def flag_dupe(self, slot: str, ts: str = None) -> None:
+        self._write(("dupes",), "INSERT OR REPLACE INTO dupes (slot, flagged_at) VALUES (?, ?)",
+                    (slot, ts or _now()))
+
+    def clear_dupe(self, slot: str) -> None:
+        self._write(("dupes",), "DELETE FROM dupes WHERE slot = ?", (slot,))
+
+    def clear_dupes(self) -> int:
+        """Unmark every slot. Returns how many were marked."""
+        return self._write(("dupes",), "DELETE FROM dupes").rowcount
+
+
+# ── JSON import ───────────────────────────────────────────────────────────────
+def _read_json(path: str):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _read_jsonl(path: str) -> list:
+    out = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    out.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return out
+
+
+def import_json_ledgers(store: OpsStore, data_dir: str = None, force: bool = False) -> Optional[dict]:
+    """Copy the JSON ledgers in `data_dir` (default: the database's own
+    directory) into the store, in one transaction. Runs once per database
+    unless `force`; returns row counts per table, or None if it had already
+    run."""
+    data_dir = data_dir or os.path.dirname(store.path) or "."
+    conn = store._conn()
+    done = "SELECT 1 FROM meta WHERE key = ?"
+    if not force and conn.execute(done, (JSON_IMPORT_KEY,)).fetchone():
+        return None  # the usual case: a plain read, no write lock
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if not force and conn.execute(done, (JSON_IMPORT_KEY,)).fetchone():  # another process got there first
+            conn.execute("ROLLBACK")
+            return None
+        counts = {"runs": 0, "scans": 0, "fuel_prices": 0, "dupes": 0}
+
+        for script, runs in (_read_json(os.path.join(data_dir, "run_history.json")) or {}).items():
+            for r in runs:
+                conn.execute("INSERT INTO runs (script, ts, status, metrics, note) VALUES (?, ?, ?, ?, ?)",
+                             (script, r.get("timestamp") or "", r.get("status") or "", json.dumps(r.get("metrics") or {}),
+                              r.get("note")))
+                counts["runs"] += 1
+
+        for source, history in (_read_json(os.path.join(data_dir, "scan_health.json")) or {}).items():
+            for n in history:
+                conn.execute("INSERT INTO scans (source, ts, count) VALUES (?, NULL, ?)", (source, int(n)))
+                counts["scans"] += 1
+
+        fuel = []
+        for e in _read_json(os.path.join(data_dir, "fuel_price_history.json")) or []:  # pre-JSONL array
+            if "timestamp" in e and "new_price" in e:
+                fuel.append({"ts": e["timestamp"], "price": e["new_price"], "basis": e.get("old_price"),
+                             "source": "legacy", "applied": True, "cities_updated": e.get("cities_updated", 0)})
+        fuel += _read_jsonl(os.path.join(data_dir, "fuel_price_history.jsonl"))
+        for r in fuel:
+            if r.get("ts") and isinstance(r.get("price"), (int, float)):
+                conn.execute("INSERT INTO fuel_prices (ts, price, basis, source, applied, cities_updated) "
+                             "VALUES (?, ?, ?, ?, ?, ?)",
+                             (r["ts"], float(r["price"]), r.get("basis"), r.get("source"),
+                              int(bool(r.get("applied"))), int(r.get("cities_updated") or 0)))
+                counts["fuel_prices"] += 1
+
+        for slot, ts in (_read_json(os.path.join(data_dir, "duplicate_history.json")) or {}).items():
+            conn.execute("INSERT OR REPLACE INTO dupes (slot, flagged_at) VALUES (?, ?)", (slot, ts or _now()))
+            counts["dupes"] += 1
+
+        for table, n in counts.items():
+            if n:
+                store._bump(conn, table)
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                     (JSON_IMPORT_KEY, json.dumps({"at": _now(), "counts": counts})))
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return counts
+
+
+_default: Optional[OpsStore] = None
+_stores: dict = {}  # abspath -> OpsStore
+_store_lock = threading.Lock()
+
+
+def get_store(path: str = None) -> OpsStore:
+    """The process-wide store for the database at `path` — by default DB_FILE,
+    relative to the working directory like the rest of data/ — created on
+    first use, so its connections and caches are shared."""
+    global _default
+    with _store_lock:
+        if path is None and _default is not None:
+            return _default
+        key = os.path.abspath(path or DB_FILE)
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = OpsStore(path or DB_FILE)
+        if path is None:
+            _default = store
+        return store
+
+
+def set_store(store: OpsStore) -> None:
+    """Replace the default store (tests, or a database elsewhere)."""
+    global _default
+    with _store_lock:
+        _default = store
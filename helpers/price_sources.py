@@ -0,0 +1,262 @@
+"""
+Price Sources — where fuel_price_agent.py gets the current diesel price.
+
+A source is anything with a `name` and a fetch() returning $/gal or None.
+PriceChain tries its sources in order and returns the first answer, along
+with which source gave it:
+
+  eia_api   EIA v2 API, Gulf Coast (PADD 3) retail diesel; needs EIA_API_KEY
+  eia_html  EIA's public gasdiesel page, median of the diesel-range cells
+  fixture   a local file: {"price": 3.61}, a bare number, a saved API
+            response or a saved copy of the HTML page — no network at all
+
+The EIA sources go through HttpCache, which keeps each response under
+data/http_cache/. EIA publishes weekly (Monday afternoon Eastern), so a
+cached response is served without touching the network until the next
+expected publication; after that the request carries If-None-Match /
+If-Modified-Since, and a 304 or an identical body means this week's number
+is late, so it's re-checked every RECHECK_TTL instead of a week later.
+
+default_chain() picks sources from FUEL_PRICE_SOURCES (comma-separated
+names, default "eia_api,eia_html"); FUEL_PRICE_FIXTURE=path selects the
+fixture source instead.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+import requests
+
+from helpers.json_store import write_atomic
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = "data/http_cache"
+PUBLISH_WEEKDAY = 0     # Monday
+PUBLISH_HOUR_UTC = 22   # ~5 p.m. Eastern, after the weekly release
+RECHECK_TTL = 6 * 3600  # seconds between conditional re-checks once a release is due
+PRICE_RANGE = (2.50, 7.00)
+
+EIA_API_URL = (
+    "https://api.eia.gov/v2/petroleum/pri/gnd/data/"
+    "?frequency=weekly&data[0]=value"
+    "&facets[product][]=DPF&facets[duoarea][]=R30"
+    "&sort[0][column]=period&sort[0][direction]=desc&length=1"
+    "&api_key={key}"
+)
+EIA_HTML_URL = "https://www.eia.gov/petroleum/gasdiesel/"
+
+
+def next_publication(after: float) -> float:
+    """Epoch seconds of the first expected weekly release after `after`."""
+    dt = datetime.fromtimestamp(after, timezone.utc)
+    release = dt.replace(hour=PUBLISH_HOUR_UTC, minute=0, second=0, microsecond=0)
+    release += timedelta(days=(PUBLISH_WEEKDAY - dt.weekday()) % 7)
+    if release.timestamp() <= after:
+        release += timedelta(days=7)
+    return release.timestamp()
+
+
+# ── HTTP cache ────────────────────────────────────────────────────────────────
+class HttpCache:
+    """On-disk GET cache with conditional revalidation. One JSON file per URL:
+    body, etag, last_modified, fetched_at, expires_at. A body is only kept
+    once the caller's parser got a price out of it, so an error payload or a
+    reworked page is refetched next run instead of served for a week."""
+
+    def __init__(self, root: str = CACHE_DIR, get: Callable = requests.get, clock: Callable = time.time):
+        self.root = root
+        self._get = get
+        self._clock = clock
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.root, hashlib.sha1(url.encode()).hexdigest()[:16] + ".json")
+
+    def _load(self, url: str) -> Optional[dict]:
+        try:
+            with open(self._path(url), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, url: str, entry: dict) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        write_atomic(self._path(url), json.dumps(entry, indent=2))
+
+    def _drop(self, url: str) -> None:
+        try:
+            os.remove(self._path(url))
+        except OSError:
+            pass
+
+    def get(self, url: str, parse: Callable, timeout: float = 15, headers: dict = None) -> tuple:
+        """(parse(body), how) where how is "cached", "revalidated" or "fetched".
+        parse returning None or raising counts as a bad body: the entry is
+        dropped (not saved) and the error, or None, is passed on. Raises
+        whatever the HTTP call raises when there's nothing fresh."""
+        now = self._clock()
+        entry = self._load(url)
+        if entry and now < entry["expires_at"]:
+            try:
+                value = parse(entry["body"])
+            except Exception:
+                value = None
+            if value is not None:
+                return value, "cached"
+            entry = None  # kept by an older version without the parse check: refetch it outright
+
+        req_headers = dict(headers or {})
+        if entry:
+            if entry.get("etag"):
+                req_headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                req_headers["If-Modified-Since"] = entry["last_modified"]
+        resp = self._get(url, timeout=timeout, headers=req_headers)
+        if entry and resp.status_code == 304:
+            body, how, changed = entry["body"], "revalidated", False
+        else:
+            resp.raise_for_status()
+            body, how = resp.text, "fetched"
+            changed = not entry or body != entry["body"]
+        try:
+            value = parse(body)
+        except Exception:
+            self._drop(url)
+            raise
+        if value is None:
+            self._drop(url)
+            return None, how
+        self._save(url, {
+            "url":           re.sub(r"api_key=[^&]*", "api_key=***", url),
+            "etag":          resp.headers.get("ETag") or (entry or {}).get("etag"),
+            "last_modified": resp.headers.get("Last-Modified") or (entry or {}).get("last_modified"),
+            "fetched_at":    now,
+            # Unchanged after a release was due: it's late, look again soon.
+            "expires_at":    next_publication(now) if changed else now + RECHECK_TTL,
+            "body":          body,
+        })
+        return value, how
+
+
+# ── Parsing ───────────────────────────────────────────────────────────────────
+def parse_api(text: str) -> float:
+    return float(json.loads(text)["response"]["data"][0]["value"])
+
+
+def parse_html(text: str) -> Optional[float]:
+    """Median of the diesel-range price cells on the gasdiesel page (table
+    cells hold bare numbers like "3.789"); the median keeps state min/max
+    rows from skewing it."""
+    prices = sorted(
+        v for v in (float(m.group(1)) for m in re.finditer(r'>\s*(\d\.\d{2,3})\s*<', text))
+        if PRICE_RANGE[0] < v < PRICE_RANGE[1]
+    )
+    return prices[len(prices) // 2] if prices else None
+
+
+# ── Sources ───────────────────────────────────────────────────────────────────
+class EIAApiSource:
+    name = "eia_api"
+
+    def __init__(self, api_key: str = None, cache: HttpCache = None):
+        self.api_key = api_key if api_key is not None else os.environ.get("EIA_API_KEY", "")
+        self.cache = cache or HttpCache()
+
+    def fetch(self) -> Optional[float]:
+        if not self.api_key:
+            return None
+        try:
+            price, how = self.cache.get(EIA_API_URL.format(key=self.api_key), parse_api, timeout=10)
+        except Exception as e:
+            logger.warning(f"EIA API fetch failed: {e}")
+            return None
+        logger.info(f"EIA API ({how}) — Gulf Coast diesel: ${price:.3f}/gal")
+        return price
+
+
+class EIAHtmlSource:
+    name = "eia_html"
+
+    def __init__(self, cache: HttpCache = None):
+        self.cache = cache or HttpCache()
+
+    def fetch(self) -> Optional[float]:
+        try:
+            price, how = self.cache.get(EIA_HTML_URL, parse_html, timeout=15, headers={"User-Agent": "Mozilla/5.0"})
+        except Exception as e:
+            logger.warning(f"EIA HTML scrape failed: {e}")
+            return None
+        if price is not None:
+            logger.info(f"EIA HTML scrape ({how}) — median ${price:.3f}/gal")
+        return price
+
+
+class FixtureSource:
+    """A price from a local file, for running the agent offline. Accepts
+    {"price": x} / {"diesel_price": x}, a bare number, a saved EIA API
+    response, or a saved gasdiesel page (*.html)."""
+
+    name = "fixture"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def fetch(self) -> Optional[float]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                text = f.read()
+        except OSError as e:
+            logger.warning(f"Price fixture unreadable: {e}")
+            return None
+        if self.path.lower().endswith((".html", ".htm")):
+            price = parse_html(text)
+        else:
+            try:
+                data = json.loads(text)
+                if isinstance(data, dict) and "response" in data:
+                    price = parse_api(text)
+                elif isinstance(data, dict):
+                    price = float(data.get("price", data.get("diesel_price")))
+                else:
+                    price = float(data)
+            except (KeyError, IndexError, TypeError, ValueError):
+                price = None
+        logger.info(f"Price fixture {self.path}: {price if price is not None else 'no price found'}")
+        return price
+
+
+SOURCES = {"eia_api": EIAApiSource, "eia_html": EIAHtmlSource}
+
+
+class PriceChain:
+    def __init__(self, sources: list):
+        self.sources = sources
+
+    def fetch(self) -> tuple:
+        """(price, source name) from the first source that answers, or
+        (None, None)."""
+        for source in self.sources:
+            price = source.fetch()
+            if price is not None:
+                return price, source.name
+        return None, None
+
+
+def default_chain(fixture: str = None) -> PriceChain:
+    """Chain from a fixture path (argument or FUEL_PRICE_FIXTURE), else from
+    FUEL_PRICE_SOURCES. The EIA sources share one HttpCache."""
+    fixture = fixture or os.environ.get("FUEL_PRICE_FIXTURE")
+    if fixture:
+        return PriceChain([FixtureSource(fixture)])
+    names = [n.strip() for n in os.environ.get("FUEL_PRICE_SOURCES", "eia_api,eia_html").split(",") if n.strip()]
+    unknown = [n for n in names if n not in SOURCES]
+    if unknown:
+        raise ValueError(f"Unknown FUEL_PRICE_SOURCES {unknown}; expected some of {sorted(SOURCES)}")
+    cache = HttpCache()
+    return PriceChain([SOURCES[n](cache=cache) for n in names])
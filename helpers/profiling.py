@@ -0,0 +1,189 @@
+"""
+Profiling — opt-in per-run profiles for the scheduled entry points.
+
+Run a script with --profile (or PROFILE_RUNS=1 in the environment) and
+install_crash_logger() starts a session: cProfile runs for the whole
+process, and span("name") blocks record a timeline of where the wall time
+went (load JSON, merge metadata, save, regenerate map, ...). When the
+process exits the session is written to data/profiles/<script>/:
+
+  <stamp>.json   spans (start/duration/depth), run_outcome's phase times and
+                 the TOP_N functions by cumulative time
+  <stamp>.prof   the raw cProfile stats (python -m pstats, snakeviz, ...)
+
+keeping the newest KEEP runs per script, so runs can be compared:
+
+    python -m helpers.profiling stats_tracker      # span totals, last 5 runs
+
+With profiling off, span() hands back one shared no-op context manager, so
+instrumented code pays a function call and nothing more.
+"""
+
+import argparse
+import atexit
+import cProfile
+import glob
+import io
+import json
+import os
+import pstats
+import sys
+import time
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from typing import Optional
+
+PROFILE_DIR = "data/profiles"  # next to the ops store / the old data/run_history.json
+KEEP = 30    # profiles kept per script
+TOP_N = 40   # functions listed in each profile's JSON
+
+_NULL = nullcontext()
+_session = None
+
+
+class _Session:
+    def __init__(self, script: str, use_cprofile: bool):
+        self.script = script
+        self.started_at = datetime.now(timezone.utc)
+        self.t0 = time.perf_counter()
+        self.spans: list = []
+        self.depth = 0
+        self.extra: dict = {}
+        self.profiler = cProfile.Profile() if use_cprofile else None
+        if self.profiler:
+            self.profiler.enable()
+
+
+class _Span:
+    __slots__ = ("name", "start", "depth")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        s = _session
+        self.depth = s.depth
+        s.depth += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        s = _session
+        if s is not None:
+            s.depth -= 1
+            s.spans.append({"name": self.name, "start_s": round(self.start - s.t0, 4),
+                            "duration_s": round(end - self.start, 4), "depth": self.depth})
+        return False
+
+
+def requested(argv: list = None) -> bool:
+    """True when this process was asked to profile itself."""
+    return "--profile" in (sys.argv if argv is None else argv) or os.environ.get("PROFILE_RUNS") == "1"
+
+
+def enabled() -> bool:
+    return _session is not None
+
+
+def start(script: str, use_cprofile: bool = True) -> None:
+    """Begin a session for `script` (no-op if one is running); it's written
+    out when the process exits, or earlier by finish()."""
+    global _session
+    if _session is None:
+        _session = _Session(script, use_cprofile)
+        atexit.register(finish)
+
+
+def span(name: str):
+    """Context manager timing one named stage; a shared no-op when off."""
+    return _NULL if _session is None else _Span(name)
+
+
+def annotate(**values) -> None:
+    """Attach extra values (e.g. run_outcome's phase times) to the profile."""
+    if _session is not None:
+        _session.extra.update(values)
+
+
+def _top(profiler: cProfile.Profile) -> list:
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+        rows.append({"function": f"{os.path.basename(filename)}:{line}({func})",
+                     "ncalls": nc, "tottime_s": round(tt, 4), "cumtime_s": round(ct, 4)})
+    rows.sort(key=lambda r: r["cumtime_s"], reverse=True)
+    return rows[:TOP_N]
+
+
+def finish(profile_dir: str = PROFILE_DIR) -> Optional[str]:
+    """End the session and write it out. Returns the JSON path (None if no
+    session was running)."""
+    global _session
+    s, _session = _session, None
+    if s is None:
+        return None
+    if s.profiler:
+        s.profiler.disable()
+    out_dir = os.path.join(profile_dir, s.script)
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = s.started_at.strftime("%Y%m%dT%H%M%S") + f"-{os.getpid()}"
+    base = os.path.join(out_dir, stamp)
+    report = {
+        "script":     s.script,
+        "started_at": s.started_at.isoformat(),
+        "duration_s": round(time.perf_counter() - s.t0, 3),
+        "argv":       sys.argv[1:],
+        **s.extra,
+        "spans":      sorted(s.spans, key=lambda sp: sp["start_s"]),
+        "top":        _top(s.profiler) if s.profiler else [],
+    }
+    if s.profiler:
+        s.profiler.dump_stats(base + ".prof")
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    for old in sorted(glob.glob(os.path.join(out_dir, "*.json")))[:-KEEP]:
+        for path in (old, old[:-5] + ".prof"):
+            if os.path.exists(path):
+                os.remove(path)
+    return base + ".json"
+
+
+def load_profiles(script: str, last: int = 5, profile_dir: str = PROFILE_DIR) -> list:
+    """The newest `last` profiles for `script`, oldest first."""
+    paths = sorted(glob.glob(os.path.join(profile_dir, script, "*.json")))[-last:]
+    out = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            out.append(json.load(f))
+    return out
+
+
+def span_totals(report: dict) -> dict:
+    """{span name: total seconds} for one profile (repeated spans summed)."""
+    totals: dict = {}
+    for sp in report["spans"]:
+        totals[sp["name"]] = totals.get(sp["name"], 0.0) + sp["duration_s"]
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare recent profiles of a script")
+    parser.add_argument("script")
+    parser.add_argument("--last", type=int, default=5)
+    args = parser.parse_args()
+
+    reports = load_profiles(args.script, args.last)
+    if not reports:
+        print(f"No profiles for {args.script} in {PROFILE_DIR}/ (run it with --profile).")
+        return
+    totals = [span_totals(r) for r in reports]
+    names = list(dict.fromkeys(n for t in totals for n in t))
+    print(f"{'span':<28}" + "".join(f"{r['started_at'][5:16]:>13}" for r in reports))
+    for name in names:
+        print(f"{name[:27]:<28}" + "".join(f"{t[name]:>13.3f}" if name in t else f"{'—':>13}" for t in totals))
+    print(f"{'total (wall)':<28}" + "".join(f"{r['duration_s']:>13.3f}" for r in reports))
+
+
+if __name__ == "__main__":
+    main()
@@ -11,31 +11,110 @@ only a bare non-zero exit code in Task Scheduler's history.
 Every scheduled entry point should call install_crash_logger() once at
 startup (right after logging is configured) and record_run() at every exit
 path, so both silent crashes and silent no-op runs land in one queryable
-place (data/run_history.json) instead of requiring someone to notice a
-pattern by re-reading logs by hand.
+place (the runs table in helpers/ops_store.py, formerly
+data/run_history.json) instead of requiring someone to notice a pattern by
+re-reading logs by hand.
+
+Timing: install_crash_logger() also starts the run's clock, and phase(name)
+marks where each stage of a script begins, so every record_run() carries the
+run's wall-clock duration and seconds per phase. Numeric metrics, the
+duration and each phase's time are kept as per-script time series
+(metric_series()), and each script's rollup — success and no-op rates, p50 /
+p95 duration over its last ROLLUP_WINDOW runs — is updated as each run is
+recorded rather than recomputed from the history. map_server serves both on
+/api/runs.
+
+Profiling: a script started with --profile (see helpers/profiling.py) also
+gets a cProfile + span timeline written under data/profiles/ when it exits,
+carrying the same phase times and the run's recorded status.
 """
 
-import json
+import atexit
 import logging
-import os
 import sys
+import time
 from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+
+from helpers import profiling
+from helpers.ops_store import OpsStore, get_store
+
+HISTORY_LEN = 50     # per-script window load_history() returns
+ROLLUP_WINDOW = 50   # recent runs the rates and duration percentiles cover
+SLOW_FACTOR = 1.5    # rollups() marks the last run slow beyond this x the p95 before it
+
+
+class RunClock:
+    """Wall-clock time since the run started, split into named phases.
+    A phase runs until the next one starts (or the run is recorded)."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.phases: dict = {}
+        self._current = None
+        self._since = self.started
+
+    def phase(self, name: str) -> None:
+        now = time.monotonic()
+        if self._current is not None:
+            self.phases[self._current] = self.phases.get(self._current, 0.0) + now - self._since
+        self._current, self._since = name, now
+
+    def snapshot(self) -> tuple:
+        """(duration_s, {phase: seconds}) up to now, the current phase
+        included so far."""
+        now = time.monotonic()
+        phases = dict(self.phases)
+        if self._current is not None:
+            phases[self._current] = phases.get(self._current, 0.0) + now - self._since
+        return round(now - self.started, 2), {k: round(v, 2) for k, v in phases.items()}
+
+
+_clock: Optional[RunClock] = None
+
 
-HISTORY_FILE = "data/run_history.json"
-HISTORY_LEN = 50  # per-script rolling window
+def start_clock() -> RunClock:
+    """(Re)start this process's run clock. install_crash_logger() calls it."""
+    global _clock
+    _clock = RunClock()
+    return _clock
 
 
-def _load() -> dict:
-    if os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, encoding="utf-8") as f:
-            return json.load(f)
-    return {}
+def phase(name: str) -> None:
+    """Mark the start of a named stage of the run (ends the previous one)."""
+    (_clock or start_clock()).phase(name)
 
 
-def _save(data: dict) -> None:
-    os.makedirs(os.path.dirname(HISTORY_FILE), exist_ok=True)
-    with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+def _numeric(metrics: dict) -> dict:
+    return {k: v for k, v in (metrics or {}).items()
+            if isinstance(v, (int, float)) and not isinstance(v, bool) and np.isfinite(v)}
+
+
+def _rollup_update(stats: Optional[dict], status: str, duration: Optional[float], ts: str) -> dict:
+    """`stats` advanced by one run: all-time status counts plus the last
+    ROLLUP_WINDOW (status, duration) pairs."""
+    stats = dict(stats or {"runs": 0, "status": {}, "recent": []})
+    stats["runs"] += 1
+    stats["status"] = dict(stats["status"])
+    stats["status"][status] = stats["status"].get(status, 0) + 1
+    stats["recent"] = (stats["recent"] + [[status, duration]])[-ROLLUP_WINDOW:]
+    stats["last_ts"] = ts
+    return stats
+
+
+def _seed_rollup(store: OpsStore, script: str, tx) -> dict:
+    """A rollup for `script` built from what's recorded: all-time status
+    counts over the whole runs table, the window from its last runs."""
+    status = store.run_status_counts(script, tx)
+    recent = store.runs(script, limit=ROLLUP_WINDOW, tx=tx)
+    return {
+        "runs":    sum(status.values()),
+        "status":  status,
+        "recent":  [[r["status"], r["duration_s"]] for r in recent],
+        "last_ts": recent[-1]["timestamp"] if recent else None,
+    }
 
 
 def record_run(script: str, status: str, metrics: dict = None, note: str = None) -> None:
@@ -44,24 +123,106 @@ def record_run(script: str, status: str, metrics: dict = None, note: str = None)
     nothing), 'blocked' (needs a human), or 'fatal' (crashed). metrics is
     whatever numbers matter for that script's goal (published count, matched
     count, price delta, ...)."""
-    data = _load()
-    history = data.setdefault(script, [])
-    history.append({
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "status": status,
-        "metrics": metrics or {},
-        "note": note,
-    })
-    data[script] = history[-HISTORY_LEN:]
-    _save(data)
+    duration, phases = _clock.snapshot() if _clock else (None, {})
+    profiling.annotate(status=status, metrics=metrics or {})
+    series = _numeric(metrics)
+    if duration is not None:
+        series["duration_s"] = duration
+    series.update({f"phase.{k}": v for k, v in phases.items()})
+
+    ts = datetime.now(timezone.utc).isoformat()
+    store = get_store()
+    with store.transaction("runs") as tx:
+        run_id = store.add_run(script, status, metrics, note, ts, duration, phases, tx=tx)
+        if series:
+            store.add_run_metrics(run_id, script, series, tx)
+        rollup = store.run_rollup(script, tx)
+        if rollup is None:  # first run since rollups existed: seed from everything recorded, this run included
+            rollup = _seed_rollup(store, script, tx)
+        else:
+            rollup = _rollup_update(rollup, status, duration, ts)
+        store.put_run_rollup(script, rollup, tx)
+
+
+def _rates(statuses: list) -> dict:
+    n = len(statuses)
+    return {
+        "success_rate": round(statuses.count("success") / n, 3) if n else None,
+        "noop_rate":    round(statuses.count("no-op") / n, 3) if n else None,
+        "fatal_rate":   round(statuses.count("fatal") / n, 3) if n else None,
+    }
+
+
+def rollups(store: OpsStore = None) -> dict:
+    """{script: rollup} for the dashboard: run and status counts, success /
+    no-op / fatal rates (all-time and over the recent window), p50/p95
+    duration over the window, the last run's duration, and whether that run
+    was unusually slow. A script with runs but no rollup yet (imported, or
+    recorded before rollups existed, and not run since) gets one seeded here."""
+    store = store or get_store()
+    all_stats = store.run_rollup()
+    missing = [s for s in store.scripts() if s not in all_stats]
+    if missing:
+        with store.transaction() as tx:
+            for script in missing:
+                all_stats[script] = store.run_rollup(script, tx) or _seed_rollup(store, script, tx)
+                store.put_run_rollup(script, all_stats[script], tx)
+    out = {}
+    for script, stats in sorted(all_stats.items()):
+        recent = stats["recent"]
+        durations = np.array([d for _, d in recent if d is not None], dtype=np.float64)
+        earlier = np.array([d for _, d in recent[:-1] if d is not None], dtype=np.float64)
+        last_status, last_duration = recent[-1] if recent else (None, None)
+        p50, p95 = np.percentile(durations, [50, 95]) if durations.size else (None, None)
+        prior_p95 = np.percentile(earlier, 95) if earlier.size >= 5 else None
+        total = stats["runs"]
+        out[script] = {
+            "runs":          total,
+            "status":        stats["status"],
+            "all_time":      {k: round(stats["status"].get(s, 0) / total, 3)
+                              for k, s in (("success_rate", "success"), ("noop_rate", "no-op"), ("fatal_rate", "fatal"))},
+            "recent":        {"runs": len(recent), **_rates([s for s, _ in recent])},
+            "p50_s":         None if p50 is None else round(float(p50), 1),
+            "p95_s":         None if p95 is None else round(float(p95), 1),
+            "last_ts":       stats.get("last_ts"),
+            "last_status":   last_status,
+            "last_duration": last_duration,
+            "last_slow":     bool(last_duration is not None and prior_p95 is not None
+                                  and last_duration > SLOW_FACTOR * prior_p95),
+        }
+    return out
+
+
+def metric_series(script: str, name: str, limit: int = 200, store: OpsStore = None) -> list:
+    """[timestamp, value] pairs for one of `script`'s numeric metrics,
+    "duration_s", or "phase.<name>", oldest first."""
+    return (store or get_store()).metric_series(script, name, limit)
+
+
+def load_history(limit: int = HISTORY_LEN) -> dict:
+    """{script: [entries]} — the last `limit` runs of each script, oldest
+    first, in the shape data/run_history.json used to hold."""
+    store = get_store()
+    return {
+        script: [{k: r[k] for k in ("timestamp", "status", "metrics", "note")}
+                 for r in store.runs(script, limit=limit)]
+        for script in store.scripts()
+    }
 
 
 def install_crash_logger(script: str) -> None:
     """Install a sys.excepthook that logs any uncaught exception's full
     traceback and records it as a 'fatal' run before the process dies.
     Without this, pythonw.exe-launched scripts (no console) lose the
-    traceback entirely — Task Scheduler shows only a bare exit code."""
+    traceback entirely — Task Scheduler shows only a bare exit code.
+    Also starts the run clock record_run() reads durations from, and a
+    profiling session when the script was run with --profile."""
     logger = logging.getLogger(script)
+    clock = start_clock()
+    if profiling.requested():
+        profiling.start(script)
+        # atexit runs last-registered first: phases land before the profile is written.
+        atexit.register(lambda: profiling.annotate(phases=clock.snapshot()[1]))
 
     def _hook(exc_type, exc_value, tb):
         logger.error("Uncaught exception — process is about to die:",
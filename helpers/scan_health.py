@@ -14,32 +14,105 @@ Every caller of collect_listing_stats()/collect_click_snapshots() should
 report its result count here via record_scan() so this class of problem
 gets flagged the moment it happens, not the next time someone compares logs
 by hand.
+
+Detection: each source keeps running statistics, updated in O(1) per scan
+and stored beside its counts in helpers/ops_store.py — an exponentially
+weighted level and mean absolute deviation (a robust spread, sigma ~=
+DEV_TO_SIGMA x deviation), plus the usual gap between scans. A scan is
+flagged when its robust z-score (count - level) / spread is below -Z_DROP,
+or it's under DROP_THRESHOLD x level outright. The spread is floored at
+MIN_SPREAD of the level, so a source whose count never moves doesn't flag a
+one-listing dip. The count folded into the statistics is clipped to
+level +/- Z_DROP x spread, so one truncated scrape can't drag the baseline
+down, while a real, lasting change still pulls it over a few scans.
+
+Until a source has WARMUP scans the old rule applies: under DROP_THRESHOLD x
+the median of its last HISTORY_LEN counts. A source with no running
+statistics yet (e.g. history imported from data/scan_health.json) is seeded
+from those counts once.
+
+summary() and history() are the dashboard's view (/api/scan-health).
 """
 
-import json
 import logging
-import os
+import math
+from datetime import datetime, timezone
 from statistics import median
 from typing import Optional
 
+from helpers.ops_store import OpsStore, get_store
+
 logger = logging.getLogger(__name__)
 
-HEALTH_FILE = "data/scan_health.json"
-HISTORY_LEN = 20
-DROP_THRESHOLD = 0.5  # flag if a scan finds less than this fraction of the recent baseline
+HISTORY_LEN = 20      # counts the warm-up rule / seeding look at
+DROP_THRESHOLD = 0.5  # always flag a scan under this fraction of the baseline
+ALPHA = 0.2           # EWMA weight of the newest scan (~ the last 10 scans)
+Z_DROP = 3.5          # flag below this many robust sigmas under the level
+DEV_TO_SIGMA = math.sqrt(math.pi / 2)  # mean |deviation| -> sigma for a normal spread
+MIN_SPREAD = 0.05     # spread floor, as a fraction of the level
+WARMUP = 5            # scans before the running statistics are trusted
+OVERDUE_FACTOR = 3    # summary() marks a source overdue after this many usual gaps
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _epoch(ts: Optional[str]) -> Optional[float]:
+    try:
+        dt = datetime.fromisoformat(ts)
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
 
+def _seed(counts: list) -> Optional[dict]:
+    """Running statistics from a list of past counts (oldest first)."""
+    if not counts:
+        return None
+    level = median(counts)
+    return {
+        "n":     len(counts),
+        "level": float(level),
+        "dev":   sum(abs(c - level) for c in counts) / len(counts),
+        "gap":   None,
+        "last_ts": None,
+        "last_count": counts[-1],
+    }
 
-def _load() -> dict:
-    if os.path.exists(HEALTH_FILE):
-        with open(HEALTH_FILE, encoding="utf-8") as f:
-            return json.load(f)
-    return {}
 
+def _spread(stats: dict) -> float:
+    return max(DEV_TO_SIGMA * stats["dev"], MIN_SPREAD * stats["level"], 1.0)
 
-def _save(data: dict) -> None:
-    os.makedirs(os.path.dirname(HEALTH_FILE), exist_ok=True)
-    with open(HEALTH_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
+
+def score(stats: Optional[dict], count: int) -> Optional[float]:
+    """Robust z-score of `count` against `stats`, or None if there aren't
+    WARMUP scans behind it yet."""
+    if not stats or stats["n"] < WARMUP:
+        return None
+    return (count - stats["level"]) / _spread(stats)
+
+
+def update(stats: Optional[dict], count: int, ts: str) -> dict:
+    """`stats` advanced by one scan — O(1), no history needed."""
+    if stats is None:
+        return {"n": 1, "level": float(count), "dev": 0.0, "gap": None, "last_ts": ts, "last_count": count}
+    stats = dict(stats)
+    bound = Z_DROP * _spread(stats)
+    resid = count - stats["level"]
+    clipped = max(-bound, min(bound, resid))
+    stats["level"] += ALPHA * clipped
+    stats["dev"] += ALPHA * (abs(clipped) - stats["dev"])
+    now, last = _epoch(ts), _epoch(stats.get("last_ts"))
+    if now is not None and last is not None and now > last:
+        gap = now - last
+        stats["gap"] = gap if stats.get("gap") is None else stats["gap"] + ALPHA * (gap - stats["gap"])
+    stats["n"] += 1
+    stats["last_ts"] = ts
+    stats["last_count"] = count
+    return stats
 
 
 def record_scan(source: str, count: int) -> Optional[str]:
@@ -48,21 +121,67 @@ def record_scan(source: str, count: int) -> Optional[str]:
     message if this count is a suspicious drop from the recent baseline —
     likely an incomplete scrape, not a real change in listings. Returns None
     when there's nothing to flag."""
-    data = _load()
-    history = data.setdefault(source, [])
-
-    warning = None
-    if history:
-        baseline = median(history[-HISTORY_LEN:])
-        if baseline > 0 and count < baseline * DROP_THRESHOLD:
-            warning = (
-                f"{source}: scan found {count} listings, well below the recent "
-                f"baseline of {baseline:.0f} (last {min(len(history), HISTORY_LEN)} scans) — "
-                "likely an incomplete scrape (scroll/lazy-load cut short), not a real listing drop."
-            )
-            logger.warning(warning)
-
-    history.append(count)
-    data[source] = history[-HISTORY_LEN:]
-    _save(data)
+    store = get_store()
+    ts = _now().isoformat()
+    with store.transaction("scans") as tx:
+        stats = store.scan_stats(source, tx)
+        if stats is None:
+            stats = _seed(store.recent_scans(source, HISTORY_LEN, tx))
+        z = score(stats, count)
+        if z is not None:
+            baseline, basis = stats["level"], f"running level over {stats['n']} scans"
+            flagged = z <= -Z_DROP or count < baseline * DROP_THRESHOLD
+        else:
+            history = store.recent_scans(source, HISTORY_LEN, tx)
+            baseline = median(history) if history else 0
+            basis = f"last {len(history)} scans"
+            flagged = bool(history) and baseline > 0 and count < baseline * DROP_THRESHOLD
+        store.add_scan(source, count, ts, z=None if z is None else round(z, 2), flagged=flagged, tx=tx)
+        store.put_scan_stats(source, update(stats, count, ts), tx)
+
+    if not flagged:
+        return None
+    warning = (
+        f"{source}: scan found {count} listings, well below the recent "
+        f"baseline of {baseline:.0f} ({basis}{'' if z is None else f', z={z:.1f}'}) — "
+        "likely an incomplete scrape (scroll/lazy-load cut short), not a real listing drop."
+    )
+    logger.warning(warning)
     return warning
+
+
+# ── Dashboard queries ─────────────────────────────────────────────────────────
+def summary(now: Optional[datetime] = None, store: OpsStore = None) -> list:
+    """One dict per source: its running level and spread, the last scan (and
+    whether it was flagged), flagged scans among the last HISTORY_LEN, and
+    whether the source is overdue for a scan."""
+    store = store or get_store()
+    now_s = (now or _now()).timestamp()
+    all_stats = store.scan_stats()
+    out = []
+    for source in store.scan_sources():
+        recent = store.scans(source, limit=HISTORY_LEN)
+        stats = all_stats.get(source) or _seed([r["count"] for r in recent])
+        last = recent[-1] if recent else {}
+        last_epoch = _epoch(stats.get("last_ts"))
+        gap = stats.get("gap")
+        out.append({
+            "source":        source,
+            "scans":         stats["n"],
+            "level":         round(stats["level"], 1),
+            "spread":        round(_spread(stats), 1),
+            "last_count":    stats.get("last_count"),
+            "last_ts":       stats.get("last_ts"),
+            "last_z":        last.get("z"),
+            "last_flagged":  bool(last.get("flagged")),
+            "recent_flags":  sum(1 for r in recent if r["flagged"]),
+            "usual_gap_h":   round(gap / 3600, 1) if gap else None,
+            "overdue":       bool(gap and last_epoch and now_s - last_epoch > OVERDUE_FACTOR * gap),
+        })
+    return out
+
+
+def history(source: str, limit: int = 100, store: OpsStore = None) -> list:
+    """The last `limit` scans of `source`, oldest first: ts, count, z, flagged."""
+    return [{k: r[k] for k in ("ts", "count", "z", "flagged")}
+            for r in (store or get_store()).scans(source, limit=limit)]
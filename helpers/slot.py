@@ -1,7 +1,7 @@
 """
 Slot — the unit of publishing coverage: one combination of Equipment, City,
 Language, and (for current listings) Task Variant, encoded as the single
-string key used across state.json, data/duplicate_history.json, and
+string key used across state.json, the ops store's dupes table, and
 data/slot_metadata.json.
 
 This is the one place that format is built or parsed. Everything else
@@ -15,11 +15,13 @@ keys, since every listing generated today has a Task Variant.
 """
 
 import re
+from functools import lru_cache
 from typing import NamedTuple, Optional
 
-from helpers.ads import get_equipment
+from helpers.catalog import get_equipment
 
 _LANGUAGES = ("eng", "spa")
+PARSE_CACHE_SIZE = 16384  # distinct keys memoized by parse(); state.json holds a few thousand
 
 
 class Slot(NamedTuple):
@@ -33,11 +35,22 @@ class Slot(NamedTuple):
         return f"{base}_{self.task_slug}" if self.task_slug else base
 
 
+_patterns: Optional[tuple] = None  # (equipment names, (current, legacy))
+
+
 def _equip_lang_patterns() -> "tuple[re.Pattern, re.Pattern]":
-    equip_alt = "|".join(re.escape(e) for e in get_equipment())
+    """Compiled current/legacy key patterns, rebuilt only when the equipment
+    set changes (which also drops parse()'s memo, since results depend on it)."""
+    global _patterns
+    names = tuple(get_equipment())
+    if _patterns is not None and _patterns[0] == names:
+        return _patterns[1]
+    equip_alt = "|".join(re.escape(e) for e in names)
     lang_alt = "|".join(_LANGUAGES)
     current = re.compile(rf"^({equip_alt})_(.+)_({lang_alt})_(.+)$")
     legacy = re.compile(rf"^({equip_alt})_(.+)_({lang_alt})$")
+    _patterns = (names, (current, legacy))
+    _parse_cached.cache_clear()
     return current, legacy
 
 
@@ -59,9 +72,15 @@ def from_listing(listable) -> str:
 
 def parse(slot_key: str) -> Optional[Slot]:
     """Parse a Slot key back into its parts, current or legacy format.
-    Returns None if the key doesn't match either shape."""
-    current, legacy = _equip_lang_patterns()
+    Returns None if the key doesn't match either shape. Memoized (bounded
+    LRU) — Slot is immutable, so callers can share results."""
+    _equip_lang_patterns()  # refreshes patterns (and clears the memo) if equipment changed
+    return _parse_cached(slot_key)
+
 
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_cached(slot_key: str) -> Optional[Slot]:
+    current, legacy = _patterns[1]
     m = current.match(slot_key)
     if m:
         equip, city, lang, task_slug = m.groups()
@@ -73,3 +92,108 @@ def parse(slot_key: str) -> Optional[Slot]:
         return Slot(equip, city, lang, None)
 
     return None
+
+
+class SlotIndex:
+    """Who-covers-what lookups over state.json (and optionally the ops
+    store's dupes table), built once instead of re-parsing every key
+    per question. Cities, equipment types and Task Variants are interned to
+    small int ids; each query answers from a prebuilt bucket, so its cost is
+    proportional to the size of its answer, not to the number of slots.
+
+    Keys that parse() rejects are ignored. Legacy keys (no Task Variant)
+    count towards a city's coverage but never satisfy a Task Variant."""
+
+    def __init__(self):
+        self._names = {"city": [], "equip": [], "task": []}
+        self._ids = {"city": {}, "equip": {}, "task": {}}
+        self._by_city: dict = {}         # city id -> [slot keys]
+        self._by_city_equip: dict = {}   # (city id, equip id) -> [slot keys]
+        self._by_equip: dict = {}        # equip id -> [slot keys]
+        self._by_task: dict = {}         # task id -> [slot keys]
+        self._active_tasks: dict = {}    # (city id, equip id, lang) -> {task ids}
+        self._dupe_tasks: dict = {}      # (city id, equip id, lang) -> {task ids}
+
+    @classmethod
+    def build(cls, state: dict, dupe_history: Optional[dict] = None) -> "SlotIndex":
+        index = cls()
+        for key in state:
+            parsed = parse(key)
+            if parsed:
+                index._add_active(key, parsed)
+        for key in dupe_history or ():
+            parsed = parse(key)
+            if parsed and parsed.task_slug:
+                bucket = index._bucket(parsed)
+                index._dupe_tasks.setdefault(bucket, set()).add(index._intern("task", parsed.task_slug))
+        return index
+
+    def _intern(self, kind: str, value: str) -> int:
+        ids = self._ids[kind]
+        i = ids.get(value)
+        if i is None:
+            i = ids[value] = len(self._names[kind])
+            self._names[kind].append(value)
+        return i
+
+    def _bucket(self, parsed: Slot) -> tuple:
+        return (self._intern("city", parsed.city), self._intern("equip", parsed.equipment_type), parsed.lang)
+
+    def _add_active(self, key: str, parsed: Slot) -> None:
+        cid, eid, lang = self._bucket(parsed)
+        self._by_city.setdefault(cid, []).append(key)
+        self._by_city_equip.setdefault((cid, eid), []).append(key)
+        self._by_equip.setdefault(eid, []).append(key)
+        if parsed.task_slug:
+            tid = self._intern("task", parsed.task_slug)
+            self._by_task.setdefault(tid, []).append(key)
+            self._active_tasks.setdefault((cid, eid, lang), set()).add(tid)
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+    def slots_for_city(self, city: str, equipment_type: Optional[str] = None) -> list:
+        """Active slot keys in a City, optionally narrowed to one Equipment."""
+        cid = self._ids["city"].get(city)
+        if cid is None:
+            return []
+        if equipment_type is None:
+            return list(self._by_city.get(cid, ()))
+        eid = self._ids["equip"].get(equipment_type)
+        return list(self._by_city_equip.get((cid, eid), ()))
+
+    def slots_for_equipment(self, equipment_type: str) -> list:
+        return list(self._by_equip.get(self._ids["equip"].get(equipment_type), ()))
+
+    def slots_for_task(self, task_slug: str) -> list:
+        return list(self._by_task.get(self._ids["task"].get(task_slug), ()))
+
+    def covered_cities(self, equipment_type: Optional[str] = None) -> set:
+        """Cities with at least one active slot (of the given Equipment)."""
+        names = self._names["city"]
+        if equipment_type is None:
+            return {names[cid] for cid in self._by_city}
+        eid = self._ids["equip"].get(equipment_type)
+        return {names[cid] for (cid, e) in self._by_city_equip if e == eid}
+
+    def is_covered(self, city: str, equipment_type: Optional[str] = None) -> bool:
+        return bool(self.slots_for_city(city, equipment_type))
+
+    def _task_set(self, table: dict, city: str, equipment_type: str, lang: str) -> set:
+        cid = self._ids["city"].get(city)
+        eid = self._ids["equip"].get(equipment_type)
+        return table.get((cid, eid, lang), set())
+
+    def missing_tasks(self, city: str, equipment_type: str, task_slugs, lang: str = "eng") -> list:
+        """The Task Variants from task_slugs with no active slot for this
+        City/Equipment/Language, in the order given."""
+        active = self._task_set(self._active_tasks, city, equipment_type, lang)
+        ids = self._ids["task"]
+        return [t for t in task_slugs if ids.get(t) not in active]
+
+    def dupe_count(self, city: str, equipment_type: str, task_slugs=None, lang: str = "eng") -> int:
+        """How many of task_slugs (all, if None) are Duplicate-Flagged for
+        this City/Equipment/Language."""
+        dupes = self._task_set(self._dupe_tasks, city, equipment_type, lang)
+        if task_slugs is None:
+            return len(dupes)
+        ids = self._ids["task"]
+        return sum(1 for t in task_slugs if ids.get(t) in dupes)
@@ -0,0 +1,211 @@
+"""
+Task Status — scheduled-run times and "is the bot running" for the dashboard.
+
+Both map_server.py (/api/status, /api/live) and map_listings.py (the panel's
+next/last run) need these, and on Windows each answer costs a subprocess: a
+verbose `schtasks /query` dump for the schedule, a `wmic` process listing
+for the running check. StatusProvider asks the backend at most once per TTL
+and, once it has an answer, refreshes stale ones on a background thread, so
+callers never wait on a subprocess after the first call.
+
+Backends are pluggable. SchtasksBackend is the real one; StubBackend answers
+from fixed values so the dashboard runs on machines without Task Scheduler.
+get_provider() picks by TASK_STATUS_BACKEND ("schtasks" or "stub"),
+defaulting to schtasks on Windows and the stub elsewhere.
+"""
+
+import os
+import subprocess
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+TASK_PREFIX = "FacebookMarketplaceBot"
+TASKS_TTL = 60     # seconds; the schedule only changes when tasks are edited
+RUNNING_TTL = 5    # seconds; matches the dashboard's /api/live poll
+_SCHTASKS_TS = "%m/%d/%Y %I:%M:%S %p"
+_DISPLAY_TS = "%a %m/%d %I:%M %p"
+
+
+# ── Backends ──────────────────────────────────────────────────────────────────
+class SchtasksBackend:
+    """Windows Task Scheduler + process list."""
+
+    def tasks(self) -> list:
+        """One dict per FacebookMarketplaceBot_* task: name, next_run,
+        last_run, status (raw schtasks strings)."""
+        r = subprocess.run(
+            ["schtasks", "/query", "/fo", "LIST", "/v"],
+            capture_output=True, text=True, timeout=15,
+            encoding="utf-8", errors="replace"
+        )
+        tasks, cur = [], {}
+        for line in r.stdout.splitlines():
+            line = line.strip()
+            if line.startswith("TaskName:"):
+                if cur:
+                    tasks.append(cur)
+                name = line.split(":", 1)[1].strip()
+                cur = {"name": name} if TASK_PREFIX in name else {}
+            elif cur:
+                if line.startswith("Next Run Time:"):
+                    cur["next_run"] = line.split(":", 1)[1].strip()
+                elif line.startswith("Last Run Time:"):
+                    cur["last_run"] = line.split(":", 1)[1].strip()
+                elif line.startswith("Status:"):
+                    cur["status"] = line.split(":", 1)[1].strip()
+        if cur:
+            tasks.append(cur)
+        return tasks
+
+    def agent_running(self) -> bool:
+        r = subprocess.run(
+            ["wmic", "process", "where", "name='python.exe'", "get", "CommandLine"],
+            capture_output=True, text=True, timeout=8
+        )
+        return "daily_agent.py" in r.stdout or "stats_tracker.py" in r.stdout
+
+
+class StubBackend:
+    """Fixed answers, for Linux dev/test machines. `tasks` uses the same raw
+    shape SchtasksBackend returns."""
+
+    def __init__(self, tasks: list = None, running: bool = False):
+        self._tasks = tasks or []
+        self._running = running
+
+    def tasks(self) -> list:
+        return list(self._tasks)
+
+    def agent_running(self) -> bool:
+        return self._running
+
+
+BACKENDS = {"schtasks": SchtasksBackend, "stub": StubBackend}
+
+
+# ── Schedule helpers ──────────────────────────────────────────────────────────
+def _parse_ts(s: str) -> Optional[datetime]:
+    if not s or "N/A" in s:
+        return None
+    try:
+        return datetime.strptime(s.strip(), _SCHTASKS_TS)
+    except ValueError:
+        return None
+
+
+def _run_times(tasks: list, field: str) -> list:
+    """Parsed `field` times of the *_Run* tasks (not the helper tasks)."""
+    times = (_parse_ts(t.get(field, "")) for t in tasks if "_Run" in t.get("name", ""))
+    return [dt for dt in times if dt]
+
+
+def next_run(tasks: list, now: datetime = None) -> Optional[str]:
+    """Soonest future run of any *_Run* task, formatted for display."""
+    now = now or datetime.now()
+    upcoming = [dt for dt in _run_times(tasks, "next_run") if dt > now]
+    return min(upcoming).strftime(_DISPLAY_TS) if upcoming else None
+
+
+def last_run(tasks: list) -> Optional[str]:
+    """Most recent run of any *_Run* task, formatted for display."""
+    past = _run_times(tasks, "last_run")
+    return max(past).strftime(_DISPLAY_TS) if past else None
+
+
+# ── Provider ──────────────────────────────────────────────────────────────────
+class _TTLValue:
+    """One backend answer. The first get() fetches inline; after that a stale
+    value is returned as-is while a single background thread refetches it.
+    A failed fetch keeps the previous value (or `default`)."""
+
+    def __init__(self, fetch: Callable, ttl: float, default):
+        self._fetch = fetch
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._first = threading.Lock()  # serializes the inline first fetch
+        self._value = default
+        self._fetched_at = None
+        self._inflight = False
+
+    def _load(self):
+        try:
+            value = self._fetch()
+        except Exception:
+            value = None
+        with self._lock:
+            if value is not None:
+                self._value = value
+            self._fetched_at = time.monotonic()
+            self._inflight = False
+
+    def get(self):
+        with self._lock:
+            fetched_at = self._fetched_at
+        if fetched_at is None:
+            with self._first:
+                if self._fetched_at is None:
+                    self._load()
+            return self._value
+
+        with self._lock:
+            if time.monotonic() - fetched_at > self.ttl and not self._inflight:
+                self._inflight = True
+                threading.Thread(target=self._load, name="task-status", daemon=True).start()
+            return self._value
+
+    def invalidate(self):
+        with self._lock:
+            if self._fetched_at is not None:
+                self._fetched_at = float("-inf")
+
+
+class StatusProvider:
+    """TTL-cached view of a backend's scheduled tasks and running check."""
+
+    def __init__(self, backend, tasks_ttl: float = TASKS_TTL, running_ttl: float = RUNNING_TTL):
+        self.backend = backend
+        self._tasks = _TTLValue(backend.tasks, tasks_ttl, [])
+        self._running = _TTLValue(backend.agent_running, running_ttl, False)
+
+    def tasks(self) -> list:
+        return self._tasks.get()
+
+    def agent_running(self) -> bool:
+        return self._running.get()
+
+    def schedule(self) -> tuple:
+        """(next_run, last_run) display strings, None where unknown."""
+        tasks = self.tasks()
+        return next_run(tasks), last_run(tasks)
+
+    def invalidate(self):
+        """Mark everything stale, e.g. right after starting a run, so the
+        next caller kicks off a refresh."""
+        self._tasks.invalidate()
+        self._running.invalidate()
+
+
+_provider: Optional[StatusProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_provider() -> StatusProvider:
+    """The process-wide StatusProvider, created on first use with the
+    backend named by TASK_STATUS_BACKEND."""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            name = os.environ.get("TASK_STATUS_BACKEND") or ("schtasks" if os.name == "nt" else "stub")
+            if name not in BACKENDS:
+                raise ValueError(f"Unknown TASK_STATUS_BACKEND {name!r}; expected one of {sorted(BACKENDS)}")
+            _provider = StatusProvider(BACKENDS[name]())
+        return _provider
+
+
+def set_provider(provider: StatusProvider) -> None:
+    """Replace the process-wide provider (tests, or a custom backend)."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
@@ -4,37 +4,78 @@ map_listings.py — Generate listings_map.html, an interactive Leaflet map.
 Usage:
     python map_listings.py          # writes listings_map.html
     python map_listings.py --open   # writes and opens in default browser
+    python map_listings.py --profile  # also writes a profile to data/profiles/
 
 Click the legend items to toggle layer visibility.
+
+listings_map.html is a static shell with no data of its own. Served by
+map_server.py it fetches only the markers inside the visible map bounds
+(view() below); opened straight from disk it loads listings_data.js, the
+full payload written next to it.
+
+Also importable: map_server.py builds in-process instead of launching this
+file as a subprocess. build_map() keeps each active slot's marker from the
+previous build and only recomputes the slots whose state/metadata entry
+changed since then.
+
+regenerate() skips the build and the writes altogether when input_digest()
+matches the one recorded in data/map_build.json by the last run that wrote
+the outputs, and otherwise only rewrites the files whose bytes changed —
+each via temp file + rename, so a browser never loads a half-written page.
 """
 
 import argparse
+import hashlib
 import json
 import math
 import os
-import subprocess
 import webbrowser
 from collections import defaultdict
 from datetime import datetime, timezone
 
-from helpers.slot import parse as parse_slot, build as build_slot
-from helpers.click_history import seven_day_delta, lifetime_total
-from helpers.ads import get_equipment, get_locations, get_cities_for_equipment, TASK_VARIANTS
+from helpers.slot import parse as parse_slot, SlotIndex
+from helpers import profiling
+from helpers.geo import CityIndex
+from helpers.click_history import batch_click_stats, load_metadata, snapshot_log_path, snapshot_table
+from helpers.catalog import get_equipment, TASK_VARIANTS
+from helpers.json_store import file_signature, load_json, load_cached, write_atomic, write_if_changed
+from helpers.log_events import RECENT_LEN
+from helpers.ops_store import DB_FILE, get_store
+from helpers.task_status import get_provider
+
+CITIES_FILE      = "data/cities_data.json"
+STATE_FILE       = "state.json"
+METADATA_FILE    = "data/slot_metadata.json"
+COMPETITORS_FILE = "data/competitors.json"
+OUT              = "listings_map.html"
+DATA_OUT         = "listings_data.json"
+DATA_JS          = "listings_data.js"
+BUILD_FILE       = "data/map_build.json"  # input digest of the last written outputs
+
+JITTER_R = 0.004
+MIN_R, MAX_R = 5, 22
+DEFAULT_ZOOM = 10
+BBOX_PAD = 0.25            # fraction of the view the client adds on each side
+PENDING_MIN_ZOOM = 8       # below these zooms view() leaves the layer out —
+UNCOVERED_MIN_ZOOM = 7     # at state scale they're hundreds of overlapping dots
 
-# ── Load data ─────────────────────────────────────────────────────────────────
-def _load(path):
-    if os.path.exists(path):
-        with open(path, encoding="utf-8") as f:
-            return json.load(f)
-    return {}
 
-cities_raw   = _load("data/cities_data.json")
-state        = _load("state.json")
-metadata     = _load("data/slot_metadata.json")
-competitors  = _load("data/competitors.json").get("sellers", {})
-dupe_history = _load("data/duplicate_history.json")
+# ── Load data ─────────────────────────────────────────────────────────────────
+def load_inputs(base_dir: str = ".") -> dict:
+    """Read every file build_map() needs, keyed by build_map's argument names.
+    Goes through helpers.json_store, so unchanged files aren't re-parsed."""
+    def p(rel):
+        return os.path.join(base_dir, rel)
+    meta_path = p(METADATA_FILE)
+    return {
+        "state":        load_json(p(STATE_FILE)),
+        "metadata":     load_cached((meta_path, snapshot_log_path(meta_path)),
+                                    lambda: load_metadata(meta_path)),
+        "cities":       load_json(p(CITIES_FILE)),
+        "competitors":  load_json(p(COMPETITORS_FILE)).get("sellers", {}),
+        "dupe_history": get_store(p(DB_FILE)).dupes(),
+    }
 
-city_lookup = {c["city"]: c for c in (cities_raw if isinstance(cities_raw, list) else [])}
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 def _age_days(iso_str):
@@ -49,209 +90,304 @@ def _age_days(iso_str):
         return None
 
 def _get_schedule_info():
-    """Query Windows Task Scheduler for next/last FacebookMarketplaceBot run times."""
-    try:
-        r = subprocess.run(
-            ["schtasks", "/query", "/fo", "LIST", "/v"],
-            capture_output=True, text=True, timeout=15,
-            encoding="utf-8", errors="replace"
-        )
-        now = datetime.now()
-        soonest = None
-        latest_last = None
-        cur = {}
-        for line in r.stdout.splitlines():
-            line = line.strip()
-            if line.startswith("TaskName:"):
-                name = line.split(":", 1)[1].strip()
-                cur = {"name": name} if ("FacebookMarketplaceBot" in name and "_Run" in name) else {}
-            elif cur:
-                if line.startswith("Next Run Time:"):
-                    val = line.split(":", 1)[1].strip()
-                    if val and "N/A" not in val:
-                        try:
-                            dt = datetime.strptime(val, "%m/%d/%Y %I:%M:%S %p")
-                            if dt > now and (soonest is None or dt < soonest):
-                                soonest = dt
-                        except Exception:
-                            pass
-                elif line.startswith("Last Run Time:"):
-                    val = line.split(":", 1)[1].strip()
-                    if val and "N/A" not in val:
-                        try:
-                            dt = datetime.strptime(val, "%m/%d/%Y %I:%M:%S %p")
-                            if latest_last is None or dt > latest_last:
-                                latest_last = dt
-                        except Exception:
-                            pass
-        next_str = soonest.strftime("%a %m/%d %I:%M %p") if soonest else "—"
-        last_str = latest_last.strftime("%a %m/%d %I:%M %p") if latest_last else "—"
-        return next_str, last_str
-    except Exception:
-        return "—", "—"
-
-
-# ── Build markers (active listings only) ──────────────────────────────────────
-markers = []
-
-for slot in state.keys():
-    parsed = parse_slot(slot)
-    if not parsed:
-        continue
-    equip = parsed.equipment_type
-    city  = parsed.city
-
-    geo = city_lookup.get(city)
-    if not geo or not geo.get("lat") or not geo.get("lng"):
-        continue
-
-    meta   = metadata.get(slot, {})
-    snaps  = meta.get("click_snapshots", [])
-    pub_at = meta.get("published_at")
-
-    current_clicks  = snaps[-1]["clicks"] if snaps else None
-    seven_day       = seven_day_delta(snaps, pub_at)
-    lifetime_clicks = lifetime_total(metadata, slot)
-
-    markers.append({
-        "slot":            slot,
-        "city":            city,
-        "equip":           equip,
-        "lat":             float(geo["lat"]),
-        "lng":             float(geo["lng"]),
-        "title":           state.get(slot, ""),
-        "published_at":    pub_at,
-        "age_days":        _age_days(pub_at),
-        "current_clicks":  current_clicks,
-        "seven_day":       seven_day,
-        "lifetime_clicks": lifetime_clicks,
-        "radius":          5,  # filled in below
-    })
-
-# ── Pending markers: per (city, equipment) aggregate of missing task variants ──
-# One marker per equipment type per city that isn't fully covered — not one per
-# task variant, to keep density comparable to the active-listing markers.
-active_slots = set(state.keys())
-pending_markers = []
-
-for loc in get_locations():
-    city = loc.get("city")
-    geo = city_lookup.get(city)
-    if not geo or not geo.get("lat") or not geo.get("lng"):
-        continue
-    for equip in get_equipment():
-        if city not in get_cities_for_equipment(equip):
-            continue
-        tasks = TASK_VARIANTS.get(equip, [])
-        if not tasks:
-            continue
-        missing_tasks = []
-        duplicate_count = 0
-        for task in tasks:
-            slot = build_slot(equip, city, "eng", task["slug"])
-            if slot in active_slots:
+    """Next/last FacebookMarketplaceBot run times for the panel, from the
+    shared (cached) task status provider."""
+    next_run, last_run = get_provider().schedule()
+    return next_run or "—", last_run or "—"
+
+
+def _has_geo(geo) -> bool:
+    return bool(geo and geo.get("lat") and geo.get("lng"))
+
+
+def _slot_signature(title, meta: dict, geo: dict, hour: str) -> tuple:
+    """Everything an active marker is derived from. The current hour is part
+    of it so the time-windowed 7-day delta can't go stale for more than an
+    hour on a slot whose data hasn't otherwise changed."""
+    snaps = meta.get("click_snapshots") or []
+    last = (snaps[-1].get("ts"), snaps[-1].get("clicks")) if snaps else None
+    return (
+        title, meta.get("published_at"), meta.get("lifetime_clicks"),
+        len(snaps), last, geo.get("lat"), geo.get("lng"), hour,
+    )
+
+
+# ── Builder ───────────────────────────────────────────────────────────────────
+class MapBuilder:
+    """Builds the map payload, keeping per-slot markers and the pending layer
+    between calls so a rebuild only redoes the slots that actually changed."""
+
+    def __init__(self):
+        self._cities_src = None
+        self._city_lookup: dict = {}
+        self._markers: dict = {}  # slot -> (signature, marker without jitter/radius)
+        self._table_src = None    # (metadata object, state slots) self._table was built from
+        self._table = None
+        self._pending_sig = None
+        self._pending: list = []
+        self.last_rebuilt = 0  # active markers recomputed by the last build()
+
+    def _lookup(self, cities) -> dict:
+        if cities is not self._cities_src:
+            self._cities_src = cities
+            self._city_lookup = {c["city"]: c for c in (cities if isinstance(cities, list) else [])}
+        return self._city_lookup
+
+    def _active_markers(self, state: dict, metadata: dict, city_lookup: dict) -> list:
+        hour = datetime.now(timezone.utc).strftime("%Y%m%d%H")
+        fresh = {}
+        stale = []  # (slot, signature, parsed, geo) needing a recompute
+        for slot, title in state.items():
+            parsed = parse_slot(slot)
+            if not parsed:
                 continue
-            missing_tasks.append(task["slug"])
-            if slot in dupe_history:
-                duplicate_count += 1
-        if not missing_tasks:
-            continue
-        pending_markers.append({
-            "slot":            f"{equip}_pending",  # synthetic, for stable jitter ordering only
-            "city":            city,
-            "equip":           equip,
-            "lat":             float(geo["lat"]),
-            "lng":             float(geo["lng"]),
-            "missing_count":   len(missing_tasks),
-            "total_count":     len(tasks),
-            "missing_tasks":   missing_tasks,
-            "duplicate_count": duplicate_count,
-        })
-
-# ── Jitter: spread same-city markers so bubbles never overlap ─────────────────
-# Sort within each city by slot name for stable placement across reloads.
-# Spread in a circle; longitude scaled by ~cos(31°N) so the circle looks round.
-# Active and pending markers jitter together so a city's full picture clusters
-# in one place on the map.
-JITTER_R = 0.004
-city_groups = defaultdict(list)
-for m in markers:
-    city_groups[m["city"]].append(m)
-for m in pending_markers:
-    city_groups[m["city"]].append(m)
-
-for group in city_groups.values():
-    n = len(group)
-    if n == 1:
-        continue
-    group.sort(key=lambda m: m["slot"])
-    for i, m in enumerate(group):
-        angle = 2 * math.pi * i / n
-        m["lat"] += JITTER_R * math.cos(angle)
-        m["lng"] += JITTER_R * math.sin(angle) * 0.82
-
-# ── Bubble radius: scale by current click count ───────────────────────────────
-MIN_R, MAX_R = 5, 22
-all_clicks = [m["current_clicks"] for m in markers if m["current_clicks"] and m["current_clicks"] > 0]
-max_clicks = max(all_clicks) if all_clicks else 1
-for m in markers:
-    c = m["current_clicks"]
-    if c and c > 0:
-        m["radius"] = round(MIN_R + (c / max_clicks) * (MAX_R - MIN_R), 1)
-    else:
-        m["radius"] = MIN_R
-
-# ── Uncovered cities (no active listing, regardless of past dupe history) ─────
-covered = {m["city"] for m in markers}
-uncovered = [
-    {"city": c["city"], "lat": float(c["lat"]), "lng": float(c["lng"])}
-    for c in city_lookup.values()
-    if c["city"] not in covered and c.get("lat") and c.get("lng")
-]
-
-# ── Stats ─────────────────────────────────────────────────────────────────────
-mini_m  = [m for m in markers if m["equip"] == "mini-ex"]
-track_m = [m for m in markers if m["equip"] == "trackloader"]
-cities_active = len({m["city"] for m in markers})
-
-known_clicks = [m["current_clicks"] for m in markers if m["current_clicks"] is not None]
-avg_clicks   = round(sum(known_clicks) / len(known_clicks), 1) if known_clicks else None
-
-known_7d = [m["seven_day"] for m in markers if m["seven_day"] is not None]
-avg_7d   = round(sum(known_7d) / len(known_7d), 1) if known_7d else None
-
-next_run_str, last_run_str = _get_schedule_info()
-
-stats = {
-    "active_total":   len(markers),
-    "active_mini_ex": len(mini_m),
-    "active_track":   len(track_m),
-    "uncovered":      len(uncovered),
-    "cities_active":  cities_active,
-    "cities_total":   len(city_lookup),
-    "avg_clicks":     avg_clicks,
-    "avg_7d":         avg_7d,
-    "pending_total":  sum(p["missing_count"] for p in pending_markers),
-    "next_run":       next_run_str,
-    "last_run":       last_run_str,
-    "generated_at":   datetime.now().strftime("%Y-%m-%d %H:%M"),
-}
-
-# ── Center ────────────────────────────────────────────────────────────────────
-if markers:
-    clat = sum(m["lat"] for m in markers) / len(markers)
-    clng = sum(m["lng"] for m in markers) / len(markers)
-else:
-    clat, clng = 31.5, -97.1
+            geo = city_lookup.get(parsed.city)
+            if not _has_geo(geo):
+                continue
+            sig = _slot_signature(title, metadata.get(slot, {}), geo, hour)
+            cached = self._markers.get(slot)
+            if cached and cached[0] == sig:
+                fresh[slot] = cached
+            else:
+                fresh[slot] = None  # placeholder keeps state.json order
+                stale.append((slot, sig, parsed, geo))
+
+        clicks = {}
+        if stale:
+            # Snapshot timestamps are parsed once per metadata version and set
+            # of active slots (state.json can gain slots while metadata stays
+            # the same object); an hourly refresh of unchanged data only
+            # re-runs the vectorized pass.
+            slots = frozenset(state)
+            src = self._table_src
+            if src is None or src[0] is not metadata or src[1] != slots:
+                self._table_src = (metadata, slots)
+                self._table = snapshot_table(metadata, list(state))
+            clicks = batch_click_stats(metadata, table=self._table)
+        for slot, sig, parsed, geo in stale:
+            fresh[slot] = (sig, {
+                "slot":            slot,
+                "city":            parsed.city,
+                "equip":           parsed.equipment_type,
+                "lat":             float(geo["lat"]),
+                "lng":             float(geo["lng"]),
+                "title":           state[slot] or "",
+                "published_at":    metadata.get(slot, {}).get("published_at"),
+                **clicks[slot],
+            })
+        rebuilt = len(stale)
+        self._markers = fresh
+        self.last_rebuilt = rebuilt
+
+        markers = []
+        for _, base in fresh.values():
+            m = dict(base)
+            m["age_days"] = _age_days(m["published_at"])
+            m["radius"] = MIN_R
+            markers.append(m)
+        return markers
+
+    def _pending_markers(self, state: dict, dupe_history: dict, city_lookup: dict) -> list:
+        """One marker per equipment type per city that isn't fully covered — not
+        one per task variant, to keep density comparable to the active-listing
+        markers. Only recomputed when the set of active or duplicate slots, or
+        the cities table, changes. Rental equipment is offered in every city of
+        the table passed in (not helpers.catalog's process-lifetime copy, so a
+        long-running map_server picks up new cities); service equipment_types
+        keep their "cities" launch list."""
+        sig = (frozenset(state), frozenset(dupe_history), id(city_lookup))
+        if sig == self._pending_sig:
+            return [dict(p) for p in self._pending]
+
+        index = SlotIndex.build(state, dupe_history)
+        offered = {equip: set(info.get("cities") or city_lookup) for equip, info in get_equipment().items()}
+        pending = []
+        for city, geo in city_lookup.items():
+            if not _has_geo(geo):
+                continue
+            for equip in get_equipment():
+                if city not in offered[equip]:
+                    continue
+                tasks = TASK_VARIANTS.get(equip, [])
+                if not tasks:
+                    continue
+                missing_tasks = index.missing_tasks(city, equip, [t["slug"] for t in tasks])
+                if not missing_tasks:
+                    continue
+                pending.append({
+                    "slot":            f"{equip}_pending",  # synthetic, for stable jitter ordering only
+                    "city":            city,
+                    "equip":           equip,
+                    "lat":             float(geo["lat"]),
+                    "lng":             float(geo["lng"]),
+                    "missing_count":   len(missing_tasks),
+                    "total_count":     len(tasks),
+                    "missing_tasks":   missing_tasks,
+                    "duplicate_count": index.dupe_count(city, equip, missing_tasks),
+                })
+        self._pending_sig = sig
+        self._pending = pending
+        return [dict(p) for p in pending]
+
+    def build(self, state: dict, metadata: dict, cities: list,
+              competitors: dict = None, dupe_history: dict = None, schedule: tuple = None) -> dict:
+        """Build markers, pending markers, uncovered cities and panel stats.
+        schedule is (next_run, last_run) display strings; queried from Task
+        Scheduler when omitted."""
+        competitors  = competitors or {}
+        dupe_history = dupe_history or {}
+        city_lookup  = self._lookup(cities)
+
+        markers         = self._active_markers(state, metadata, city_lookup)
+        pending_markers = self._pending_markers(state, dupe_history, city_lookup)
+
+        # ── Jitter: spread same-city markers so bubbles never overlap ─────────
+        # Sort within each city by slot name for stable placement across reloads.
+        # Spread in a circle; longitude scaled by ~cos(31°N) so the circle looks round.
+        # Active and pending markers jitter together so a city's full picture clusters
+        # in one place on the map.
+        city_groups = defaultdict(list)
+        for m in markers:
+            city_groups[m["city"]].append(m)
+        for m in pending_markers:
+            city_groups[m["city"]].append(m)
+
+        for group in city_groups.values():
+            n = len(group)
+            if n == 1:
+                continue
+            group.sort(key=lambda m: m["slot"])
+            for i, m in enumerate(group):
+                angle = 2 * math.pi * i / n
+                m["lat"] += JITTER_R * math.cos(angle)
+                m["lng"] += JITTER_R * math.sin(angle) * 0.82
+
+        # ── Bubble radius: scale by current click count ───────────────────────
+        all_clicks = [m["current_clicks"] for m in markers if m["current_clicks"] and m["current_clicks"] > 0]
+        max_clicks = max(all_clicks) if all_clicks else 1
+        for m in markers:
+            c = m["current_clicks"]
+            if c and c > 0:
+                m["radius"] = round(MIN_R + (c / max_clicks) * (MAX_R - MIN_R), 1)
+
+        # ── Uncovered cities (no active listing, regardless of past dupe history) ─
+        # Each carries the nearest covered city, so the gap's size is visible.
+        covered = {m["city"] for m in markers}
+        uncovered = [
+            {"city": c["city"], "lat": float(c["lat"]), "lng": float(c["lng"])}
+            for c in city_lookup.values()
+            if c["city"] not in covered and _has_geo(c)
+        ]
+        geo_index = CityIndex.for_cities(cities if isinstance(cities, list) else [])
+        nearest = geo_index.nearest_among([u["city"] for u in uncovered], covered)
+        for u in uncovered:
+            near = nearest.get(u["city"])
+            u["nearest_covered"] = {"city": near[0], "miles": near[1]} if near else None
+
+        # ── Stats ─────────────────────────────────────────────────────────────
+        mini_m  = [m for m in markers if m["equip"] == "mini-ex"]
+        track_m = [m for m in markers if m["equip"] == "trackloader"]
+
+        known_clicks = [m["current_clicks"] for m in markers if m["current_clicks"] is not None]
+        avg_clicks   = round(sum(known_clicks) / len(known_clicks), 1) if known_clicks else None
+
+        known_7d = [m["seven_day"] for m in markers if m["seven_day"] is not None]
+        avg_7d   = round(sum(known_7d) / len(known_7d), 1) if known_7d else None
+
+        next_run_str, last_run_str = schedule if schedule else _get_schedule_info()
+
+        stats = {
+            "active_total":   len(markers),
+            "active_mini_ex": len(mini_m),
+            "active_track":   len(track_m),
+            "uncovered":      len(uncovered),
+            "cities_active":  len(covered),
+            "cities_total":   len(city_lookup),
+            "avg_clicks":     avg_clicks,
+            "avg_7d":         avg_7d,
+            "pending_total":  sum(p["missing_count"] for p in pending_markers),
+            "next_run":       next_run_str,
+            "last_run":       last_run_str,
+            "generated_at":   datetime.now().strftime("%Y-%m-%d %H:%M"),
+        }
+
+        # ── Center ────────────────────────────────────────────────────────────
+        if markers:
+            center = (sum(m["lat"] for m in markers) / len(markers),
+                      sum(m["lng"] for m in markers) / len(markers))
+        else:
+            center = (31.5, -97.1)
+
+        return {
+            "markers":     markers,
+            "uncovered":   uncovered,
+            "pending":     pending_markers,
+            "stats":       stats,
+            "competitors": competitors,
+            "center":      center,
+        }
+
+
+_builder = MapBuilder()
+
+
+def build_map(state: dict, metadata: dict, cities: list,
+              competitors: dict = None, dupe_history: dict = None, schedule: tuple = None) -> dict:
+    """Build the map payload with the module's shared MapBuilder, so repeated
+    calls in one process (map_server.py) only recompute changed slots."""
+    return _builder.build(state, metadata, cities, competitors, dupe_history, schedule)
+
+
+# ── Views ─────────────────────────────────────────────────────────────────────
+def parse_bbox(value: str) -> tuple:
+    """(west, south, east, north) from Leaflet's toBBoxString() format,
+    "west,south,east,north". Raises ValueError on anything else."""
+    parts = [float(v) for v in value.split(",")]
+    if len(parts) != 4 or not all(map(math.isfinite, parts)):
+        raise ValueError(f"bbox needs 4 numbers: {value!r}")
+    west, south, east, north = parts
+    if west > east or south > north:
+        raise ValueError(f"bbox corners out of order: {value!r}")
+    return west, south, east, north
+
+
+def _within(items: list, bbox) -> list:
+    if bbox is None:
+        return items
+    west, south, east, north = bbox
+    return [i for i in items if south <= i["lat"] <= north and west <= i["lng"] <= east]
+
+
+def view(result: dict, bbox: tuple = None, zoom: int = None) -> dict:
+    """The part of a build_map() payload the browser needs for one map view:
+    markers inside bbox, minus the layers too dense to show at this zoom.
+    Stats always cover everything."""
+    def shown(min_zoom):
+        return zoom is None or zoom >= min_zoom
+    return {
+        "markers":   _within(result["markers"], bbox),
+        "uncovered": _within(result["uncovered"], bbox) if shown(UNCOVERED_MIN_ZOOM) else [],
+        "pending":   _within(result["pending"], bbox) if shown(PENDING_MIN_ZOOM) else [],
+        "stats":     result["stats"],
+    }
+
+
+def competitor_view(competitors: dict, bbox: tuple = None) -> dict:
+    """Competitor sellers with only their listings inside bbox. Every seller
+    is kept, with its overall listing count in "total", so the panel's seller
+    list doesn't change as the map moves."""
+    return {
+        sid: {"name": seller.get("name"), "total": len(seller.get("listings", [])),
+              "listings": _within(seller.get("listings", []), bbox)}
+        for sid, seller in competitors.items()
+    }
 
-# ── HTML ──────────────────────────────────────────────────────────────────────
-MJ = json.dumps(markers,         ensure_ascii=False)
-UJ = json.dumps(uncovered,       ensure_ascii=False)
-PJ = json.dumps(pending_markers, ensure_ascii=False)
-SJ = json.dumps(stats,           ensure_ascii=False)
-CJ = json.dumps(competitors,     ensure_ascii=False)
 
-HTML = f"""<!DOCTYPE html>
+# ── HTML ──────────────────────────────────────────────────────────────────────
+def render_html() -> str:
+    """The dashboard page. Static — data comes from map_server.py's /api
+    endpoints, or from listings_data.js when opened as a file."""
+    return f"""<!DOCTYPE html>
 <html lang="en">
 <head>
 <meta charset="utf-8"/>
@@ -376,6 +512,7 @@ select.comp-sel {{
     <div class="section-title">Clicks</div>
     <div class="row"><span>Avg current</span><span class="val" id="s-avg"></span></div>
     <div class="row"><span>Avg 7-day delta</span><span class="val" id="s-7d"></span></div>
+    <div class="row"><span>Per listing-day (7d)</span><span class="val" id="s-cpld">—</span></div>
   </div>
   <hr class="divider"/>
   <div class="section" id="comp-panel" style="display:none">
@@ -449,26 +586,15 @@ select.comp-sel {{
 </div>
 
 <script>
-const MARKERS      = {MJ};
-const UNCOVERED    = {UJ};
-const PENDING      = {PJ};
-const STATS        = {SJ};
-const COMPETITORS  = {CJ};
-
-// ── Panel ────────────────────────────────────────────────────────────────────
-document.getElementById('s-mini').textContent   = STATS.active_mini_ex;
-document.getElementById('s-track').textContent  = STATS.active_track;
-document.getElementById('s-total').textContent  = STATS.active_total;
-document.getElementById('s-cities').textContent = STATS.cities_active;
-document.getElementById('s-ctotal').textContent = STATS.cities_total;
-document.getElementById('s-unc').textContent    = STATS.uncovered;
-document.getElementById('s-pending').textContent = STATS.pending_total;
-document.getElementById('s-avg').textContent    = STATS.avg_clicks != null ? STATS.avg_clicks : '—';
-document.getElementById('s-7d').textContent     = STATS.avg_7d    != null ? STATS.avg_7d     : '—';
-document.getElementById('ts').textContent       = 'Updated ' + STATS.generated_at;
+// ── Data source ──────────────────────────────────────────────────────────────
+// Served by map_server.py, each layer is fetched for the visible bounds (plus
+// a margin) whenever the map moves. Opened as a file, listings_data.js written
+// next to this page supplies the whole payload once.
+const SERVER_MODE = window.location.protocol !== 'file:';
+const BBOX_PAD    = {BBOX_PAD};
 
 // ── Map ───────────────────────────────────────────────────────────────────────
-const map = L.map('map').setView([{clat:.5f}, {clng:.5f}], 10);
+const map = L.map('map');
 L.tileLayer('https://{{s}}.tile.openstreetmap.org/{{z}}/{{x}}/{{y}}.png', {{
   attribution: '© <a href="https://openstreetmap.org/copyright">OpenStreetMap</a>',
   maxZoom: 18
@@ -512,6 +638,14 @@ function buildPopup(m) {{
     '</div>';
   return p;
 }}
+function buildUncoveredPopup(c) {{
+  var p = '<div class="lf-popup"><div class="city">' + c.city + ', TX</div><div class="sub">Not yet listed</div>';
+  if (c.nearest_covered) {{
+    p += '<hr/><div class="stat-row"><span>Nearest active</span><span>' +
+      c.nearest_covered.city + ' · ' + c.nearest_covered.miles + ' mi</span></div>';
+  }}
+  return p + '</div>';
+}}
 function fmtTaskSlug(s) {{
   return s.split('_').map(function(w) {{ return w.charAt(0).toUpperCase() + w.slice(1); }}).join(' ');
 }}
@@ -542,10 +676,12 @@ function updateStats(s) {{
   document.getElementById('ts').textContent = 'Updated ' + s.generated_at;
 }}
 
-// ── Layer renderer (called on initial load and on every /api/markers refresh) ─
-var knownSlots = new Set(MARKERS.map(function(m) {{ return m.slot; }}));
+// ── Layer renderer (called for every view load and /api/markers refresh) ─────
+// knownSlots is every slot rendered so far. Only the periodic refresh rings
+// slots it hasn't seen — ones that scroll into view aren't new listings.
+var knownSlots = new Set();
 
-function renderLayers(markersArr, uncoveredArr, pendingArr) {{
+function renderLayers(markersArr, uncoveredArr, pendingArr, highlightNew) {{
   layers.mini.clearLayers();
   layers.track.clearLayers();
   layers.unc.clearLayers();
@@ -554,9 +690,7 @@ function renderLayers(markersArr, uncoveredArr, pendingArr) {{
   uncoveredArr.forEach(function(c) {{
     L.circleMarker([c.lat, c.lng], {{
       radius: 5, color: '#9ca3af', fillColor: '#d1d5db', fillOpacity: 0.5, weight: 1
-    }}).bindPopup(
-      '<div class="lf-popup"><div class="city">' + c.city + ', TX</div><div class="sub">Not yet listed</div></div>'
-    ).addTo(layers.unc);
+    }}).bindPopup(buildUncoveredPopup(c)).addTo(layers.unc);
   }});
 
   (pendingArr || []).forEach(function(m) {{
@@ -567,12 +701,12 @@ function renderLayers(markersArr, uncoveredArr, pendingArr) {{
     }}).bindPopup(buildPendingPopup(m)).addTo(layers.pending);
   }});
 
-  var newSlots = new Set(markersArr.map(function(m) {{ return m.slot; }}));
   markersArr.forEach(function(m) {{
     var layerKey = m.equip === 'mini-ex' ? 'mini' : 'track';
     var color    = m.equip === 'mini-ex' ? '#15803d' : '#1d4ed8';
     var fill     = m.equip === 'mini-ex' ? '#22c55e' : '#3b82f6';
-    var isNew    = !knownSlots.has(m.slot);
+    var isNew    = highlightNew && !knownSlots.has(m.slot);
+    knownSlots.add(m.slot);
     var marker = L.circleMarker([m.lat, m.lng], {{
       radius: m.radius,
       color: isNew ? '#ffffff' : color,
@@ -583,18 +717,9 @@ function renderLayers(markersArr, uncoveredArr, pendingArr) {{
       setTimeout(function() {{ marker.setStyle({{color: color, weight: 1.5}}); }}, 4000);
     }}
   }});
-  knownSlots = newSlots;
 }}
 
-// Initial render from baked-in data
-renderLayers(MARKERS, UNCOVERED, PENDING);
-
 // ── Bot status controls ───────────────────────────────────────────────────────
-const SERVER_MODE = window.location.protocol !== 'file:';
-
-document.getElementById('s-next-run').textContent = STATS.next_run || '—';
-document.getElementById('s-last-run').textContent  = STATS.last_run  || '—';
-
 function setAgentStatus(running) {{
   document.getElementById('s-bot-status').innerHTML = running
     ? '<span style="color:#15803d;font-weight:600">&#9679; Running</span>'
@@ -603,42 +728,95 @@ function setAgentStatus(running) {{
   document.getElementById('btn-stats').disabled = running;
 }}
 
-// ── Live feed: polls /api/live every 5 s ──────────────────────────────────────
+// ── Live feed: pushed over /api/events; polls /api/live if that's unavailable ─
+function renderLive(d) {{
+  setAgentStatus(d.running);
+  var sec = document.getElementById('live-section');
+  sec.style.display = (d.running && d.publishing) ? '' : 'none';
+
+  if (d.publishing) {{
+    var p = d.publishing;
+    var dot = p.equip === 'mini-ex' ? '🟢' : '🔵';
+    document.getElementById('live-now').innerHTML =
+      '<strong>' + dot + ' ' + p.city + ', TX</strong><br>' +
+      '<span style="color:#6b7280">' + p.title.slice(0, 55) + (p.title.length > 55 ? '…' : '') + '</span>';
+  }}
+
+  if (d.recent && d.recent.length) {{
+    var html = d.recent.slice().reverse().map(function(r) {{
+      return '✓ ' + r.city + ' <span style="color:#d1d5db">·</span> ' + r.ts;
+    }}).join('<br>');
+    document.getElementById('live-recent').innerHTML = html;
+  }}
+}}
+
 function refreshLive() {{
   fetch('/api/live')
     .then(function(r) {{ return r.json(); }})
-    .then(function(d) {{
-      setAgentStatus(d.running);
-      var sec = document.getElementById('live-section');
-      sec.style.display = (d.running && d.publishing) ? '' : 'none';
-
-      if (d.publishing) {{
-        var p = d.publishing;
-        var dot = p.equip === 'mini-ex' ? '🟢' : '🔵';
-        document.getElementById('live-now').innerHTML =
-          '<strong>' + dot + ' ' + p.city + ', TX</strong><br>' +
-          '<span style="color:#6b7280">' + p.title.slice(0, 55) + (p.title.length > 55 ? '…' : '') + '</span>';
-      }}
-
-      if (d.recent && d.recent.length) {{
-        var html = d.recent.slice().reverse().map(function(r) {{
-          return '✓ ' + r.city + ' <span style="color:#d1d5db">·</span> ' + r.ts;
-        }}).join('<br>');
-        document.getElementById('live-recent').innerHTML = html;
-      }}
-    }})
+    .then(renderLive)
     .catch(function() {{}});
 }}
 
-// ── Marker refresh: polls /api/markers every 30 s ─────────────────────────────
-function refreshMarkers() {{
-  fetch('/api/markers')
+var live = {{ running: false, publishing: null, recent: [] }};
+var livePoll = null;
+
+function pollLive() {{
+  if (livePoll) return;
+  refreshLive();
+  livePoll = setInterval(refreshLive, 5000);
+}}
+
+function startEvents() {{
+  if (!window.EventSource) {{ pollLive(); return; }}
+  var es = new EventSource('/api/events');
+  es.addEventListener('snapshot', function(e) {{
+    live = JSON.parse(e.data);
+    renderLive(live);
+  }});
+  es.addEventListener('publish', function(e) {{
+    var p = JSON.parse(e.data);
+    live.running = true;
+    live.publishing = p;
+    live.recent = live.recent.concat([p]).slice(-{RECENT_LEN});
+    renderLive(live);
+  }});
+  es.addEventListener('status', function(e) {{
+    live.running = JSON.parse(e.data).running;
+    if (!live.running) live.publishing = null;
+    renderLive(live);
+  }});
+  es.addEventListener('complete', function() {{ refreshMarkers(); }});
+  es.addEventListener('outcome',  function() {{ refreshMarkers(); refreshAnalytics(); }});
+  es.onerror = function() {{
+    // EventSource retries on its own; CLOSED means it gave up.
+    if (es.readyState === EventSource.CLOSED) pollLive();
+  }};
+}}
+
+// ── View loading: markers + competitors for the visible bounds ───────────────
+// Responses carry ETags, so an unchanged view comes back as a bodiless 304.
+function viewQuery() {{
+  return 'bbox=' + map.getBounds().pad(BBOX_PAD).toBBoxString() + '&zoom=' + map.getZoom();
+}}
+
+function loadView(highlightNew) {{
+  var q = viewQuery();
+  fetch('/api/markers?' + q)
     .then(function(r) {{ return r.json(); }})
     .then(function(d) {{
-      if (d.markers)   renderLayers(d.markers, d.uncovered || [], d.pending || []);
+      if (d.markers)   renderLayers(d.markers, d.uncovered || [], d.pending || [], highlightNew);
       if (d.stats)     updateStats(d.stats);
     }})
     .catch(function() {{}});
+  fetch('/api/competitors?' + q)
+    .then(function(r) {{ return r.json(); }})
+    .then(function(d) {{ setCompetitors(d.sellers || {{}}); }})
+    .catch(function() {{}});
+}}
+
+// ── Marker refresh: re-polls the current view every 30 s ──────────────────────
+function refreshMarkers() {{
+  loadView(true);
 }}
 
 function triggerRun(type) {{
@@ -662,15 +840,25 @@ function triggerRun(type) {{
     .catch(function() {{ btn.textContent = '✗ Error'; }});
 }}
 
-if (SERVER_MODE) {{
-  refreshLive();
-  setInterval(refreshLive, 5000);
-  setInterval(refreshMarkers, 30000);
+// ── Click analytics: cached rollups written by stats_tracker ────────────────
+function refreshAnalytics() {{
+  fetch('/api/analytics')
+    .then(function(r) {{ return r.json(); }})
+    .then(function(d) {{
+      var w = d.rollups && d.rollups['7d'];
+      if (w && w.overall && w.overall.clicks_per_listing_day != null) {{
+        document.getElementById('s-cpld').textContent = w.overall.clicks_per_listing_day;
+      }}
+    }})
+    .catch(function() {{}});
 }}
 
 // ── Competitor layer ──────────────────────────────────────────────────────────
+var COMPETITORS = {{}};
 var compLayer = L.layerGroup().addTo(map);
 var compVisible = true;
+var compFilter  = 'all';
+var compPanelReady = false;
 
 function _djitter(seed, scale) {{
   var h = 0;
@@ -704,6 +892,7 @@ function renderCompetitors(filterSellerId) {{
 }}
 
 function filterCompetitors(val) {{
+  compFilter = val;
   renderCompetitors(val);
   if (val !== 'none') {{
     if (!map.hasLayer(compLayer)) map.addLayer(compLayer);
@@ -716,51 +905,148 @@ function toggleComp() {{
   document.getElementById('leg-comp').classList.toggle('off', !compVisible);
 }}
 
-// Initialise competitor panel
-(function() {{
-  var sel = document.getElementById('comp-select');
-  var totalListings = 0;
-  var sellerCount   = 0;
-  Object.keys(COMPETITORS).forEach(function(sid) {{
-    sellerCount++;
-    var seller = COMPETITORS[sid];
-    totalListings += seller.listings.length;
-    var opt = document.createElement('option');
-    opt.value       = sid;
-    opt.textContent = (seller.name || sid) + ' (' + seller.listings.length + ')';
-    sel.appendChild(opt);
-  }});
-  if (sellerCount > 0) {{
-    document.getElementById('s-comp-sellers').textContent  = sellerCount;
-    document.getElementById('s-comp-listings').textContent = totalListings;
-    document.getElementById('comp-panel').style.display    = '';
-    document.getElementById('comp-divider').style.display  = '';
-    document.getElementById('leg-comp').style.display      = '';
-    renderCompetitors('all');
+// Sellers arrive with the listings in view plus their overall "total"; the
+// panel is built from the first response and left alone as the map moves.
+function setCompetitors(sellers) {{
+  COMPETITORS = sellers;
+  if (!compPanelReady) {{
+    compPanelReady = true;
+    var sel = document.getElementById('comp-select');
+    var totalListings = 0;
+    var sellerCount   = 0;
+    Object.keys(sellers).forEach(function(sid) {{
+      sellerCount++;
+      var seller = sellers[sid];
+      var total  = seller.total != null ? seller.total : seller.listings.length;
+      totalListings += total;
+      var opt = document.createElement('option');
+      opt.value       = sid;
+      opt.textContent = (seller.name || sid) + ' (' + total + ')';
+      sel.appendChild(opt);
+    }});
+    if (sellerCount > 0) {{
+      document.getElementById('s-comp-sellers').textContent  = sellerCount;
+      document.getElementById('s-comp-listings').textContent = totalListings;
+      document.getElementById('comp-panel').style.display    = '';
+      document.getElementById('comp-divider').style.display  = '';
+      document.getElementById('leg-comp').style.display      = '';
+    }}
   }}
-}})();
+  renderCompetitors(compFilter);
+}}
+
+// ── Start-up ──────────────────────────────────────────────────────────────────
+if (SERVER_MODE) {{
+  map.on('moveend', function() {{ loadView(false); }});
+  fetch('/api/summary')
+    .then(function(r) {{ return r.json(); }})
+    .then(function(d) {{
+      updateStats(d.stats);
+      map.setView(d.center, {DEFAULT_ZOOM});  // fires moveend -> first loadView
+    }})
+    .catch(function() {{
+      document.getElementById('ts').textContent = 'Could not reach map_server.py';
+    }});
+  refreshAnalytics();
+  startEvents();
+  setInterval(refreshMarkers, 30000);
+}} else {{
+  var dataScript = document.createElement('script');
+  dataScript.src = '{DATA_JS}';
+  dataScript.onload = function() {{
+    var d = window.LISTINGS_DATA;
+    updateStats(d.stats);
+    map.setView(d.center, {DEFAULT_ZOOM});
+    renderLayers(d.markers, d.uncovered, d.pending, false);
+    setCompetitors(d.competitors);
+  }};
+  dataScript.onerror = function() {{
+    document.getElementById('ts').textContent = '{DATA_JS} missing — run map_listings.py';
+  }};
+  document.body.appendChild(dataScript);
+}}
 </script>
 </body>
 </html>
 """
 
-OUT = "listings_map.html"
-with open(OUT, "w", encoding="utf-8") as f:
-    f.write(HTML)
-
-# Also write raw data so map_server /api/markers can serve it without re-parsing HTML
-with open("listings_data.json", "w", encoding="utf-8") as f:
-    json.dump({"markers": markers, "uncovered": uncovered, "pending": pending_markers, "stats": stats},
-              f, ensure_ascii=False)
-
-print(f"Map written to {OUT}")
-print(f"  Active     : {stats['active_total']}  ({stats['active_mini_ex']} mini-ex, {stats['active_track']} track)")
-print(f"  Uncovered  : {stats['uncovered']} / {stats['cities_total']} cities")
-print(f"  Pending    : {stats['pending_total']} task-variant slots across {len(pending_markers)} city/equipment pairs")
-print(f"  Avg clicks : {stats['avg_clicks'] or 'n/a'}  |  7-day avg delta: {stats['avg_7d'] or 'n/a'}")
-
-parser = argparse.ArgumentParser()
-parser.add_argument("--open", action="store_true")
-args, _ = parser.parse_known_args()
-if args.open:
-    webbrowser.open(os.path.abspath(OUT))
+
+def write_outputs(result: dict, base_dir: str = ".") -> str:
+    """Write the listings_map.html shell, listings_data.js (the full payload
+    the shell loads when opened from disk) and listings_data.json (the same
+    payload for scripts). Files whose content hasn't changed are left alone."""
+    payload = {k: result[k] for k in ("markers", "uncovered", "pending", "stats", "competitors", "center")}
+    data = json.dumps(payload, ensure_ascii=False)
+    out_path = os.path.join(base_dir, OUT)
+    write_if_changed(out_path, render_html())
+    write_if_changed(os.path.join(base_dir, DATA_JS), f"window.LISTINGS_DATA = {data};\n")
+    write_if_changed(os.path.join(base_dir, DATA_OUT), data)
+    return out_path
+
+
+def input_digest(base_dir: str = ".") -> str:
+    """Digest of everything the written outputs depend on: every input
+    file's (mtime, size) signature, the ops store's dupes version, the current hour (7-day deltas and ages
+    are time-windowed), the panel's schedule and the page template itself."""
+    meta_path = os.path.join(base_dir, METADATA_FILE)
+    paths = [os.path.join(base_dir, rel) for rel in (STATE_FILE, CITIES_FILE, COMPETITORS_FILE)]
+    paths += [meta_path, snapshot_log_path(meta_path)]
+    parts = (
+        [(os.path.basename(p), file_signature(p)) for p in paths],
+        get_store(os.path.join(base_dir, DB_FILE)).version("dupes"),
+        datetime.now(timezone.utc).strftime("%Y%m%d%H"),
+        _get_schedule_info(),
+        hashlib.sha1(render_html().encode("utf-8")).hexdigest(),
+    )
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+
+def regenerate(base_dir: str = ".", force: bool = False) -> dict:
+    """Load inputs from base_dir, build the map, write the outputs, and
+    return the payload. Unless `force`, an input digest matching the last
+    write returns the payload already on disk without building or writing."""
+    with profiling.span("digest"):
+        digest = input_digest(base_dir)
+    build_path = os.path.join(base_dir, BUILD_FILE)
+    data_path = os.path.join(base_dir, DATA_OUT)
+    if not force and load_json(build_path).get("inputs") == digest:
+        written = load_json(data_path)
+        if written and all(os.path.exists(os.path.join(base_dir, f)) for f in (OUT, DATA_JS)):
+            return {**written, "center": tuple(written["center"]), "skipped": True}
+
+    with profiling.span("load json"):
+        inputs = load_inputs(base_dir)
+    with profiling.span("build"):
+        result = build_map(**inputs)
+    with profiling.span("write outputs"):
+        write_outputs(result, base_dir)
+    write_atomic(build_path, json.dumps({"inputs": digest, "written_at": datetime.now(timezone.utc).isoformat()}))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--open", action="store_true")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if no input has changed")
+    parser.add_argument("--profile", action="store_true", help="Write a cProfile + span timeline to data/profiles/")
+    args, _ = parser.parse_known_args()
+
+    if args.profile:
+        profiling.start("map_listings")
+    result = regenerate(force=args.force)
+    stats = result["stats"]
+    if result.get("skipped"):
+        print(f"Inputs unchanged since the last build — {OUT} left as is")
+    else:
+        print(f"Map written to {OUT}")
+    print(f"  Active     : {stats['active_total']}  ({stats['active_mini_ex']} mini-ex, {stats['active_track']} track)")
+    print(f"  Uncovered  : {stats['uncovered']} / {stats['cities_total']} cities")
+    print(f"  Pending    : {stats['pending_total']} task-variant slots across {len(result['pending'])} city/equipment pairs")
+    print(f"  Avg clicks : {stats['avg_clicks'] or 'n/a'}  |  7-day avg delta: {stats['avg_7d'] or 'n/a'}")
+
+    if args.open:
+        webbrowser.open(os.path.abspath(OUT))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,33 @@
 """
 map_server.py — Local HTTP server for the listings map dashboard.
 
-Serves listings_map.html with live bot controls:
-  GET  /              -> regenerate map and serve HTML
-  GET  /api/status    -> JSON: next_run, last_run, running, last_log
-  GET  /api/markers   -> regenerate + return markers/uncovered/stats JSON
-  GET  /api/live      -> parse log: what's publishing right now + recent posts
-  POST /api/run/agent -> trigger run_daily_agent.bat
-  POST /api/run/stats -> trigger run_stats_tracker.bat
+Serves the listings map dashboard with live bot controls:
+  GET  /                -> static map shell (map_listings.render_html)
+  GET  /api/summary     -> panel stats + initial map center
+  GET  /api/markers     -> markers/uncovered/pending inside ?bbox=w,s,e,n, thinned by &zoom=
+  GET  /api/competitors -> competitor sellers with their listings inside ?bbox=
+  GET  /api/status      -> JSON: next_run, last_run, running, last_log, json_cache
+  GET  /api/live        -> parse log: what's publishing right now + recent posts
+  GET  /api/events      -> server-sent events: a live snapshot, then phase/publish/
+                           complete/outcome/status events as they're appended
+  GET  /api/analytics   -> cached click rollups (per city/equipment/task) + decay curve
+  GET  /api/scan-health -> per-source scan statistics and flags; ?source=&limit= for its recent scans
+  GET  /api/runs        -> per-script run rollups (rates, p50/p95 duration, slow last run);
+                           ?script= for its recent runs, &metric= for one metric's time series
+  POST /api/run/agent   -> trigger run_daily_agent.bat
+  POST /api/run/stats   -> trigger run_stats_tracker.bat
+
+Set TASK_STATUS_BACKEND=stub to run without Task Scheduler (see
+helpers/task_status.py), and MAP_SERVER_DIR to serve another directory's
+state.json / data/ / log instead of this checkout's (the benchmarks point it
+at their synthetic fixtures).
+
+Every response carries an ETag (If-None-Match gets a 304) and is gzipped
+when the client accepts it and the body is big enough to be worth it.
+
+Requests are handled on their own threads. The map payload is rebuilt in
+the background (see MapCache), so a slow build or schtasks query never
+holds up /api/live or any other request.
 
 Usage:
     python map_server.py           # serves on http://localhost:8080
@@ -15,154 +35,155 @@ Usage:
 """
 
 import argparse
+import gzip
+import hashlib
 import json
 import os
-import re
 import subprocess
 import sys
+import threading
+import time
 import webbrowser
-from datetime import datetime
-from http.server import BaseHTTPRequestHandler, HTTPServer
-
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import map_listings
+from helpers import click_analytics, run_outcome, scan_health
+from helpers.event_stream import EventBroadcaster, format_sse
+from helpers.json_store import cache_stats
+from helpers.log_events import LiveState, publish_dict
+from helpers.log_tail import LogTail
+from helpers.ops_store import DB_FILE, get_store
+from helpers.task_status import get_provider
+
+BASE_DIR = os.path.abspath(os.environ.get("MAP_SERVER_DIR") or os.path.dirname(os.path.abspath(__file__)))
 DEFAULT_PORT = 8080
+LIVE_LINES = 150  # how far back /api/live looks for publish/phase events
+GZIP_MIN_BYTES = 1024  # smaller bodies aren't worth compressing
+MAP_MAX_AGE = 10       # seconds before a request triggers a background rebuild
+FIRST_BUILD_TIMEOUT = 30  # how long a request waits when no map has been built yet
+SSE_HEARTBEAT = 15     # seconds of quiet before /api/events sends a keep-alive comment
 
+# Shared tail of the progress log: each poll reads only bytes appended since
+# the previous one instead of re-reading a log that grows for months.
+_log_tail = LogTail(os.path.join(BASE_DIR, "listing_progress.log"), maxlen=LIVE_LINES)
 
-# ── Task Scheduler helpers ────────────────────────────────────────────────────
+_ops = get_store(os.path.join(BASE_DIR, DB_FILE))
 
-def _schtasks_bot_tasks():
-    """Return list of dicts for all FacebookMarketplaceBot_*_Run* tasks."""
-    try:
-        r = subprocess.run(
-            ["schtasks", "/query", "/fo", "LIST", "/v"],
-            capture_output=True, text=True, timeout=15,
-            encoding="utf-8", errors="replace"
-        )
-        tasks, cur = [], {}
-        for line in r.stdout.splitlines():
-            line = line.strip()
-            if line.startswith("TaskName:"):
-                if cur.get("name") and "FacebookMarketplaceBot" in cur["name"]:
-                    tasks.append(cur)
-                name = line.split(":", 1)[1].strip()
-                cur = {"name": name} if "FacebookMarketplaceBot" in name else {}
-            elif cur:
-                if line.startswith("Next Run Time:"):
-                    cur["next_run"] = line.split(":", 1)[1].strip()
-                elif line.startswith("Last Run Time:"):
-                    cur["last_run"] = line.split(":", 1)[1].strip()
-                elif line.startswith("Status:"):
-                    cur["status"] = line.split(":", 1)[1].strip()
-        if cur.get("name") and "FacebookMarketplaceBot" in cur["name"]:
-            tasks.append(cur)
-        return tasks
-    except Exception:
-        return []
+# One follower of the log + run history for every /api/events client.
+_events = EventBroadcaster(
+    os.path.join(BASE_DIR, "listing_progress.log"),
+    _ops,
+    running=lambda: get_provider().agent_running(),
+    snapshot_lines=LIVE_LINES,
+)
 
 
-def _parse_ts(s):
-    try:
-        return datetime.strptime(s.strip(), "%m/%d/%Y %I:%M:%S %p")
-    except Exception:
-        return None
-
-
-def _get_next_run(tasks):
-    now = datetime.now()
-    soonest = None
-    for t in tasks:
-        if "_Run" not in t.get("name", ""):
-            continue
-        nr = t.get("next_run", "")
-        if not nr or "N/A" in nr:
-            continue
-        dt = _parse_ts(nr)
-        if dt and dt > now and (soonest is None or dt < soonest):
-            soonest = dt
-    return soonest.strftime("%a %m/%d %I:%M %p") if soonest else None
-
-
-def _get_last_run(tasks):
-    latest = None
-    for t in tasks:
-        if "_Run" not in t.get("name", ""):
-            continue
-        lr = t.get("last_run", "")
-        if not lr or "N/A" in lr:
-            continue
-        dt = _parse_ts(lr)
-        if dt and (latest is None or dt > latest):
-            latest = dt
-    return latest.strftime("%a %m/%d %I:%M %p") if latest else None
-
+# ── Status helpers ────────────────────────────────────────────────────────────
+# Scheduled-run times and the running check come from helpers.task_status,
+# which caches the schtasks/wmic answers and refreshes them in the background.
 
 def _is_agent_running():
-    try:
-        r = subprocess.run(
-            ["wmic", "process", "where", "name='python.exe'", "get", "CommandLine"],
-            capture_output=True, text=True, timeout=8
-        )
-        return "daily_agent.py" in r.stdout or "stats_tracker.py" in r.stdout
-    except Exception:
-        return False
+    return get_provider().agent_running()
 
 
 def _last_log_line():
-    log_path = os.path.join(BASE_DIR, "listing_progress.log")
-    try:
-        with open(log_path, "r", encoding="utf-8", errors="replace") as f:
-            lines = [l.rstrip() for l in f if l.strip()]
-        return lines[-1] if lines else None
-    except Exception:
-        return None
+    return _log_tail.last_line()
 
 
-def _parse_live():
-    """Parse the log for what the agent is currently posting and recent posts."""
-    log_path = os.path.join(BASE_DIR, "listing_progress.log")
-    publishing = None
-    recent = []
-    phase = None
+def _parse_live(lines: list = None):
+    """Parse the log (or the given lines of it) for what the agent is
+    currently posting and recent posts."""
+    live = LiveState()
     try:
-        with open(log_path, "r", encoding="utf-8", errors="replace") as f:
-            lines = f.readlines()
-        for line in lines[-150:]:
-            line = line.strip()
-            m = re.search(r"(\d{2}:\d{2}:\d{2}).*Publishing slot '([^']+)': (.+)$", line)
-            if m:
-                slot  = m.group(2)
-                parts = slot.split("_")
-                publishing = {
-                    "slot":  slot,
-                    "title": m.group(3),
-                    "city":  parts[1] if len(parts) > 1 else "",
-                    "equip": parts[0],
-                    "ts":    m.group(1),
-                }
-                recent.append(publishing.copy())
-            else:
-                pm = re.search(r"Phase (\S+)", line)
-                if pm:
-                    phase = pm.group(1).rstrip(".")
-                if "Agent run complete" in line or "Session window closing" in line:
-                    phase = "done"
+        live.feed(_log_tail.lines() if lines is None else lines)
     except Exception:
         pass
 
     running = _is_agent_running()
     return {
         "running":    running,
-        "publishing": publishing if running else None,
-        "recent":     recent[-6:],
-        "phase":      phase,
+        "publishing": publish_dict(live.publishing) if (running and live.publishing) else None,
+        "recent":     [publish_dict(e) for e in live.recent],
+        "phase":      live.phase,
     }
 
 
-def _regenerate_map():
-    subprocess.run(
-        [sys.executable, os.path.join(BASE_DIR, "map_listings.py")],
-        cwd=BASE_DIR, timeout=30, capture_output=True
-    )
+def _build_map():
+    """Build the map payload in-process. map_listings keeps its parsed inputs
+    and per-slot markers between calls, so only changed slots are recomputed."""
+    return map_listings.build_map(**map_listings.load_inputs(BASE_DIR))
+
+
+class MapCache:
+    """The latest map payload, rebuilt off the request path.
+
+    get() returns the last good build straight away and, if it's older than
+    max_age, starts a rebuild in a background thread. Rebuilds are
+    single-flight: however many requests ask while one is running, they
+    share it rather than queueing their own (map_listings' MapBuilder isn't
+    meant to run twice at once anyway). Only the very first requests, before
+    any build has finished, wait — on that same shared build."""
+
+    def __init__(self, build, max_age: float = MAP_MAX_AGE):
+        self._build = build
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._result = None
+        self._error = None
+        self._built_at = 0.0
+        self._inflight = None  # threading.Event of the running rebuild
+
+    def refresh(self) -> threading.Event:
+        """Start a rebuild unless one is already running. Returns an event
+        that's set when the running rebuild finishes."""
+        with self._lock:
+            if self._inflight is None:
+                self._inflight = threading.Event()
+                threading.Thread(target=self._run, args=(self._inflight,),
+                                 name="map-rebuild", daemon=True).start()
+            return self._inflight
+
+    def _run(self, done: threading.Event):
+        try:
+            result, error = self._build(), None
+        except Exception as e:
+            result, error = None, e
+        with self._lock:
+            if result is not None:
+                self._result = result
+            self._error = error
+            self._built_at = time.monotonic()
+            self._inflight = None
+        done.set()
+
+    def get(self, timeout: float = FIRST_BUILD_TIMEOUT) -> dict:
+        with self._lock:
+            result = self._result
+            stale = time.monotonic() - self._built_at > self.max_age
+        if result is not None:
+            if stale:
+                self.refresh()
+            return result
+
+        self.refresh().wait(timeout)
+        with self._lock:
+            result, error = self._result, self._error
+        if result is None:
+            raise RuntimeError(f"map build failed: {error}" if error else "map build timed out")
+        return result
+
+
+_map_cache = MapCache(_build_map)
+
+
+def _view_args(query: dict):
+    """(bbox, zoom) from ?bbox=west,south,east,north&zoom=N; either may be
+    absent. Raises ValueError on malformed values."""
+    bbox = query.get("bbox", [None])[0]
+    zoom = query.get("zoom", [None])[0]
+    return (map_listings.parse_bbox(bbox) if bbox else None,
+            int(zoom) if zoom else None)
 
 
 # ── HTTP handler ──────────────────────────────────────────────────────────────
@@ -171,22 +192,57 @@ class Handler(BaseHTTPRequestHandler):
     def log_message(self, fmt, *args):
         pass  # suppress default request logging
 
-    def _send_json(self, data, status=200):
-        body = json.dumps(data).encode()
+    def _send_body(self, body: bytes, content_type: str, status=200):
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if status == 200 and etag in self.headers.get("If-None-Match", ""):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            return
+        gzipped = len(body) >= GZIP_MIN_BYTES and "gzip" in self.headers.get("Accept-Encoding", "")
+        if gzipped:
+            body = gzip.compress(body, compresslevel=6)
         self.send_response(status)
-        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Type", content_type)
         self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")  # always revalidate via ETag
+        self.send_header("Vary", "Accept-Encoding")
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
         self.send_header("Access-Control-Allow-Origin", "*")
         self.end_headers()
         self.wfile.write(body)
 
+    def _send_json(self, data, status=200):
+        self._send_body(json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json", status)
+
     def _send_html(self, body, status=200):
-        enc = body.encode("utf-8")
-        self.send_response(status)
-        self.send_header("Content-Type", "text/html; charset=utf-8")
-        self.send_header("Content-Length", str(len(enc)))
-        self.end_headers()
-        self.wfile.write(enc)
+        self._send_body(body.encode("utf-8"), "text/html; charset=utf-8", status)
+
+    def _stream_events(self):
+        """Hold the connection open and write SSE frames until the client
+        goes away (a failed write) or falls too far behind and is dropped."""
+        sub = _events.subscribe()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            # Built from the lines the subscription starts after, so no event is in both.
+            self.wfile.write(format_sse({"type": "snapshot", **_parse_live(sub.lines)}))
+            self.wfile.flush()
+            while not sub.closed.is_set():
+                event = sub.get(timeout=SSE_HEARTBEAT)
+                self.wfile.write(format_sse(event) if event else b": keep-alive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError):
+            pass
+        finally:
+            _events.unsubscribe(sub)
+            self.close_connection = True
 
     def do_OPTIONS(self):
         self.send_response(204)
@@ -195,35 +251,78 @@ class Handler(BaseHTTPRequestHandler):
         self.end_headers()
 
     def do_GET(self):
-        path = self.path.split("?")[0]
+        url = urlsplit(self.path)
+        path, query = url.path, parse_qs(url.query)
 
         if path in ("/", "/index.html"):
-            _regenerate_map()
-            html_path = os.path.join(BASE_DIR, "listings_map.html")
+            self._send_html(map_listings.render_html())
+
+        elif path == "/api/summary":
             try:
-                with open(html_path, "r", encoding="utf-8") as f:
-                    self._send_html(f.read())
+                result = _map_cache.get()
+                self._send_json({"stats": result["stats"], "center": result["center"]})
             except Exception as e:
-                self._send_html(f"<h1>Error loading map: {e}</h1>", 500)
+                self._send_json({"error": str(e)}, 500)
 
         elif path == "/api/status":
-            tasks = _schtasks_bot_tasks()
+            next_run, last_run = get_provider().schedule()
             self._send_json({
                 "running":  _is_agent_running(),
-                "next_run": _get_next_run(tasks),
-                "last_run": _get_last_run(tasks),
+                "next_run": next_run,
+                "last_run": last_run,
                 "last_log": _last_log_line(),
+                "json_cache": cache_stats(),
             })
 
         elif path == "/api/live":
             self._send_json(_parse_live())
 
-        elif path == "/api/markers":
-            _regenerate_map()
-            data_path = os.path.join(BASE_DIR, "listings_data.json")
+        elif path == "/api/events":
+            self._stream_events()
+
+        elif path == "/api/analytics":
+            self._send_json(click_analytics.load_summary(os.path.join(BASE_DIR, click_analytics.ANALYTICS_FILE)))
+
+        elif path == "/api/scan-health":
+            source = query.get("source", [None])[0]
+            if source:
+                try:
+                    limit = max(1, min(int(query.get("limit", ["100"])[0]), 1000))
+                except ValueError:
+                    self._send_json({"error": "limit must be an integer"}, 400)
+                    return
+                self._send_json({"source": source, "scans": scan_health.history(source, limit, store=_ops)})
+            else:
+                self._send_json({"sources": scan_health.summary(store=_ops)})
+
+        elif path == "/api/runs":
+            script, metric = query.get("script", [None])[0], query.get("metric", [None])[0]
+            try:
+                limit = max(1, min(int(query.get("limit", ["100"])[0]), 1000))
+            except ValueError:
+                self._send_json({"error": "limit must be an integer"}, 400)
+                return
+            if script and metric:
+                self._send_json({"script": script, "metric": metric,
+                                 "series": run_outcome.metric_series(script, metric, limit, store=_ops)})
+            elif script:
+                self._send_json({"script": script, "runs": _ops.runs(script, limit=limit),
+                                 "metrics": _ops.metric_names(script)})
+            else:
+                self._send_json({"scripts": run_outcome.rollups(store=_ops)})
+
+        elif path in ("/api/markers", "/api/competitors"):
+            try:
+                bbox, zoom = _view_args(query)
+            except ValueError as e:
+                self._send_json({"error": str(e)}, 400)
+                return
             try:
-                with open(data_path, "r", encoding="utf-8") as f:
-                    self._send_json(json.load(f))
+                result = _map_cache.get()
+                if path == "/api/markers":
+                    self._send_json(map_listings.view(result, bbox, zoom))
+                else:
+                    self._send_json({"sellers": map_listings.competitor_view(result["competitors"], bbox)})
             except Exception as e:
                 self._send_json({"error": str(e)}, 500)
 
@@ -242,6 +341,7 @@ class Handler(BaseHTTPRequestHandler):
                     cwd=BASE_DIR,
                     creationflags=subprocess.CREATE_NEW_CONSOLE,
                 )
+                get_provider().invalidate()  # pick up the new run on the next poll
                 self._send_json({"ok": True, "message": "Agent started in new console window."})
             except Exception as e:
                 self._send_json({"ok": False, "message": str(e)}, 500)
@@ -254,6 +354,7 @@ class Handler(BaseHTTPRequestHandler):
                     cwd=BASE_DIR,
                     creationflags=subprocess.CREATE_NEW_CONSOLE,
                 )
+                get_provider().invalidate()  # pick up the new run on the next poll
                 self._send_json({"ok": True, "message": "Competitor scraper started."})
             except Exception as e:
                 self._send_json({"ok": False, "message": str(e)}, 500)
@@ -266,6 +367,7 @@ class Handler(BaseHTTPRequestHandler):
                     cwd=BASE_DIR,
                     creationflags=subprocess.CREATE_NEW_CONSOLE,
                 )
+                get_provider().invalidate()  # pick up the new run on the next poll
                 self._send_json({"ok": True, "message": "Stats tracker started in new console window."})
             except Exception as e:
                 self._send_json({"ok": False, "message": str(e)}, 500)
@@ -283,7 +385,10 @@ if __name__ == "__main__":
     parser.add_argument("--no-open", action="store_true", help="Don't auto-open browser")
     args = parser.parse_args()
 
-    server = HTTPServer(("localhost", args.port), Handler)
+    # map_listings and helpers.catalog resolve data/ paths relative to the cwd.
+    os.chdir(BASE_DIR)
+    _map_cache.refresh()  # first build runs while the browser is opening
+    server = ThreadingHTTPServer(("localhost", args.port), Handler)
     url = f"http://localhost:{args.port}"
     print(f"Listings map server: {url}")
     print("Ctrl+C to stop.")
@@ -0,0 +1,38 @@
+"""
+migrate_ops_store.py — copy the old JSON ledgers into data/ops.db.
+
+The store already does this by itself the first time any script opens a new
+database; this is for doing it explicitly (e.g. before the first scheduled
+run after upgrading) or re-importing into a fresh database. Reads
+data/run_history.json, data/scan_health.json, data/fuel_price_history.json /
+.jsonl and data/duplicate_history.json; leaves them in place.
+
+    python migrate_ops_store.py              # import once (no-op if already done)
+    python migrate_ops_store.py --force      # import again, even if already done
+    python migrate_ops_store.py --db other.db --data-dir backup/data
+"""
+
+import argparse
+
+from helpers.ops_store import DB_FILE, JSON_IMPORT_KEY, OpsStore, import_json_ledgers
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default=DB_FILE, help=f"Database to import into (default {DB_FILE})")
+    parser.add_argument("--data-dir", default=None, help="Where the JSON files are (default: the database's directory)")
+    parser.add_argument("--force", action="store_true",
+                        help="Import even if this database already has — duplicates rows already imported")
+    args = parser.parse_args()
+
+    store = OpsStore(args.db, import_json=False)
+    counts = import_json_ledgers(store, args.data_dir, force=args.force)
+    if counts is None:
+        print(f"{args.db} already imported the JSON ledgers (use --force to import again).")
+        print(f"  previous import: {store.meta(JSON_IMPORT_KEY)}")
+        return
+    print(f"Imported into {args.db}: " + ", ".join(f"{n} {table}" for table, n in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
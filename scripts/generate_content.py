@@ -18,7 +18,7 @@ from pathlib import Path
 import anthropic
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from helpers.ads import get_equipment, get_locations
+from helpers.catalog import get_equipment, get_locations
 
 CONTENT_FILE = "data/generated_content.json"
 BATCH_ID_FILE = "data/.batch_id"